@@ -0,0 +1,65 @@
+# Generated by Django 3.1.1 on 2026-10-18 21:10
+
+from django.db import migrations
+
+# The text search vector of a part is stored in a generated column, so that
+# the ranking of the matches doesn't parse their text again. The characters
+# between the words are replaced by spaces, as the query is split, otherwise
+# the parser reads the number of SKF-6205 as -6205.
+POSTGRESQL_FORWARDS = [
+    "ALTER TABLE frontend_part ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('simple', regexp_replace("
+    r"coalesce(part_number, '') || ' ' || coalesce(alt_part_number, ''), '\W+', ' ', 'g')), 'A') "
+    r"|| setweight(to_tsvector('simple', regexp_replace(description, '\W+', ' ', 'g')), 'B')) STORED",
+    "CREATE INDEX frontend_part_search_index ON frontend_part USING gin (search_vector)",
+]
+POSTGRESQL_BACKWARDS = [
+    "DROP INDEX frontend_part_search_index",
+    "ALTER TABLE frontend_part DROP COLUMN search_vector",
+]
+
+SQLITE_FORWARDS = [
+    "CREATE VIRTUAL TABLE frontend_part_search USING fts5("
+    "part_number, alt_part_number, description, content='frontend_part', content_rowid='id', prefix='2 3')",
+    "CREATE TRIGGER frontend_part_search_insert AFTER INSERT ON frontend_part BEGIN "
+    "INSERT INTO frontend_part_search(rowid, part_number, alt_part_number, description) "
+    "VALUES (new.id, new.part_number, new.alt_part_number, new.description); END",
+    "CREATE TRIGGER frontend_part_search_delete AFTER DELETE ON frontend_part BEGIN "
+    "INSERT INTO frontend_part_search(frontend_part_search, rowid, part_number, alt_part_number, description) "
+    "VALUES ('delete', old.id, old.part_number, old.alt_part_number, old.description); END",
+    "CREATE TRIGGER frontend_part_search_update AFTER UPDATE ON frontend_part BEGIN "
+    "INSERT INTO frontend_part_search(frontend_part_search, rowid, part_number, alt_part_number, description) "
+    "VALUES ('delete', old.id, old.part_number, old.alt_part_number, old.description); "
+    "INSERT INTO frontend_part_search(rowid, part_number, alt_part_number, description) "
+    "VALUES (new.id, new.part_number, new.alt_part_number, new.description); END",
+    "INSERT INTO frontend_part_search(frontend_part_search) VALUES ('rebuild')",
+]
+SQLITE_BACKWARDS = [
+    "DROP TRIGGER frontend_part_search_insert",
+    "DROP TRIGGER frontend_part_search_delete",
+    "DROP TRIGGER frontend_part_search_update",
+    "DROP TABLE frontend_part_search",
+]
+
+
+def create_search_index(apps, schema_editor):
+    statements = {'postgresql': POSTGRESQL_FORWARDS, 'sqlite': SQLITE_FORWARDS}
+    for statement in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    statements = {'postgresql': POSTGRESQL_BACKWARDS, 'sqlite': SQLITE_BACKWARDS}
+    for statement in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('frontend', '0003_auto_20241104_1333'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
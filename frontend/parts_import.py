@@ -0,0 +1,224 @@
+"""This file imports the parts from the CSV export of the inventory.
+
+The rows are read one at a time and converted by chunks of
+PARTS_IMPORT_CHUNK_SIZE rows, each chunk being written in its own
+transaction: the parts whose part number is known are updated, the others
+are created, in bulk. The rows which can't be converted are written to a
+reject file with their error instead of stopping the import, and the number
+of rows written is kept in a checkpoint file to resume an interrupted
+import.
+"""
+
+import csv
+import json
+import os
+import time
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.db.models import CharField, TextField
+
+from .models import Part, Supplier
+
+# Fields of the parts, by column of the CSV export.
+COLUMNS = {
+    'partno': 'part_number',
+    'altpartno': 'alt_part_number',
+    'descrip': 'description',
+    'bin_locat': 'bin_location',
+    'location': 'location',
+    'cost': 'cost',
+    'stock': 'stock',
+    'mfr': 'manufacturer',
+    'mfrpartno': 'manufacturer_part_number',
+    'vpartno': 'vpart_number',
+    'onhand': 'on_hand',
+    'onorder': 'on_order',
+    'supplierid': 'supplier_id',
+    'active': 'active',
+    'code': 'code',
+    'comment': 'comment',
+    'history': 'history',
+    'class': 'part_class',
+    'lastordr': 'last_order',
+    'lead': 'lead_time',
+    'note': 'note',
+    'order_st': 'order_status',
+    'status': 'status',
+    'orderpt': 'order_point',
+    'orderqty': 'order_quantity',
+    'unitms': 'unit_of_measure',
+}
+# The booleans of the export are 'T' or 'F'.
+BOOLEAN_COLUMNS = {'stock', 'active'}
+UPDATED_FIELDS = list(COLUMNS.values())
+
+
+class RowError(ValueError):
+    """Raised when a row of the export can't be converted to a part."""
+
+
+class PartsImporter:
+    """
+    Define the import of a CSV export of the parts.
+
+    The suppliers are read once, so that the rows are checked without a
+    query.
+    """
+
+    def __init__(self, path, chunk_size=None, reject_path=None, checkpoint_path=None, progress=None):
+        """Define the import of a file, reporting the chunks to progress."""
+        self.path = path
+        self.chunk_size = chunk_size or settings.PARTS_IMPORT_CHUNK_SIZE
+        self.reject_path = reject_path or path + '.rejects.csv'
+        self.checkpoint_path = checkpoint_path or path + '.checkpoint'
+        self.progress = progress
+        self._fields = {field.attname: field for field in Part._meta.concrete_fields}
+        self._supplier_ids = None
+
+    def run(self, resume=False):
+        """Import the parts, after the rows of the checkpoint if resume is set.
+
+        Return the number of rows read, of parts created and updated, of
+        rows rejected, and the duration in seconds.
+        """
+        self._supplier_ids = set(Supplier.objects.values_list('id', flat=True))
+        done = self._read_checkpoint() if resume else 0
+        metrics = {'rows': done, 'created': 0, 'updated': 0, 'rejected': 0, 'duration': 0}
+        start = time.perf_counter()
+        with open(self.path, newline='') as source, \
+                open(self.reject_path, 'a' if resume else 'w', newline='') as rejects:
+            reader = csv.DictReader(source)
+            reject_writer = csv.DictWriter(rejects, fieldnames=list(reader.fieldnames or []) + ['error'])
+            if not resume or rejects.tell() == 0:
+                reject_writer.writeheader()
+            for _ in zip(range(done), reader):
+                pass
+            chunk = []
+            for row in reader:
+                chunk.append(row)
+                if len(chunk) == self.chunk_size:
+                    self._import_chunk(chunk, reject_writer, rejects, metrics, start)
+                    chunk = []
+            if chunk:
+                self._import_chunk(chunk, reject_writer, rejects, metrics, start)
+        if os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+        metrics['duration'] = time.perf_counter() - start
+        return metrics
+
+    def convert(self, row):
+        """Return the part of a row, raise a RowError if it is not valid."""
+        values = {}
+        for column, attname in COLUMNS.items():
+            value = (row.get(column) or '').strip()
+            if column in BOOLEAN_COLUMNS:
+                values[attname] = value == 'T'
+                continue
+            field = self._fields[attname]
+            if value == '':
+                if field.null:
+                    values[attname] = None
+                    continue
+                if not isinstance(field, (CharField, TextField)):
+                    raise RowError(f"{column} is required")
+            try:
+                values[attname] = field.to_python(value)
+                if values[attname] is not None:
+                    field.run_validators(values[attname])
+            except ValidationError as e:
+                raise RowError(f"{column} {value!r}: {' '.join(e.messages)}")
+        if values['supplier_id'] is not None and values['supplier_id'] not in self._supplier_ids:
+            raise RowError(f"supplierid {values['supplier_id']}: no such supplier")
+        return Part(**values)
+
+    def _import_chunk(self, rows, reject_writer, rejects, metrics, start):
+        parts, rejected = [], []
+        for row in rows:
+            try:
+                parts.append(self.convert(row))
+            except RowError as e:
+                rejected.append(dict(row, error=str(e)))
+        created, updated = self._write(parts)
+        metrics['rows'] += len(rows)
+        metrics['created'] += created
+        metrics['updated'] += updated
+        metrics['rejected'] += len(rejected)
+        reject_writer.writerows(rejected)
+        rejects.flush()
+        self._write_checkpoint(metrics['rows'])
+        if self.progress is not None:
+            self.progress(metrics, time.perf_counter() - start)
+
+    def _write(self, parts):
+        """Create or update the parts in a transaction, by part number.
+
+        The last row of a part number wins, and updates the first part of
+        this number. The parts without a number are always created.
+        """
+        by_number, new_parts = {}, []
+        for part in parts:
+            if part.part_number:
+                by_number[part.part_number] = part
+            else:
+                new_parts.append(part)
+        with transaction.atomic():
+            existing = Part.objects.filter(part_number__in=by_number).order_by('-pk')
+            ids = dict(existing.values_list('part_number', 'pk'))
+            updated_parts = []
+            for number, part in by_number.items():
+                if number in ids:
+                    part.pk = ids[number]
+                    updated_parts.append(part)
+                else:
+                    new_parts.append(part)
+            Part.objects.bulk_create(new_parts)
+            if updated_parts:
+                self._update(updated_parts)
+        return len(new_parts), len(updated_parts)
+
+    def _update(self, parts):
+        """Update the parts in a single query.
+
+        With PostgreSQL the rows are joined to a VALUES list, as the CASE
+        expressions of bulk_update are evaluated for each row.
+        """
+        if connection.vendor != 'postgresql':
+            Part.objects.bulk_update(parts, UPDATED_FIELDS)
+            return
+        quote = connection.ops.quote_name
+        fields = [self._fields[attname] for attname in UPDATED_FIELDS]
+        primary_key = Part._meta.pk
+        placeholder = '({})'.format(
+            ', '.join('%s::{}'.format(field.cast_db_type(connection)) for field in [primary_key] + fields)
+        )
+        params = []
+        for part in parts:
+            for field in [primary_key] + fields:
+                params.append(field.get_db_prep_save(getattr(part, field.attname), connection))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'UPDATE {table} SET {assignments} FROM (VALUES {rows}) AS new ({columns}) '
+                'WHERE {table}.{pk} = new.{pk}'.format(
+                    table=quote(Part._meta.db_table),
+                    assignments=', '.join('{0} = new.{0}'.format(quote(field.column)) for field in fields),
+                    rows=', '.join([placeholder] * len(parts)),
+                    columns=', '.join(quote(field.column) for field in [primary_key] + fields),
+                    pk=quote(primary_key.column),
+                ),
+                params,
+            )
+
+    def _read_checkpoint(self):
+        try:
+            with open(self.checkpoint_path) as checkpoint:
+                return json.load(checkpoint)['rows']
+        except FileNotFoundError:
+            return 0
+
+    def _write_checkpoint(self, rows):
+        # The checkpoint is written aside then renamed, never half written.
+        with open(self.checkpoint_path + '.tmp', 'w') as checkpoint:
+            json.dump({'path': os.path.abspath(self.path), 'rows': rows}, checkpoint)
+        os.replace(self.checkpoint_path + '.tmp', self.checkpoint_path)
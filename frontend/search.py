@@ -0,0 +1,114 @@
+"""This file searches the parts by part number and description.
+
+With PostgreSQL, the parts are found with a GIN index on the text search
+vector of their part numbers and description, stored in their row. With
+SQLite, they are found with an FTS5 table kept up to date by triggers.
+Either way each word of the query matches the words starting with it, or
+only itself for a single character. The parts are ranked with their part
+numbers weighing more than their description, and they are paged with a
+cursor holding the rank and id of the last part of the previous page, so
+that no page counts or skips the parts before it.
+"""
+
+import base64
+import json
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+
+from .models import Part
+
+WORD_REGEX = re.compile(r'\w+')
+
+
+def find_parts(query, cursor=None, page_size=None):
+    """Return the parts of the page matching the query, best ranked first.
+
+    The cursor of the next page is returned with the parts, None on the last
+    page. Raise a ValueError if the cursor is not valid.
+    """
+    page_size = page_size or settings.PARTS_SEARCH_PAGE_SIZE
+    words = WORD_REGEX.findall(query.lower())
+    if not words:
+        return [], None
+    after = _decode(cursor) if cursor else None
+    if connection.vendor == 'postgresql':
+        parts = _find_postgresql(words, after, page_size + 1)
+    elif connection.vendor == 'sqlite':
+        parts = _find_sqlite(words, after, page_size + 1)
+    else:
+        parts = _find_others(words, after, page_size + 1)
+    if len(parts) <= page_size:
+        return parts, None
+    parts = parts[:page_size]
+    return parts, _encode(parts[-1])
+
+
+def _find_postgresql(words, after, limit):
+    # The search_vector column is added by the 0004_part_search migration.
+    # The lower ranks come after, as the greater ids of the same rank. The
+    # rank of the cursor is compared as a real, as ts_rank gives it.
+    keyset = ''
+    params = [' & '.join(word + ':*' if len(word) > 1 else word for word in words)]
+    if after is not None:
+        keyset = "AND (-ts_rank(search_vector, query), id) > (%s::real, %s)"
+        params += [-after[0], after[1]]
+    return list(
+        Part.objects.raw(
+            "SELECT {columns}, ts_rank(search_vector, query) AS search_rank "
+            "FROM {table}, to_tsquery('simple', %s) AS query WHERE search_vector @@ query {keyset} "
+            "ORDER BY search_rank DESC, id LIMIT {limit}".format(
+                columns=', '.join(field.column for field in Part._meta.concrete_fields),
+                table=Part._meta.db_table,
+                keyset=keyset,
+                limit=int(limit),
+            ), params
+        )
+    )
+
+
+def _find_sqlite(words, after, limit):
+    # The bm25 ranks are negative, the best first.
+    keyset = ''
+    params = [' AND '.join('"{}"'.format(word) + ('*' if len(word) > 1 else '') for word in words)]
+    if after is not None:
+        keyset = "AND (-search_rank, {table}.id) > (%s, %s)".format(table=Part._meta.db_table)
+        params += [-after[0], after[1]]
+    return list(
+        Part.objects.raw(
+            "SELECT * FROM (SELECT {table}.*, -bm25({table}_search, 10.0, 10.0, 1.0) AS search_rank "
+            "FROM {table}_search JOIN {table} ON {table}.id = {table}_search.rowid "
+            "WHERE {table}_search MATCH %s) AS {table} WHERE 1 {keyset} "
+            "ORDER BY search_rank DESC, id LIMIT {limit}".format(
+                table=Part._meta.db_table, keyset=keyset, limit=int(limit)
+            ), params
+        )
+    )
+
+
+def _find_others(words, after, limit):
+    parts = Part.objects.all()
+    for word in words:
+        parts = parts.filter(
+            Q(part_number__icontains=word) | Q(alt_part_number__icontains=word) | Q(description__icontains=word)
+        )
+    if after is not None:
+        parts = parts.filter(pk__gt=after[1])
+    parts = list(parts.order_by('pk')[:limit])
+    for part in parts:
+        part.search_rank = 0
+    return parts
+
+
+def _encode(part):
+    return base64.urlsafe_b64encode(json.dumps([part.search_rank, part.pk]).encode()).decode()
+
+
+def _decode(cursor):
+    try:
+        rank, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return float(rank), int(pk)
+    except (TypeError, ValueError):
+        raise ValueError("The cursor is not valid.")
@@ -8,7 +8,8 @@ from django.contrib.auth import authenticate, login
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.core.paginator import Paginator
-from django.db.models import Q
+from django.http import HttpResponseBadRequest
+from .search import find_parts
 
 def user_login(request):
     if request.method == 'POST':
@@ -145,19 +146,16 @@ def part_list(request):
     return render(request, 'frontend/part_list.html', {'parts': parts})  # Use the correct template path
 
 def search_parts(request):
-    query = request.GET.get('q')  # Get the search query
-    part_list = Part.objects.all()  # Get all parts
-
-    if query:
-        part_list = part_list.filter(
-            Q(description__icontains=query) |
-            Q(part_number__icontains=query) |
-            Q(alt_part_number__icontains=query)
-        )
-
-    # Set up pagination
-    paginator = Paginator(part_list, 50)  # Show 50 parts per page
-    page_number = request.GET.get('page')  # Get the current page number from the URL
-    parts = paginator.get_page(page_number)  # Get the parts for the current page
-
-    return render(request, 'frontend/part_list.html', {'parts': parts, 'query': query})  # Use the correct template path
\ No newline at end of file
+    query = request.GET.get('q', '').strip()  # Get the search query
+    if not query:
+        return part_list(request)
+
+    # Get the best ranked parts after the cursor of the previous page
+    try:
+        parts, next_cursor = find_parts(query, request.GET.get('after'))
+    except ValueError:
+        return HttpResponseBadRequest('The page is not valid.')
+
+    return render(
+        request, 'frontend/part_search.html', {'parts': parts, 'query': query, 'next_cursor': next_cursor}
+    )
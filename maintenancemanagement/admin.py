@@ -11,6 +11,7 @@ from .models import (
     FieldValue,
     File,
     Task,
+    TriggerCondition,
 )
 
 # Register your models here.
@@ -23,3 +24,4 @@ admin.site.register(FieldValue)
 admin.site.register(FieldObject)
 admin.site.register(Equipment)
 admin.site.register(EquipmentType)
+admin.site.register(TriggerCondition)
@@ -6,3 +6,8 @@ class MaintenancemanagementConfig(AppConfig):
     """This is the app class."""
 
     name = 'maintenancemanagement'
+
+    def ready(self):
+        """Invalidate the cached requirements when their objects change."""
+        from maintenancemanagement import requirements
+        requirements.connect_signals()
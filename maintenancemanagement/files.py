@@ -0,0 +1,373 @@
+"""This file checks, stores and sends the files attached to the equipments.
+
+An uploaded file is accepted from the magic number of its first bytes,
+without reading the rest of it. The structure of the PDF files is checked
+afterwards by the scheduler worker. The content of a file is hashed while
+it is received and stored once, in the directory of its digest: the files
+uploaded again share it. A downloaded file is sent by the front proxy when
+it is configured, or streamed by parts otherwise.
+"""
+
+import hashlib
+import logging
+import mimetypes
+import os
+import re
+import shutil
+from urllib.parse import quote
+
+from apscheduler.schedulers.background import BackgroundScheduler
+from PyPDF4.pdf import PdfFileReader
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.files.uploadhandler import (
+    MemoryFileUploadHandler,
+    TemporaryFileUploadHandler,
+)
+from django.db import transaction
+from django.db.models import Q
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from usersmanagement.permissions import get_team_ids
+
+from .models import File
+
+logger = logging.getLogger(__name__)
+
+PDF = 'pdf'
+VIEW_FILE = 'maintenancemanagement.view_file'
+VIEW_TASK = 'maintenancemanagement.view_task'
+VIEW_EQUIPMENT = 'maintenancemanagement.view_equipment'
+RANGE_REGEX = re.compile(r'^bytes=(\d*)-(\d*)$')
+# A PDF header may be preceded by other bytes, within its first 1024 bytes.
+SNIFF_SIZE = 1024
+MAGIC_NUMBERS = [
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'\xff\xd8\xff', 'jpeg'),
+    (b'GIF87a', 'gif'),
+    (b'GIF89a', 'gif'),
+    (b'II*\x00', 'tiff'),
+    (b'MM\x00*', 'tiff'),
+]
+# The sizes of the known BMP info headers, following the 14 bytes file one.
+BMP_INFO_HEADER_SIZES = {12, 40, 52, 56, 64, 108, 124}
+CONTENT_TYPES = {
+    'png': 'image/png',
+    'jpeg': 'image/jpeg',
+    'gif': 'image/gif',
+    'bmp': 'image/bmp',
+    'tiff': 'image/tiff',
+    'webp': 'image/webp',
+    PDF: 'application/pdf',
+}
+
+
+def sniff_file_type(file):
+    """Return the type of the file from its first bytes, None if unknown.
+
+    The position of the file is kept, only SNIFF_SIZE bytes are read. As
+    the two bytes of the BMP magic number start many texts, a BMP file must
+    also give its own size and the size of a known info header.
+    """
+    position = file.tell()
+    size = file.seek(0, os.SEEK_END)
+    file.seek(0)
+    header = file.read(SNIFF_SIZE)
+    file.seek(position)
+    for magic_number, file_type in MAGIC_NUMBERS:
+        if header.startswith(magic_number):
+            return file_type
+    if header[:2] == b'BM' and len(header) >= 18:
+        if (
+            int.from_bytes(header[2:6], 'little') == size
+            and int.from_bytes(header[14:18], 'little') in BMP_INFO_HEADER_SIZES
+        ):
+            return 'bmp'
+    if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+        return 'webp'
+    if b'%PDF-' in header:
+        return PDF
+    return None
+
+
+def check_pdf(file):
+    """Raise an exception if the PDF file can't be read.
+
+    The pages tree is read from the cross-reference table, the content of
+    the pages is not loaded.
+    """
+    reader = PdfFileReader(file, strict=False)
+    if reader.getNumPages() < 1:
+        raise ValueError("The PDF file has no page.")
+
+
+def validate_files():
+    """Check the PDF files not checked yet, they are marked as valid or not.
+
+    The thumbnails of a valid file are made first, so that its thumbnail
+    URLs are only given if it has a preview.
+    """
+    # The thumbnails module imports this one.
+    from .thumbnails import make_thumbnails
+
+    for file in File.objects.filter(is_valid=None):
+        try:
+            with file.file.open('rb') as content:
+                check_pdf(content)
+        except Exception as e:
+            logger.warning("The file {} is not a valid PDF : {}".format(file.file.name, e))
+            file.is_valid = False
+        else:
+            make_thumbnails(file)
+            file.is_valid = True
+        File.objects.filter(pk=file.pk).update(is_valid=file.is_valid)
+
+
+class DigestUploadMixin:
+    """Hash the content of an uploaded file while it is received.
+
+    The digest is given to the uploaded file as its digest attribute.
+    """
+
+    def new_file(self, *args, **kwargs):
+        """Start the digest of a new file."""
+        # The handler keeping the file stops the next ones in new_file.
+        self.sha256 = hashlib.sha256()
+        super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        """Hash the chunk if this handler keeps the file."""
+        if getattr(self, 'activated', True):
+            self.sha256.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        """Give its digest to the uploaded file."""
+        file = super().file_complete(file_size)
+        if file is not None:
+            file.digest = self.sha256.hexdigest()
+        return file
+
+
+class DigestMemoryFileUploadHandler(DigestUploadMixin, MemoryFileUploadHandler):
+    """Keep a small uploaded file in memory, with its digest."""
+
+
+class DigestTemporaryFileUploadHandler(DigestUploadMixin, TemporaryFileUploadHandler):
+    """Write a large uploaded file to a temporary file, with its digest."""
+
+
+def compute_digest(file):
+    """Return the SHA-256 digest of a Django file, read by chunks."""
+    digest = hashlib.sha256()
+    for chunk in file.chunks(settings.FILES_CHUNK_SIZE):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def get_digest(file):
+    """Return the digest of the content of the file.
+
+    It is computed the first time, then kept in the file row.
+    """
+    if file.digest is None:
+        with file.file.open('rb') as content:
+            file.digest = compute_digest(content)
+        File.objects.filter(pk=file.pk).update(digest=file.digest)
+    return file.digest
+
+
+def create_file(uploaded_file, **fields):
+    """Create a file, sharing the content of a file of the same digest.
+
+    The rows of the content are locked until the new one is saved, so that
+    the content is not deleted meanwhile.
+    """
+    digest = getattr(uploaded_file, 'digest', None) or compute_digest(uploaded_file)
+    with transaction.atomic():
+        shared = File.objects.select_for_update().filter(digest=digest).order_by('pk').first()
+        if shared is not None and default_storage.exists(shared.file.name):
+            fields.update(
+                is_valid=shared.is_valid,
+                thumbnails_digest=shared.thumbnails_digest,
+                has_thumbnails=shared.has_thumbnails,
+            )
+            return File.objects.create(file=shared.file.name, digest=digest, **fields)
+        return File.objects.create(file=uploaded_file, digest=digest, **fields)
+
+
+def delete_file(file):
+    """Delete the file, and its content and thumbnails if it was the last one.
+
+    The rows sharing the content are locked, so that a new file doesn't
+    share it while it is deleted.
+    """
+    name, pk = file.file.name, file.pk
+    with transaction.atomic():
+        sharing = list(File.objects.select_for_update().filter(file=name).values_list('pk', flat=True))
+        file.delete()
+    if sharing == [pk]:
+        _delete_content(name, file.digest)
+
+
+def dedupe_files(dry_run=False):
+    """Share a single copy of the content of the files stored several times.
+
+    The files without a digest are hashed first, their digest being saved
+    unless it is a dry run. The copy of the first file of a digest is kept
+    where it is, the files of the other copies are moved to it and these
+    copies are deleted. Return the number of files hashed, of copies
+    deleted and of bytes freed.
+    """
+    metrics = {'hashed': 0, 'deleted': 0, 'freed': 0}
+    digests = {}
+    for file in File.objects.filter(digest=None).iterator():
+        try:
+            if dry_run:
+                with file.file.open('rb') as content:
+                    digests[file.pk] = compute_digest(content)
+            else:
+                digests[file.pk] = get_digest(file)
+        except OSError as e:
+            logger.warning("The file {} could not be hashed : {}".format(file.file.name, e))
+        else:
+            metrics['hashed'] += 1
+    copies = {}
+    for pk, name, digest in File.objects.order_by('pk').values_list('pk', 'file', 'digest').iterator():
+        digest = digest or digests.get(pk)
+        if digest is not None:
+            copies.setdefault(digest, {})[name] = None
+    for names in copies.values():
+        if len(names) < 2:
+            continue
+        names = [name for name in names if default_storage.exists(name)]
+        for name in names[1:]:
+            metrics['deleted'] += 1
+            metrics['freed'] += default_storage.size(name)
+            if not dry_run:
+                File.objects.filter(file=name).update(file=names[0])
+                default_storage.delete(name)
+    return metrics
+
+
+def _delete_content(name, digest):
+    default_storage.delete(name)
+    if digest is not None and not File.objects.filter(digest=digest).exists():
+        directory = default_storage.path(
+            '{}/{}/{}'.format(settings.FILES_THUMBNAILS_DIRECTORY, digest[:2], digest)
+        )
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def can_download(user, file):
+    """Return whether the user may download the file, with one query at most.
+
+    The users who can view the files get them all, the others get the files
+    of the equipments or tasks they can view and of the tasks of their
+    teams.
+    """
+    if user.has_perm(VIEW_FILE):
+        return True
+    conditions = Q(task__teams__in=get_team_ids(user))
+    if user.has_perm(VIEW_TASK):
+        conditions |= Q(task__isnull=False)
+    if user.has_perm(VIEW_EQUIPMENT):
+        conditions |= Q(equipment__isnull=False)
+    return File.objects.filter(conditions, pk=file.pk).exists()
+
+
+def download_response(request, file):
+    """Send the file, or the part of it asked with a Range header."""
+    with file.file.open('rb') as content:
+        file_type = sniff_file_type(content)
+    name = file.file.name
+    content_type = CONTENT_TYPES.get(file_type) or mimetypes.guess_type(name)[0] or 'application/octet-stream'
+    return send_media_file(request, name, content_type)
+
+
+def send_media_file(request, name, content_type):
+    """Send the media file of the given name, or the part of it asked.
+
+    With FILES_SENDFILE_HEADER, the file is sent by the front proxy, which
+    handles the ranges itself. Otherwise it is streamed by chunks of
+    FILES_CHUNK_SIZE bytes, a single range being supported.
+    """
+    path = default_storage.path(name)
+    if settings.FILES_SENDFILE_HEADER == 'X-Accel-Redirect':
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = settings.FILES_ACCEL_REDIRECT_LOCATION + quote(name)
+    elif settings.FILES_SENDFILE_HEADER == 'X-Sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = path
+    else:
+        size = os.path.getsize(path)
+        try:
+            byte_range = parse_range(request.META.get('HTTP_RANGE'), size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = 'bytes */{}'.format(size)
+            return response
+        if byte_range is None:
+            response = FileResponse(open(path, 'rb'), content_type=content_type)
+        else:
+            start, end = byte_range
+            response = StreamingHttpResponse(
+                _read_range(path, start, end - start + 1), status=206, content_type=content_type
+            )
+            response['Content-Length'] = end - start + 1
+            response['Content-Range'] = 'bytes {}-{}/{}'.format(start, end, size)
+        response['Accept-Ranges'] = 'bytes'
+    response['Content-Disposition'] = 'inline; ' + _filename_expression(os.path.basename(name))
+    return response
+
+
+def parse_range(header, size):
+    """Return the first and last bytes of the range asked, both included.
+
+    Return None to send the whole file, when no single range is asked, and
+    raise a ValueError if the range is out of the file.
+    """
+    match = RANGE_REGEX.match(header or '')
+    if match is None or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        if last and int(last) < start:
+            return None
+    else:
+        # A suffix range asks for the last bytes of the file.
+        start, end = max(size - int(last), 0), size - 1
+    if start >= size or end < start:
+        raise ValueError("The range is out of the file.")
+    return start, end
+
+
+def _read_range(path, start, length):
+    with open(path, 'rb') as content:
+        content.seek(start)
+        while length > 0:
+            chunk = content.read(min(settings.FILES_CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def _filename_expression(filename):
+    try:
+        filename.encode('ascii')
+        return 'filename="{}"'.format(filename.replace('\\', '\\\\').replace('"', r'\"'))
+    except UnicodeEncodeError:
+        return "filename*=utf-8''{}".format(quote(filename))
+
+
+def start():
+    """Set up the job checking the uploaded PDF files."""
+    try:
+        scheduler = BackgroundScheduler()
+        scheduler.add_job(validate_files, 'interval', seconds=settings.FILES_VALIDATION_INTERVAL)
+        scheduler.start()
+    except Exception as e:
+        logger.critical("The files scheduler did not start. {e}".format(e=e))
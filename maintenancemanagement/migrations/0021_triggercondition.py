@@ -0,0 +1,25 @@
+# Generated by Django 3.1.1 on 2026-10-18 18:16
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('maintenancemanagement', '0020_auto_20241102_1124'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TriggerCondition',
+            fields=[
+                ('field_object', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trigger_condition', serialize=False, to='maintenancemanagement.fieldobject')),
+                ('threshold', models.FloatField(blank=True, null=True)),
+                ('recurrence', models.DurationField(blank=True, null=True)),
+                ('delay', models.DurationField()),
+                ('next_trigger', models.FloatField(blank=True, null=True)),
+                ('source', models.ForeignKey(blank=True, help_text='The field whose value is compared to the threshold', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='dependent_trigger_condition_set', related_query_name='dependent_trigger_condition', to='maintenancemanagement.fieldobject', verbose_name='Watched field')),
+            ],
+        ),
+    ]
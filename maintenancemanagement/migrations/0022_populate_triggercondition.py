@@ -0,0 +1,71 @@
+# Generated by Django 3.1.1 on 2026-10-18 18:20
+
+import re
+from datetime import timedelta
+
+from django.db import migrations
+
+BATCH_SIZE = 1000
+TIME_REGEX = re.compile(r'((?P<days>\d+?)d ?)?((?P<hours>\d+?)h ?)?((?P<minutes>\d+?)m ?)?')
+
+
+# The parsers are copied from utils.methods as they were when this migration
+# was written, so that it doesn't change with them.
+def parse_time(time_str):
+    """Convert a str into datetime.timedelta, raise a ValueError if invalid."""
+    parts = {name: int(value) for name, value in TIME_REGEX.match(time_str).groupdict().items() if value}
+    if not parts:
+        raise ValueError("The time {!r} is not valid.".format(time_str))
+    return timedelta(**parts)
+
+
+def parse_trigger_condition(field_name, value):
+    """Convert the value of a trigger condition into its typed parameters.
+
+    Raise ValueError or IndexError if the value is not well formed.
+    """
+    splited = value.split('|')
+    params = {'threshold': None, 'recurrence': None, 'source_id': None, 'next_trigger': None}
+    if field_name == 'Recurrence':
+        if splited[0] != 'None':
+            params['recurrence'] = parse_time(splited[0])
+        params['delay'] = parse_time(splited[1])
+        return params
+    if splited[0] != 'None':
+        params['threshold'] = float(splited[0].replace(" ", ""))
+    params['source_id'] = int(splited[1])
+    params['delay'] = parse_time(splited[2])
+    if field_name == 'Frequency':
+        params['next_trigger'] = float(splited[3])
+    return params
+
+
+def populate_trigger_conditions(apps, schema_editor):
+    """Store the parameters of the trigger conditions in TriggerCondition."""
+    FieldObject = apps.get_model('maintenancemanagement', 'FieldObject')
+    TriggerCondition = apps.get_model('maintenancemanagement', 'TriggerCondition')
+    conditions = FieldObject.objects.filter(field__field_group__name='Trigger Conditions').select_related('field')
+    trigger_conditions = []
+    for condition in conditions.iterator():
+        try:
+            params = parse_trigger_condition(condition.field.name, condition.value or '')
+        except (ValueError, IndexError):
+            continue
+        trigger_conditions.append(TriggerCondition(field_object_id=condition.id, **params))
+    source_ids = {condition.source_id for condition in trigger_conditions if condition.source_id}
+    existing_source_ids = set(FieldObject.objects.filter(id__in=source_ids).values_list('id', flat=True))
+    for condition in trigger_conditions:
+        if condition.source_id not in existing_source_ids:
+            condition.source_id = None
+    TriggerCondition.objects.bulk_create(trigger_conditions, batch_size=BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('maintenancemanagement', '0021_triggercondition'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_trigger_conditions, migrations.RunPython.noop),
+    ]
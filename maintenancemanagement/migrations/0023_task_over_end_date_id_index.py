@@ -0,0 +1,17 @@
+# Generated by Django 3.1.1 on 2026-10-18 18:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('maintenancemanagement', '0022_populate_triggercondition'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['over', 'end_date', 'id'], name='maintenance_over_5c4c59_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.1.1 on 2026-10-18 19:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('maintenancemanagement', '0023_task_over_end_date_id_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='file',
+            name='is_valid',
+            field=models.BooleanField(default=True, null=True),
+        ),
+    ]
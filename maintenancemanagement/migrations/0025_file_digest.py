@@ -0,0 +1,23 @@
+# Generated by Django 3.1.1 on 2026-10-18 19:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('maintenancemanagement', '0024_file_is_valid'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='file',
+            name='digest',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='file',
+            name='thumbnails_digest',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+    ]
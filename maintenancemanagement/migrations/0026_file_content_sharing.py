@@ -0,0 +1,24 @@
+# Generated by Django 3.1.1 on 2026-10-18 20:05
+
+from django.db import migrations, models
+import maintenancemanagement.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('maintenancemanagement', '0025_file_digest'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='file',
+            name='digest',
+            field=models.CharField(blank=True, db_index=True, max_length=64, null=True),
+        ),
+        migrations.AlterField(
+            model_name='file',
+            name='file',
+            field=models.FileField(max_length=255, upload_to=maintenancemanagement.models.file_path),
+        ),
+    ]
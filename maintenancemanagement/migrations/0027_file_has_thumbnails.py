@@ -0,0 +1,25 @@
+# Generated by Django 3.1.1 on 2026-10-18 21:10
+
+from django.db import migrations, models
+
+
+def forget_thumbnails(apps, schema_editor):
+    """Make the thumbnails again, to know which files have a preview."""
+    File = apps.get_model('maintenancemanagement', 'File')
+    File.objects.update(thumbnails_digest=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('maintenancemanagement', '0026_file_content_sharing'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='file',
+            name='has_thumbnails',
+            field=models.BooleanField(null=True),
+        ),
+        migrations.RunPython(forget_thumbnails, migrations.RunPython.noop),
+    ]
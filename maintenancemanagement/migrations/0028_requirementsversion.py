@@ -0,0 +1,29 @@
+# Generated by Django 3.1.1 on 2026-10-18 21:30
+
+import uuid
+
+from django.db import migrations, models
+
+
+def create_version(apps, schema_editor):
+    """Create the version of the requirements, set again by each change."""
+    RequirementsVersion = apps.get_model('maintenancemanagement', 'RequirementsVersion')
+    RequirementsVersion.objects.create(version=uuid.uuid4().hex)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('maintenancemanagement', '0027_file_has_thumbnails'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequirementsVersion',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.CharField(max_length=32)),
+            ],
+        ),
+        migrations.RunPython(create_version, migrations.RunPython.noop),
+    ]
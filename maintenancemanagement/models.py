@@ -1,9 +1,17 @@
 """This file define all models concerning the maintenance management."""
 
+import logging
+
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from django.db import models
 from usersmanagement.models import Team, UserProfile
+from utils.methods import ParseTimeException, parse_trigger_condition
+
+logger = logging.getLogger(__name__)
+
+TRIGGER_CONDITIONS = 'Trigger Conditions'
+
 
 class Line(models.Model):
     """Define a production line."""
@@ -15,11 +23,30 @@ class Line(models.Model):
     def __repr__(self):
         return f"<Line: id={self.id}, name='{self.name}'>"
 
+
+def file_path(instance, filename):
+    """Give the name of a new file content, in the directory of its digest."""
+    if instance.digest is None:
+        return filename
+    return 'files/{}/{}/{}'.format(instance.digest[:2], instance.digest, filename)
+
+
 class File(models.Model):
-    """Define a file."""
+    """Define a file.
 
-    file = models.FileField(blank=False, null=False)
+    The files of the same content share it, it is deleted with the last one.
+    """
+
+    file = models.FileField(blank=False, null=False, max_length=255, upload_to=file_path)
     is_manual = models.BooleanField(default=True)
+    # None until the content of a PDF file is checked in the background.
+    is_valid = models.BooleanField(default=True, null=True)
+    # SHA-256 of the content, None until it is computed.
+    digest = models.CharField(max_length=64, null=True, blank=True, db_index=True)
+    # Digest of the content the thumbnails were made from.
+    thumbnails_digest = models.CharField(max_length=64, null=True, blank=True)
+    # Whether the content has a preview, None until its thumbnails are made.
+    has_thumbnails = models.BooleanField(null=True)
 
     def __str__(self):
         """Define string representation of a file."""
@@ -76,6 +103,10 @@ class FieldObject(models.Model):
 
     content_type and object_id allow described_object to \
         reference TaskType or EquipmentType
+
+    The TriggerCondition of a trigger condition is only refreshed by save.
+    The value of a trigger condition updated with update() or bulk_update()
+    must be followed by refresh_trigger_condition().
     """
 
     content_type = models.ForeignKey(ContentType, on_delete=models.SET_NULL, null=True)
@@ -111,6 +142,23 @@ description={description}>".format(
             id=self.id, field=self.field, field_value=self.field_value, value=self.value, description=self.description
         )
 
+    def save(self, *args, **kwargs):
+        """Save the field object and its trigger condition parameters."""
+        super().save(*args, **kwargs)
+        if isinstance(self.value, str) and '|' in self.value and self.field.field_group \
+                and self.field.field_group.name == TRIGGER_CONDITIONS:
+            self.refresh_trigger_condition()
+
+    def refresh_trigger_condition(self):
+        """Store the parameters of the value of this trigger condition."""
+        try:
+            params = parse_trigger_condition(self.field.name, self.value)
+        except (ParseTimeException, ValueError, IndexError):
+            TriggerCondition.objects.filter(field_object=self).delete()
+            logger.warning("The trigger condition {} is not well formed".format(repr(self)))
+            return
+        TriggerCondition.objects.update_or_create(field_object=self, defaults=params)
+
 
 class EquipmentType(models.Model):
     """Define an equipment type."""
@@ -230,6 +278,11 @@ class Task(models.Model):
     is_triggered = models.BooleanField(default=True, null=True)
     over = models.BooleanField(default=False, null=True)
 
+    class Meta:
+        """Add metadata on the class."""
+
+        indexes = [models.Index(fields=['over', 'end_date', 'id'])]
+
     def __str__(self):
         """Define string representation of a task."""
         return self.name
@@ -250,4 +303,66 @@ over={over}>".format(
             files=self.files,
             triggered=self.is_triggered,
             over=self.over
-        )
\ No newline at end of file
+        )
+
+
+class TriggerCondition(models.Model):
+    """
+    Define the parameters of a trigger condition.
+
+    A trigger condition is a FieldObject of the 'Trigger Conditions' field
+    group describing a task. Its parameters are kept in its value as
+    'threshold|field_object_id|delay|next_trigger' and are stored here in
+    real columns when it is saved, so that they can be queried and evaluated
+    without parsing. They are not refreshed by an update() of its value.
+    """
+
+    field_object = models.OneToOneField(
+        FieldObject, on_delete=models.CASCADE, related_name="trigger_condition", primary_key=True
+    )
+    # Correspond à la fréquence pour Frequency
+    threshold = models.FloatField(null=True, blank=True)
+    recurrence = models.DurationField(null=True, blank=True)
+    source = models.ForeignKey(
+        FieldObject,
+        verbose_name="Watched field",
+        help_text="The field whose value is compared to the threshold",
+        on_delete=models.SET_NULL,
+        related_name="dependent_trigger_condition_set",
+        related_query_name="dependent_trigger_condition",
+        db_index=True,
+        null=True,
+        blank=True
+    )
+    delay = models.DurationField()
+    next_trigger = models.FloatField(null=True, blank=True)
+
+    def __str__(self):
+        """Define string representation of a trigger condition."""
+        return str(self.field_object)
+
+    def __repr__(self):
+        """Define formal representation of a trigger condition."""
+        return "<TriggerCondition: field_object={field_object}, threshold={threshold}, recurrence={recurrence}, \
+source={source}, delay={delay}, next_trigger={next_trigger}>".format(
+            field_object=self.field_object_id,
+            threshold=self.threshold,
+            recurrence=self.recurrence,
+            source=self.source_id,
+            delay=self.delay,
+            next_trigger=self.next_trigger
+        )
+
+
+class RequirementsVersion(models.Model):
+    """Define the version of the task and equipment requirements.
+
+    A new version is set with each change of the objects they are built
+    from, in its transaction, so that every process sees it.
+    """
+
+    version = models.CharField(max_length=32)
+
+    def __repr__(self):
+        """Define the representation of the version of the requirements."""
+        return "<RequirementsVersion: version={}>".format(self.version)
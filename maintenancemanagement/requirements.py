@@ -0,0 +1,126 @@
+"""This file caches the requirement documents sent to fill in the forms.
+
+The task and equipment requirements are built from the task templates and
+the equipment types with their fields, which change rarely but are asked
+each time a form is opened. They are kept in the cache with an ETag, under
+the version of the requirements kept in the database. A change of one of
+the objects they are built from sets a new version in its transaction, so
+that every process builds them again once it is committed.
+"""
+
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from usersmanagement.models import Team, UserProfile
+
+from .models import (
+    Equipment,
+    EquipmentType,
+    Field,
+    FieldGroup,
+    FieldObject,
+    FieldValue,
+    File,
+    RequirementsVersion,
+    Task,
+)
+from .serializers import (
+    EquipmentRequirementsSerializer,
+    TaskTemplateRequirementsSerializer,
+)
+
+TASK_REQUIREMENTS = 'requirements:task'
+EQUIPMENT_REQUIREMENTS = 'requirements:equipment'
+DOCUMENT_KEY = '{name}:{version}'
+
+
+def build_task_requirements():
+    """Return the trigger conditions, end conditions and task templates."""
+    return TaskTemplateRequirementsSerializer(1).data
+
+
+def build_equipment_requirements():
+    """Return the equipment types with their fields and their values."""
+    return EquipmentRequirementsSerializer(EquipmentType.objects.all(), many=True).data
+
+
+BUILDERS = {
+    TASK_REQUIREMENTS: build_task_requirements,
+    EQUIPMENT_REQUIREMENTS: build_equipment_requirements,
+}
+
+
+def get_requirements(name):
+    """Return the requirement document and its ETag, building it if needed.
+
+    The version is read before the objects, so that a document is never
+    kept under a version newer than the state it was built from.
+    """
+    version = RequirementsVersion.objects.order_by('pk').values_list('version', flat=True).first()
+    key = DOCUMENT_KEY.format(name=name, version=version)
+    document = cache.get(key)
+    if document is None:
+        data = BUILDERS[name]()
+        etag = quote_etag(hashlib.sha1(JSONRenderer().render(data)).hexdigest())
+        document = {'data': data, 'etag': etag}
+        cache.set(key, document, settings.REQUIREMENTS_CACHE_TIMEOUT)
+    return document
+
+
+def requirements_response(request, name):
+    """Send the requirement document, or HTTP 304 if the client has it."""
+    document = get_requirements(name)
+    if document['etag'] in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': document['etag']})
+    return Response(document['data'], headers={'ETag': document['etag']})
+
+
+def invalidate_requirements():
+    """Set a new version of the requirements, in the current transaction.
+
+    A version is never set again, even if its transaction is rolled back,
+    so the documents built from a rolled back state are never read.
+    """
+    version = uuid.uuid4().hex
+    if not RequirementsVersion.objects.update(version=version):
+        RequirementsVersion.objects.create(version=version)
+
+
+def _on_change(sender, instance, **kwargs):
+    invalidate_requirements()
+
+
+def _on_task_change(sender, instance, **kwargs):
+    if instance.is_template:
+        invalidate_requirements()
+
+
+def _on_field_object_change(sender, instance, **kwargs):
+    if instance.content_type_id == ContentType.objects.get_for_model(Task).id \
+            and Task.objects.filter(pk=instance.object_id, is_template=True).exists():
+        invalidate_requirements()
+
+
+def connect_signals():
+    """Invalidate the requirement documents when their objects change."""
+    for model in (Field, FieldValue, FieldGroup, EquipmentType, Equipment, File, Team):
+        post_save.connect(_on_change, sender=model, dispatch_uid=f'requirements_{model.__name__}_save')
+        post_delete.connect(_on_change, sender=model, dispatch_uid=f'requirements_{model.__name__}_delete')
+    for receiver, model in ((_on_task_change, Task), (_on_field_object_change, FieldObject)):
+        post_save.connect(receiver, sender=model, dispatch_uid=f'requirements_{model.__name__}_save')
+        post_delete.connect(receiver, sender=model, dispatch_uid=f'requirements_{model.__name__}_delete')
+    for through in (
+        Task.teams.through, Task.files.through, Equipment.files.through, EquipmentType.fields_groups.through,
+        UserProfile.groups.through
+    ):
+        m2m_changed.connect(_on_change, sender=through, dispatch_uid=f'requirements_{through.__name__}')
+    # The users are saved at each login, only their removal matters.
+    post_delete.connect(_on_change, sender=UserProfile, dispatch_uid='requirements_UserProfile_delete')
@@ -1,15 +1,17 @@
 """Serializers enable the link between front-end and back-end."""
 
-import imghdr
-
-from PyPDF4.pdf import PdfFileReader
+import logging
 
+from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import Q
+from django.urls import reverse
 from rest_framework import serializers
 from usersmanagement.serializers import TeamSerializer, UserProfileSerializer
 from utils.methods import ParseTimeException, parse_time
 
+from .files import PDF, create_file, sniff_file_type
 from .models import (
     Equipment,
     EquipmentType,
@@ -21,9 +23,65 @@ from .models import (
     Task,
 )
 
+logger = logging.getLogger(__name__)
+
 TRIGGER_CONDITIONS = 'Trigger Conditions'
 END_CONDITIONS = 'End Conditions'
 
+
+def prefetch_field_objects(instances):
+    """Load the field objects describing the given instances in one query.
+
+    The field objects of each instance are stored in its
+    `prefetched_field_objects` attribute, along with their field, field
+    value and trigger condition. The serializers use them instead of
+    querying the field objects of each instance.
+    """
+    described_objects = {}
+    ids_by_content_type = {}
+    for instance in instances:
+        if instance is None:
+            continue
+        instance.prefetched_field_objects = []
+        content_type_object = ContentType.objects.get_for_model(instance)
+        described_objects[(content_type_object.id, instance.id)] = instance
+        ids_by_content_type.setdefault(content_type_object.id, []).append(instance.id)
+    if not described_objects:
+        return
+    condition = Q(pk__in=[])
+    for content_type_id, ids in ids_by_content_type.items():
+        condition |= Q(content_type_id=content_type_id, object_id__in=ids)
+    field_objects = FieldObject.objects.filter(condition).select_related(
+        'field__field_group',
+        'field_value',
+        'trigger_condition__source__field',
+        'trigger_condition__source__field_value',
+    ).order_by('id')
+    for field_object in field_objects:
+        key = (field_object.content_type_id, field_object.object_id)
+        described_objects[key].prefetched_field_objects.append(field_object)
+
+
+def get_field_objects(instance, field_group_name=None):
+    """Return the field objects of the instance, of a field group if given."""
+    if not hasattr(instance, 'prefetched_field_objects'):
+        prefetch_field_objects([instance])
+    return [
+        field_object for field_object in instance.prefetched_field_objects if field_group_name is None or
+        (field_object.field.field_group is not None and field_object.field.field_group.name == field_group_name)
+    ]
+
+
+class FieldObjectsListSerializer(serializers.ListSerializer):
+    """List serializer loading the field objects of all the items at once."""
+
+    def to_representation(self, data):
+        """Load the field objects of the items, then serialize them."""
+        items = list(data.all() if hasattr(data, 'all') else data)
+        prefetch_field_objects(items)
+        return super().to_representation(items)
+
+
 #############################################################################
 ############################## BASE SERIALIZER ##############################
 #############################################################################
@@ -44,22 +102,45 @@ class TaskSerializer(serializers.ModelSerializer):
 class FileSerializer(serializers.ModelSerializer):
     """Basic file serializer."""
 
+    thumbnails = serializers.SerializerMethodField()
+
     class Meta:
         """This class contains the serializer metadata."""
 
         model = File
-        fields = ['id', 'file', 'is_manual']
+        fields = ['id', 'file', 'is_manual', 'is_valid', 'thumbnails']
+        read_only_fields = ['is_valid']
 
     def validate_file(self, file):
-        """Check that the file sent is an image or if it is a pdf."""
-        if not imghdr.what(file):
-            try:
-                from io import BytesIO
-                PdfFileReader(BytesIO(file.read()))
-            except Exception:
-                raise serializers.ValidationError('File should be an image or a pdf.')
+        """Check that the file sent is an image or a pdf from its header."""
+        if sniff_file_type(file) is None:
+            raise serializers.ValidationError('File should be an image or a pdf.')
         return file
 
+    def get_thumbnails(self, obj):
+        """Give the thumbnail URLs of a valid file with a preview, by size.
+
+        The URLs of an image are given before its thumbnails are made, the
+        ones of a PDF file are known when it is marked as valid.
+        """
+        if obj.is_valid is not True or obj.has_thumbnails is False:
+            return {}
+        request = self.context.get('request')
+        thumbnails = {}
+        for size in settings.FILES_THUMBNAIL_SIZES:
+            url = reverse('file-thumbnail', kwargs={'pk': obj.pk, 'size': size})
+            thumbnails[str(size)] = request.build_absolute_uri(url) if request is not None else url
+        return thumbnails
+
+    def create(self, validated_data):
+        """Create the file, a pdf being checked later by the scheduler.
+
+        The content is shared with the files of the same digest.
+        """
+        if sniff_file_type(validated_data['file']) == PDF:
+            validated_data['is_valid'] = None
+        return create_file(validated_data.pop('file'), **validated_data)
+
 
 class EquipmentSerializer(serializers.ModelSerializer):
     """Basic equipment serializer."""
@@ -319,7 +400,12 @@ class FieldObjectForTaskDetailsSerializer(serializers.ModelSerializer):
 
 
 class TriggerConditionForTaskDetailsSerializer(serializers.ModelSerializer):
-    """Field object details serializer for task."""
+    """Field object details serializer for task.
+
+    The value and the delay are sent as they were entered. The watched field
+    object is the source of the trigger condition loaded with the field
+    object, None if it was deleted or the condition could not be read.
+    """
 
     field_name = serializers.CharField(source='field.name')
     value = serializers.SerializerMethodField()
@@ -347,10 +433,12 @@ class TriggerConditionForTaskDetailsSerializer(serializers.ModelSerializer):
         """Give the field object of the trigger condition."""
         if obj.field.name == "Recurrence":
             return None
-        else:
-            field_object_id = int(obj.value.split('|')[1])
-            field_object = FieldObject.objects.get(id=field_object_id)
-            return FieldObjectForTaskDetailsSerializer(field_object).data
+        if not hasattr(obj, 'trigger_condition'):
+            logger.error("The trigger condition {id} could not be read : {value}".format(id=obj.id, value=obj.value))
+            return None
+        if obj.trigger_condition.source is None:
+            return None
+        return FieldObjectForTaskDetailsSerializer(obj.trigger_condition.source).data
 
 
 class TriggerConditionsValidationSerializer(serializers.ModelSerializer):
@@ -483,13 +571,12 @@ class EquipmentListingSerializer(serializers.ModelSerializer):
 
         model = Equipment
         fields = ['id', 'name', 'equipment_type', 'files', 'field']
+        list_serializer_class = FieldObjectsListSerializer
 
     def get_field(self, obj):
         """Get the explicit field associated with the \
             Equipement as obj."""
-        content_type_object = ContentType.objects.get_for_model(obj)
-        fields = FieldObject.objects.filter(object_id=obj.id, content_type=content_type_object)
-        return EquipmentFieldSerializer(fields, many=True).data
+        return EquipmentFieldSerializer(get_field_objects(obj), many=True).data
 
 
 class EquipmentDetailsSerializer(serializers.ModelSerializer):
@@ -504,13 +591,12 @@ class EquipmentDetailsSerializer(serializers.ModelSerializer):
 
         model = Equipment
         fields = ['id', 'name', 'equipment_type', 'files', 'field']
+        list_serializer_class = FieldObjectsListSerializer
 
     def get_field(self, obj):
         """Get the explicit field associated with the \
             Equipement as obj."""
-        content_type_object = ContentType.objects.get_for_model(obj)
-        fields = FieldObject.objects.filter(object_id=obj.id, content_type=content_type_object)
-        return EquipmentFieldSerializer(fields, many=True).data
+        return EquipmentFieldSerializer(get_field_objects(obj), many=True).data
 
 
 class EquipmentCreateSerializer(serializers.ModelSerializer):
@@ -662,19 +748,12 @@ class TaskDetailsSerializer(serializers.ModelSerializer):
 
     def get_trigger_conditions(self, obj):
         """Return trigger conditions of the given task."""
-        content_type_object = ContentType.objects.get_for_model(obj)
-        trigger_fields_objects = FieldObject.objects.filter(
-            object_id=obj.id, content_type=content_type_object, field__field_group__name=TRIGGER_CONDITIONS
-        )
+        trigger_fields_objects = get_field_objects(obj, TRIGGER_CONDITIONS)
         return TriggerConditionForTaskDetailsSerializer(trigger_fields_objects, many=True).data
 
     def get_end_conditions(self, obj):
         """Return end conditions of the given task."""
-        content_type_object = ContentType.objects.get_for_model(obj)
-        end_fields_objects = FieldObject.objects.filter(
-            object_id=obj.id, content_type=content_type_object, field__field_group__name=END_CONDITIONS
-        )
-        return FieldObjectForTaskDetailsSerializer(end_fields_objects, many=True).data
+        return FieldObjectForTaskDetailsSerializer(get_field_objects(obj, END_CONDITIONS), many=True).data
 
     def get_duration(self, obj):
         """Return duration of the given task."""
@@ -0,0 +1,225 @@
+"""This file makes the thumbnails of the files attached to the equipments.
+
+The thumbnail of an image is the image reduced, the one of a PDF file is the
+largest image of its first page, which is the scanned page of a scanned
+manual. The thumbnails are kept by digest of the content of their file, so
+they are made once by the scheduler worker, or on their first request, and
+made again only when the content changes.
+"""
+
+import logging
+import os
+import struct
+import tempfile
+from io import BytesIO
+
+from apscheduler.schedulers.background import BackgroundScheduler
+from PIL import Image, ImageOps
+from PyPDF4.pdf import PdfFileReader
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db.models import F
+
+from .files import PDF, get_digest, sniff_file_type
+from .models import File
+
+logger = logging.getLogger(__name__)
+
+# Image modes of the raw pixels of a PDF image, by color space and bits.
+PDF_IMAGE_MODES = {
+    ('/DeviceGray', 1): '1',
+    ('/DeviceGray', 8): 'L',
+    ('/DeviceRGB', 8): 'RGB',
+    ('/DeviceCMYK', 8): 'CMYK',
+}
+# Color spaces of the ICC profiles, by number of components.
+ICC_COLOR_SPACES = {1: '/DeviceGray', 3: '/DeviceRGB', 4: '/DeviceCMYK'}
+
+
+def thumbnail_name(digest, size):
+    """Return the name of a thumbnail in the media storage."""
+    return '{}/{}/{}/{}.png'.format(settings.FILES_THUMBNAILS_DIRECTORY, digest[:2], digest, size)
+
+
+def get_thumbnail(file, size):
+    """Return the name of the thumbnail of the file, None if it has none.
+
+    The thumbnails of the file are made if they were not made for its
+    current content yet. Raise a FileNotFoundError if its content is
+    missing.
+    """
+    digest = get_digest(file)
+    name = thumbnail_name(digest, size)
+    if os.path.exists(default_storage.path(name)):
+        return name
+    if file.thumbnails_digest != digest and make_thumbnails(file):
+        return name
+    return None
+
+
+def make_thumbnails(file):
+    """Make the thumbnails of the file at all sizes, return whether it has any.
+
+    The file is marked as done for its digest even without a preview, so
+    that it is not opened again until its content changes. A file whose
+    content is missing is left to be done again.
+    """
+    if not default_storage.exists(file.file.name):
+        logger.error("The content of the file {} is missing".format(file.file.name))
+        return False
+    digest = get_digest(file)
+    try:
+        image = open_preview(file)
+    except Exception as e:
+        logger.warning("No thumbnail could be made for the file {} : {}".format(file.file.name, e))
+        image = None
+    if image is not None:
+        # Each size is reduced from the previous one, the largest first.
+        for size in sorted(settings.FILES_THUMBNAIL_SIZES, reverse=True):
+            image.thumbnail((size, size))
+            _save_png(image, thumbnail_name(digest, size))
+    file.thumbnails_digest, file.has_thumbnails = digest, image is not None
+    File.objects.filter(pk=file.pk).update(thumbnails_digest=digest, has_thumbnails=file.has_thumbnails)
+    return file.has_thumbnails
+
+
+def make_missing_thumbnails():
+    """Make the thumbnails of the valid files not done for their content.
+
+    A file failing is logged and skipped, the next ones are still done.
+    """
+    for file in File.objects.filter(is_valid=True).exclude(thumbnails_digest=F('digest')):
+        try:
+            make_thumbnails(file)
+        except Exception:
+            logger.exception("The thumbnails of the file {} could not be made".format(file.file.name))
+
+
+def open_preview(file):
+    """Return the image previewing the file, None if it has none."""
+    with file.file.open('rb') as content:
+        file_type = sniff_file_type(content)
+    if file_type is None:
+        return None
+    if file_type == PDF:
+        image = _first_page_image(file.file.path)
+        if image is None:
+            return None
+    else:
+        with Image.open(file.file.path) as original:
+            # A JPEG image is decoded at the smallest scale above the size.
+            largest = max(settings.FILES_THUMBNAIL_SIZES)
+            original.draft('RGB', (largest, largest))
+            image = ImageOps.exif_transpose(original)
+    if image.mode == '1':
+        return image.convert('L')
+    if image.mode not in ('L', 'LA', 'RGB', 'RGBA'):
+        return image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+    return image
+
+
+def _first_page_image(path):
+    with open(path, 'rb') as content:
+        page = PdfFileReader(content, strict=False).getPage(0)
+        resources = page.get('/Resources')
+        xobjects = resources.getObject().get('/XObject') if resources is not None else None
+        if xobjects is None:
+            return None
+        images = [
+            xobject for xobject in (value.getObject() for value in xobjects.getObject().values())
+            if xobject.get('/Subtype') == '/Image'
+        ]
+        if not images:
+            return None
+        image = _decode_image(max(images, key=lambda xobject: xobject['/Width'] * xobject['/Height']))
+        rotation = page.get('/Rotate')
+    if image is not None and rotation:
+        # The page is rotated clockwise, and the image counterclockwise.
+        image = image.rotate(-int(rotation), expand=True)
+    return image
+
+
+def _decode_image(xobject):
+    filters = xobject.get('/Filter', [])
+    if not isinstance(filters, list):
+        filters = [filters]
+    size = (xobject['/Width'], xobject['/Height'])
+    if filters and filters[-1] in ('/DCTDecode', '/JPXDecode'):
+        image = Image.open(BytesIO(xobject.getData()))
+        largest = max(settings.FILES_THUMBNAIL_SIZES)
+        image.draft('RGB', (largest, largest))
+        image.load()
+        return image
+    if filters == ['/CCITTFaxDecode']:
+        # PyPDF4 can't decode a fax image, it is read as a TIFF image.
+        parameters = xobject.get('/DecodeParms', {})
+        if isinstance(parameters, list):
+            parameters = parameters[0]
+        image = Image.open(BytesIO(_ccitt_tiff(xobject._data, size, parameters)))
+        image.load()
+    else:
+        color_space = xobject.get('/ColorSpace')
+        if color_space is not None:
+            color_space = color_space.getObject()
+        if isinstance(color_space, list) and color_space[0] == '/ICCBased':
+            color_space = ICC_COLOR_SPACES.get(color_space[1].getObject().get('/N'))
+        if not isinstance(color_space, str):
+            return None
+        mode = PDF_IMAGE_MODES.get((color_space, xobject.get('/BitsPerComponent')))
+        if mode is None:
+            return None
+        image = Image.frombytes(mode, size, xobject.getData())
+    # A decode array from 1 to 0 inverts the colors of the pixels.
+    if list(xobject.get('/Decode', []))[:2] == [1, 0]:
+        image = image.convert('L') if image.mode == '1' else image
+        image = image.point(lambda value: 255 - value)
+    return image
+
+
+def _ccitt_tiff(data, size, parameters):
+    width, height = size
+    # A negative K is the group 4 encoding, the others the group 3 one.
+    compression = 4 if parameters.get('/K', 0) < 0 else 3
+    # The white pixels are decoded to 0, or to 1 with BlackIs1 as the 1 bits
+    # are then shown as white by the default decode array.
+    black_is_1 = parameters.get('/BlackIs1')
+    photometric = 1 if black_is_1 is not None and black_is_1.value else 0
+    tags = [
+        (256, 4, width),  # ImageWidth
+        (257, 4, height),  # ImageLength
+        (258, 3, 1),  # BitsPerSample
+        (259, 3, compression),  # Compression
+        (262, 3, photometric),  # PhotometricInterpretation
+        (273, 4, 10 + 12 * 8 + 4),  # StripOffsets, after the header
+        (278, 4, height),  # RowsPerStrip
+        (279, 4, len(data)),  # StripByteCounts
+    ]
+    header = struct.pack('<2sHIH', b'II', 42, 8, len(tags))
+    for tag, value_type, value in tags:
+        header += struct.pack('<HHII', tag, value_type, 1, value)
+    return header + struct.pack('<I', 0) + data
+
+
+def _save_png(image, name):
+    path = default_storage.path(name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # The thumbnail is written aside then renamed, never seen half written.
+    descriptor, temporary_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(descriptor, 'wb') as temporary:
+            image.save(temporary, 'PNG', optimize=True)
+        os.replace(temporary_path, path)
+    except BaseException:
+        os.remove(temporary_path)
+        raise
+
+
+def start():
+    """Set up the job making the thumbnails of the new files."""
+    try:
+        scheduler = BackgroundScheduler()
+        scheduler.add_job(make_missing_thumbnails, 'interval', seconds=settings.FILES_THUMBNAILS_INTERVAL)
+        scheduler.start()
+    except Exception as e:
+        logger.critical("The thumbnails scheduler did not start. {e}".format(e=e))
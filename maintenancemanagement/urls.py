@@ -33,7 +33,9 @@ urlpatterns_task = [
 
 urlpatterns_file = [
     path('files/', views_file.FileList.as_view(), name='file-list'),
-    path('files/<int:pk>/', views_file.FileDetail.as_view(), name='file-detail')
+    path('files/<int:pk>/', views_file.FileDetail.as_view(), name='file-detail'),
+    path('files/<int:pk>/download/', views_file.FileDownload.as_view(), name='file-download'),
+    path('files/<int:pk>/thumbnail/<int:size>/', views_file.FileThumbnail.as_view(), name='file-thumbnail'),
 ]
 
 urlpatterns += urlpatterns_equipment
@@ -12,11 +12,14 @@ from maintenancemanagement.models import (
     Field,
     FieldObject,
 )
+from maintenancemanagement.requirements import (
+    EQUIPMENT_REQUIREMENTS,
+    requirements_response,
+)
 from maintenancemanagement.serializers import (
     EquipmentCreateSerializer,
     EquipmentDetailsSerializer,
     EquipmentListingSerializer,
-    EquipmentRequirementsSerializer,
     EquipmentUpdateSerializer,
     FieldObjectCreateSerializer,
     FieldObjectNewFieldValidationSerializer,
@@ -26,6 +29,7 @@ from maintenancemanagement.serializers import (
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from utils.pagination import list_response
 
 logger = logging.getLogger(__name__)
 
@@ -69,7 +73,9 @@ class EquipmentList(APIView):
     """
 
     @swagger_auto_schema(
-        operation_description='Send the list of Equipment in the database.',
+        operation_description='Send the list of Equipment in the database. \
+            It can be filtered with line and equipment_type, paginated with cursor and page_size, \
+            and restricted to some fields with fields.',
         query_serializer=None,
         responses={
             200: EquipmentListingSerializer(many=True),
@@ -79,9 +85,15 @@ class EquipmentList(APIView):
     def get(self, request):
         """Send the list of Equipment in the database."""
         if request.user.has_perm(VIEW_EQUIPMENT):
-            equipments = Equipment.objects.all()
-            serializer = EquipmentListingSerializer(equipments, many=True)
-            return Response(serializer.data)
+            equipments = Equipment.objects.all().prefetch_related('files')
+            return list_response(
+                request,
+                equipments,
+                EquipmentListingSerializer, ['id'], {
+                    'line': 'line',
+                    'equipment_type': 'equipment_type'
+                }
+            )
         return Response(status=status.HTTP_401_UNAUTHORIZED)
 
     @swagger_auto_schema(
@@ -377,9 +389,7 @@ class EquipmentRequirements(APIView):
         """Send the list of equipement types with their fields \
             and the values associated."""
         if request.user.has_perm(ADD_EQUIPMENT):
-            equipment_types = EquipmentType.objects.all()
-            serializer = EquipmentRequirementsSerializer(equipment_types, many=True)
-            return Response(serializer.data)
+            return requirements_response(request, EQUIPMENT_REQUIREMENTS)
         return Response(status=status.HTTP_401_UNAUTHORIZED)
 
 
@@ -5,12 +5,21 @@ import logging
 
 from drf_yasg.utils import swagger_auto_schema
 
+from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
+from maintenancemanagement.files import (
+    can_download,
+    delete_file,
+    download_response,
+    send_media_file,
+)
 from maintenancemanagement.models import File
 from maintenancemanagement.serializers import FileSerializer
+from maintenancemanagement.thumbnails import get_thumbnail
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from utils.pagination import list_response
 
 logger = logging.getLogger(__name__)
 
@@ -19,7 +28,9 @@ class FileList(APIView):
     """List all Files or add one."""
 
     @swagger_auto_schema(
-        operation_description='Send the list of File in the database.',
+        operation_description='Send the list of File in the database. \
+            It can be filtered with is_manual, paginated with cursor and page_size, \
+            and restricted to some fields with fields.',
         query_serializer=None,
         responses={
             200: FileSerializer(many=True),
@@ -30,8 +41,7 @@ class FileList(APIView):
         """Send the list of File in the database."""
         if request.user.is_authenticated :
             files = File.objects.all()
-            serializer = FileSerializer(files, many=True)
-            return Response(serializer.data)
+            return list_response(request, files, FileSerializer, ['id'], {'is_manual': 'is_manual'})
         return Response(status=status.HTTP_401_UNAUTHORIZED)
 
     @swagger_auto_schema(
@@ -93,6 +103,68 @@ class FileDetail(APIView):
         except ObjectDoesNotExist:
             return Response(status=status.HTTP_404_NOT_FOUND)
         if request.user.is_authenticated :
-            file.delete()
+            delete_file(file)
             return Response(status=status.HTTP_204_NO_CONTENT)
         return Response(status=status.HTTP_401_UNAUTHORIZED)
+
+
+class FileDownload(APIView):
+    """Send the content of a File."""
+
+    @swagger_auto_schema(
+        operation_description='Send the content of the File corresponding to the given key. \
+            A single byte range can be asked with the Range header.',
+        query_serializer=None,
+        responses={
+            200: "OK",
+            206: "Partial content",
+            401: "Unhauthorized",
+            404: "Not found",
+            416: "Range not satisfiable",
+        },
+    )
+    def get(self, request, pk):
+        """Send the content of the File corresponding to the given key."""
+        try:
+            file = File.objects.get(pk=pk)
+        except ObjectDoesNotExist:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+        if request.user.is_authenticated and can_download(request.user, file):
+            try:
+                return download_response(request, file)
+            except FileNotFoundError:
+                logger.error("The content {name} of the File {pk} is missing".format(name=file.file.name, pk=pk))
+                return Response(status=status.HTTP_404_NOT_FOUND)
+        return Response(status=status.HTTP_401_UNAUTHORIZED)
+
+
+class FileThumbnail(APIView):
+    """Send a thumbnail of a File."""
+
+    @swagger_auto_schema(
+        operation_description='Send the PNG thumbnail of the given size of the File corresponding to the given key. \
+            It is made on its first request, from the image or the first page of the pdf.',
+        query_serializer=None,
+        responses={
+            200: "OK",
+            401: "Unhauthorized",
+            404: "Not found",
+        },
+    )
+    def get(self, request, pk, size):
+        """Send the thumbnail of the File corresponding to the given key."""
+        try:
+            file = File.objects.get(pk=pk)
+        except ObjectDoesNotExist:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+        if request.user.is_authenticated and can_download(request.user, file):
+            if size not in settings.FILES_THUMBNAIL_SIZES or file.is_valid is not True:
+                return Response(status=status.HTTP_404_NOT_FOUND)
+            try:
+                name = get_thumbnail(file, size)
+                if name is not None:
+                    return send_media_file(request, name, 'image/png')
+            except FileNotFoundError:
+                logger.error("The content {name} of the File {pk} is missing".format(name=file.file.name, pk=pk))
+            return Response(status=status.HTTP_404_NOT_FOUND)
+        return Response(status=status.HTTP_401_UNAUTHORIZED)
@@ -14,6 +14,10 @@ from maintenancemanagement.models import (
     File,
     Task,
 )
+from maintenancemanagement.requirements import (
+    TASK_REQUIREMENTS,
+    requirements_response,
+)
 from maintenancemanagement.serializers import (
     FieldObjectCreateSerializer,
     FieldObjectValidationSerializer,
@@ -21,17 +25,18 @@ from maintenancemanagement.serializers import (
     TaskDetailsSerializer,
     TaskListingSerializer,
     TaskSerializer,
-    TaskTemplateRequirementsSerializer,
     TaskUpdateSerializer,
     TriggerConditionsCreateSerializer,
     TriggerConditionsValidationSerializer,
+    prefetch_field_objects,
 )
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from usersmanagement.models import Team, UserProfile
-from usersmanagement.views.views_team import belongs_to_team
+from usersmanagement.permissions import get_team_ids
 from utils.methods import parse_time
+from utils.pagination import list_response
 
 logger = logging.getLogger(__name__)
 VIEW_TASK = "maintenancemanagement.view_task"
@@ -41,6 +46,17 @@ DELETE_TASK = "maintenancemanagement.delete_task"
 
 UPDATED_LOGGER = "{user} UPDATED {object} with {params}"
 
+# The task list is paginated on an indexed key, see Task.Meta.
+TASK_LIST_ORDERING = ['over', 'end_date', 'id']
+TASK_LIST_FILTERS = {
+    'team': 'teams',
+    'equipment': 'equipment',
+    'line': 'line',
+    'over': 'over',
+    'end_date_after': 'end_date__gte',
+    'end_date_before': 'end_date__lte',
+}
+
 
 class TaskList(APIView):
     r"""
@@ -71,7 +87,9 @@ class TaskList(APIView):
     """
 
     @swagger_auto_schema(
-        operation_description='Send the list of Task in the database.',
+        operation_description='Send the list of Task in the database. \
+            It can be filtered with team, equipment, line, over, end_date_after and end_date_before, \
+            paginated with cursor and page_size, and restricted to some fields with fields.',
         query_serializer=None,
         responses={
             200: TaskListingSerializer(many=True),
@@ -86,8 +104,9 @@ class TaskList(APIView):
                 tasks = Task.objects.filter(is_template=True)
             else:
                 tasks = Task.objects.filter(is_template=False).order_by('over', 'end_date')
-            serializer = TaskListingSerializer(tasks, many=True)
-            return Response(serializer.data)
+            # The teams, their members and the files take three queries in all.
+            tasks = tasks.prefetch_related('teams__user_set', 'files')
+            return list_response(request, tasks, TaskListingSerializer, TASK_LIST_ORDERING, TASK_LIST_FILTERS)
         return Response(status=status.HTTP_401_UNAUTHORIZED)
 
     @swagger_auto_schema(
@@ -212,10 +231,16 @@ class TaskDetail(APIView):
     def get(self, request, pk):
         """Send the Task corresponding to the given key."""
         try:
-            task = Task.objects.get(pk=pk)
+            task = Task.objects.select_related(
+                'equipment__equipment_type', 'equipment_type', 'created_by', 'achieved_by'
+            ).prefetch_related(
+                'teams__user_set', 'files', 'equipment__files', 'equipment__equipment_type__fields_groups',
+                'equipment_type__fields_groups'
+            ).get(pk=pk)
         except ObjectDoesNotExist:
             return Response(status=status.HTTP_404_NOT_FOUND)
         if request.user.has_perm(VIEW_TASK) or participate_to_task(request.user, task):
+            prefetch_field_objects([task, task.equipment])
             serializer = TaskDetailsSerializer(task)
             return Response(serializer.data)
         return Response(status=status.HTTP_401_UNAUTHORIZED)
@@ -305,8 +330,10 @@ class TaskDetail(APIView):
     def _generate_new_task(self, request, task):
         content_type_object = ContentType.objects.get_for_model(task)
         old_trigger_conditions = FieldObject.objects.filter(
-            object_id=task.id, content_type=content_type_object, field__field_group__name='Trigger Conditions'
-        )
+            object_id=task.id,
+            content_type=content_type_object,
+            field__field_group__name='Trigger Conditions'
+        ).select_related('field', 'trigger_condition__source')
         end_fields_objects = FieldObject.objects.filter(
             object_id=task.id, content_type=content_type_object, field__field_group__name='End Conditions'
         )
@@ -323,18 +350,30 @@ class TaskDetail(APIView):
         logger.info("{user} TRIGGER RECURRENT TASK ON {task}".format(user=request.user, task=new_task))
 
     def _create_new_trigger_condition(self, trigger_condition, task):
+        parameters = getattr(trigger_condition, 'trigger_condition', None)
+        if parameters is None:
+            logger.warning(
+                "The trigger condition {condition} could not be read, it is not copied to {task}".format(
+                    condition=trigger_condition.id, task=repr(task)
+                )
+            )
+            return
+        if trigger_condition.field.name != 'Recurrence' and parameters.source is None:
+            logger.warning(
+                "The field object watched by the trigger condition {condition} was deleted, "
+                "it is not copied to {task}".format(condition=trigger_condition.id, task=repr(task))
+            )
+            return
         new_trigger_condition = trigger_condition
         new_trigger_condition.pk = None
         new_trigger_condition.described_object = task
         if trigger_condition.field.name == 'Recurrence':
             new_trigger_condition.save()
-            task.end_date = date.today() + parse_time(trigger_condition.value.split('|')[0])
+            task.end_date = date.today() + parameters.recurrence
             task.save()
         elif trigger_condition.field.name == 'Frequency':
-            splited = trigger_condition.value.split('|')
-            trigger_condition.value = '|'.join(splited[:3])
-            new_frequency = float(FieldObject.objects.get(id=int(splited[1])).value) + float(splited[0])
-            trigger_condition.value += f'|{new_frequency}'
+            new_frequency = float(parameters.source.value) + parameters.threshold
+            trigger_condition.value = trigger_condition.value.rsplit('|', 1)[0] + f'|{new_frequency}'
             trigger_condition.save()
         else:
             trigger_condition.save()
@@ -490,7 +529,7 @@ class UserTaskList(APIView):
 
         if request.user.has_perm(VIEW_TASK) or request.user == user:
             tasks = Task.objects.filter(
-                teams__pk__in=user.groups.all().values_list("id", flat=True).iterator(), is_template=False
+                teams__pk__in=get_team_ids(user), is_template=False
             ).distinct().order_by('over', 'end_date')
             serializer = TaskListingSerializer(tasks, many=True)
             return Response(serializer.data)
@@ -506,11 +545,8 @@ class UserTaskList(APIView):
 )
 def participate_to_task(user, task):
     r"""\n# Check if a user is assigned to the task."""
-    for team in task.teams.values_list("id", flat=True).iterator():
-        belong = belongs_to_team(user, Team.objects.get(id=team))
-        if belong:
-            return True
-    return False
+    team_ids = get_team_ids(user)
+    return any(team.id in team_ids for team in task.teams.all())
 
 
 class TaskRequirements(APIView):
@@ -524,7 +560,6 @@ class TaskRequirements(APIView):
         """Send the End Conditions and Trigger Conditions. \
             If specified, send the task templates as well."""
         if request.user.has_perm(ADD_TASK):
-            serializer = TaskTemplateRequirementsSerializer(1)
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            return requirements_response(request, TASK_REQUIREMENTS)
         else:
             return Response(status=status.HTTP_401_UNAUTHORIZED)
@@ -28,7 +28,7 @@ ALLOWED_HOSTS = ['127.0.0.1','localhost:8000','localhost']
 
 CSRF_TRUSTED_ORIGINS = []
 
-AUTHENTICATION_BACKENDS = ("django.contrib.auth.backends.ModelBackend",)
+AUTHENTICATION_BACKENDS = ("usersmanagement.permissions.CachedModelBackend",)
 
 BASE_URL = 'http://127.0.0.1:8000/'
 
@@ -158,6 +158,13 @@ REST_FRAMEWORK = {
 
 SWAGGER_SETTINGS = {'LOGIN_URL': "/api/admin/login"}
 
+# Number of items of a page of a paginated list, when no page_size is given
+LIST_PAGE_SIZE = 20
+# Maximum number of items of a page of a paginated list
+LIST_MAX_PAGE_SIZE = 200
+# Seconds the task and equipment requirements of a version stay cached.
+REQUIREMENTS_CACHE_TIMEOUT = 300
+
 ################################################################
 ############################ STATIC ############################
 ################################################################
@@ -207,6 +214,33 @@ JWT_AUTH = {
 
 MEDIA_URL = 'media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media/')
+# Uploads bigger than this number of bytes are written to a temporary file
+# in chunks instead of being kept in memory
+FILE_UPLOAD_MAX_MEMORY_SIZE = 2621440
+# The uploaded files are hashed while they are received
+FILE_UPLOAD_HANDLERS = [
+    'maintenancemanagement.files.DigestMemoryFileUploadHandler',
+    'maintenancemanagement.files.DigestTemporaryFileUploadHandler',
+]
+# Seconds between two checks of the uploaded PDF files by the scheduler
+FILES_VALIDATION_INTERVAL = 30
+# Header handing the download of a file to the front proxy, 'X-Accel-Redirect'
+# for Nginx or 'X-Sendfile' for Apache, None to stream it from Django
+FILES_SENDFILE_HEADER = None
+# Internal location of the media directory in Nginx, for X-Accel-Redirect
+FILES_ACCEL_REDIRECT_LOCATION = '/protected-media/'
+# Number of bytes read at a time when a part of a file is streamed
+FILES_CHUNK_SIZE = 65536
+# Sizes in pixels of the largest side of the thumbnails of the files
+FILES_THUMBNAIL_SIZES = [128, 512]
+# Directory of the thumbnails in the media directory
+FILES_THUMBNAILS_DIRECTORY = 'thumbnails'
+# Seconds between two runs of the job making the thumbnails of new files
+FILES_THUMBNAILS_INTERVAL = 30
+# Number of rows of a parts import converted and written in a transaction
+PARTS_IMPORT_CHUNK_SIZE = 1000
+# Number of parts of a page of search results
+PARTS_SEARCH_PAGE_SIZE = 50
 
 ################################################################
 ############################# EMAIL ############################
@@ -214,6 +248,64 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media/')
 
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = '/tmp/app-messages'
+# Directory where the notifications are written by a dry run
+NOTIFICATIONS_DRY_RUN_PATH = '/tmp/notifications-dry-run'
+
+################################################################
+########################### SCHEDULER ##########################
+################################################################
+
+# Seconds between two attempts of a waiting scheduler worker to take over
+SCHEDULER_STANDBY_INTERVAL = 10
+# Seconds between two updates of the data provider jobs from the database
+SCHEDULER_RECONCILE_INTERVAL = 10
+
+################################################################
+######################### DATA PROVIDERS #######################
+################################################################
+
+# Maximum number of data providers polled at the same time
+DATA_PROVIDERS_POLLING_CONCURRENCY = 100
+
+# Maximum number of data providers checked at the same time when the scheduler
+# worker starts
+DATA_PROVIDERS_PROBE_CONCURRENCY = 20
+# Number of seconds between two checks of the data provider files for changes
+DATA_PROVIDERS_PLUGINS_CHECK_INTERVAL = 5
+# Number of failed polls in a row after which a data provider is not polled
+DATA_PROVIDERS_FAILURE_THRESHOLD = 3
+# Number of seconds before a data provider which stopped being polled is tried
+# again, doubled at each new failure
+DATA_PROVIDERS_BACKOFF = 30
+# Maximum number of seconds between two tries of a failing data provider
+DATA_PROVIDERS_MAX_BACKOFF = 3600
+# Minimum number of seconds between the polls of a data provider for its
+# job to be kept in the database, the others are kept in memory so that a
+# poll doesn't write its next run time
+DATA_PROVIDERS_STORED_JOBS_MIN_INTERVAL = 3600
+# Number of seconds after which a data provider poll is cancelled
+DATA_PROVIDERS_POLLING_TIMEOUT = 5
+# Number of seconds over which the polls of the different devices are spread
+DATA_PROVIDERS_POLLING_SPREAD = 10
+# Number of seconds during which the reads of a device are coalesced
+DATA_PROVIDERS_COALESCING_WINDOW = 0.1
+# Maximum number of unread addresses between two addresses read together
+DATA_PROVIDERS_COALESCING_MAX_GAP = 10
+# Maximum number of addresses read together (125 registers for modbus)
+DATA_PROVIDERS_COALESCING_MAX_QUANTITY = 125
+# Number of seconds the values got by the data providers are buffered
+DATA_PROVIDERS_WRITE_INTERVAL = 1
+# Number of buffered values from which they are saved without waiting
+DATA_PROVIDERS_WRITE_BATCH_SIZE = 500
+# Number of buffered values from which a flush is logged as a warning, the
+# writes falling behind the polls
+DATA_PROVIDERS_WRITE_WARNING_QUEUE_DEPTH = 2000
+# Number of seconds after the end of a period before it is aggregated
+READINGS_ROLLUP_DELAY = 10
+# Number of days the readings and their rollups are kept, None for ever
+READINGS_RETENTION_DAYS = {'raw': 7, '1m': 30, '1h': 365, '1d': None}
+# Maximum number of points of a readings series without a resolution
+READINGS_MAX_POINTS = 1000
 
 ################################################################
 ############################ LOGGING ###########################
@@ -0,0 +1,11 @@
+import pytest
+
+from django.core.cache import cache
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """
+        Start each test with an empty cache, the rows cached by a previous test being rolled back
+    """
+    cache.clear()
@@ -0,0 +1,22 @@
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+@contextmanager
+def assert_max_queries(test_case, budget):
+    """Fail the test case if the block runs more queries than the budget.
+
+    The failure message lists the queries run, to find the one repeated.
+    """
+    with CaptureQueriesContext(connection) as context:
+        yield context
+    queries = context.captured_queries
+    test_case.assertLessEqual(
+        len(queries), budget, "{count} queries run, {budget} expected at most:\n{queries}".format(
+            count=len(queries),
+            budget=budget,
+            queries='\n'.join('{}. {}'.format(i, query['sql']) for i, query in enumerate(queries, 1))
+        )
+    )
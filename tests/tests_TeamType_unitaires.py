@@ -1,5 +1,7 @@
 from django.contrib.auth.models import Permission
+from django.db import connection
 from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
 from usersmanagement.models import Team, TeamType
 
 
@@ -79,3 +81,25 @@ class TeamTypeTests(TestCase):
         admin_team = Team.objects.get(name="Administrators")
         admin_team.set_team_type(MaintenanceManager_type)
         self.assertEqual(admin_team.permissions.get(id=3), perm_3)
+
+    def test_US1_U3_apply_bulk(self):
+        """
+            Test the update of the permissions of many teams by a team type.
+
+            Inputs:
+                admin_type (TeamType): a team type whose perms are replaced.
+                teams (Team): 20 teams of team type admin_type.
+
+            Expected Output:
+                We expect every team to have exactly the new perms of admin_type.
+                We expect a number of queries which does not depend on the number of teams.
+        """
+        admin_type = TeamType.objects.get(name="Administrators")
+        teams = [Team.objects.create(name=f"Team {i}", team_type=admin_type) for i in range(20)]
+        admin_type._apply_()
+        admin_type.perms.set([Permission.objects.get(id=2), Permission.objects.get(id=3)])
+        with CaptureQueriesContext(connection) as context:
+            admin_type._apply_()
+        self.assertLessEqual(len(context.captured_queries), 8)
+        for team in teams + [Team.objects.get(name="Administrators")]:
+            self.assertEqual(set(team.permissions.values_list('id', flat=True)), {2, 3})
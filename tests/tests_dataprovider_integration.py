@@ -1,4 +1,5 @@
 import os
+from datetime import datetime, timezone
 
 import pytest
 from init_db_tests import init_db
@@ -9,8 +10,14 @@ from maintenancemanagement.models import Equipment, Field
 from openCMMS.settings import BASE_DIR
 from rest_framework.test import APIClient
 from usersmanagement.models import UserProfile
-from utils.data_provider import add_job, scheduler
-from utils.models import DataProvider
+from utils import data_provider
+from utils.data_provider import (
+    Circuit,
+    _save_circuit,
+    add_job,
+    reconcile_jobs,
+)
+from utils.models import DataProvider, ReadingRollup
 from utils.serializers import (
     DataProviderRequirementsSerializer,
     DataProviderSerializer,
@@ -244,6 +251,29 @@ class DataProviderTest(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.data, serializer.data)
 
+    def test_US23_I3_dataproviderdetail_get_with_open_circuit(self):
+        """
+            Test if the details of a data provider show when it will be polled again.
+
+            Inputs:
+                user (UserProfile): a UserProfile with permissions to view data providers.
+                dataprovider (DataProvider): a data provider whose circuit was opened by the scheduler worker.
+
+            Expected Output:
+                We expect to get in the response the state of its circuit, its failures and its next probe.
+        """
+        user = UserProfile.objects.create(username="user", password="p4ssword")
+        self.add_view_perm(user)
+        client = APIClient()
+        client.force_authenticate(user=user)
+        dataprovider = DataProvider.objects.get(file_name="fichier_test_dataprovider.py")
+        _save_circuit(dataprovider.id, Circuit('open', 3, datetime(2021, 1, 1, 12, tzinfo=timezone.utc)))
+        response = client.get(f'/api/dataproviders/{dataprovider.id}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['circuit_state'], 'open')
+        self.assertEqual(response.json()['failure_count'], 3)
+        self.assertEqual(response.json()['next_probe_at'], '2021-01-01T12:00:00Z')
+
     def test_US23_I3_dataproviderdetail_get_without_perm(self):
         """
             Test if a user without perm can't get a dataprovider.
@@ -368,20 +398,21 @@ class DataProviderTest(TestCase):
             Expected Output:
                 We expect a 204 status code in the response.
                 We expect to not find in database the deleted data provider.
-                We expect to have one job less after deleted tha data provider.
+                We expect its job to be removed once the scheduler worker reconciled its jobs.
         """
         user = UserProfile.objects.create(username="user", password="p4ssword")
         self.add_delete_perm(user)
         client = APIClient()
         client.force_authenticate(user=user)
         dataprovider = DataProvider.objects.get(file_name="fichier_test_dataprovider.py")
+        data_provider.setup()
         add_job(dataprovider)
-        n_jobs_before = scheduler.get_jobs()
+        self.assertIsNotNone(data_provider.scheduler.get_job(dataprovider.job_id))
         response = client.delete(f'/api/dataproviders/{dataprovider.id}/')
-        n_jobs_after = scheduler.get_jobs()
+        reconcile_jobs()
         self.assertEqual(response.status_code, 204)
         self.assertFalse(DataProvider.objects.filter(id=dataprovider.id).exists())
-        self.assertEqual(len(n_jobs_before), len(n_jobs_after) + 1)
+        self.assertIsNone(data_provider.scheduler.get_job(dataprovider.job_id))
 
     def test_US23_I5_dataproviderdetail_delete_without_perm(self):
         """
@@ -555,3 +586,99 @@ class DataProviderTest(TestCase):
         )
         self.assertEqual(response.data["error"], 'IP not found or python file not working')
         os.remove(os.path.join(BASE_DIR, 'utils/data_providers/temp_test_data_providers_error_in_getdata.py'))
+
+    def test_US23_I7_dataproviderreadings_get_with_perm(self):
+        """
+            Test if a user with perm receive the aggregated values of a data provider.
+
+            Inputs:
+                user (UserProfile): a UserProfile with permissions to view data providers.
+                rollups (ReadingRollup): 3 minute rollups and 1 hour rollup of a data provider.
+
+            Expected Output:
+                We expect a 200 status code in the response.
+                We expect the minute rollups of the requested range, as the 3 minutes range is short.
+                We expect the hour rollup when the hour resolution is requested.
+                We expect a 400 status code when the range or the resolution is not valid.
+        """
+        user = UserProfile.objects.create(username="user", password="p4ssword")
+        self.add_view_perm(user)
+        client = APIClient()
+        client.force_authenticate(user=user)
+        dataprovider = DataProvider.objects.get(file_name="fichier_test_dataprovider.py")
+        for minute in range(3):
+            ReadingRollup.objects.create(
+                dataprovider=dataprovider,
+                resolution=ReadingRollup.MINUTE,
+                bucket=datetime(2020, 1, 1, 10, minute, tzinfo=timezone.utc),
+                minimum=minute,
+                maximum=minute + 2,
+                total=minute * 2 + 2,
+                count=2
+            )
+        ReadingRollup.objects.create(
+            dataprovider=dataprovider,
+            resolution=ReadingRollup.HOUR,
+            bucket=datetime(2020, 1, 1, 10, tzinfo=timezone.utc),
+            minimum=0,
+            maximum=4,
+            total=12,
+            count=6
+        )
+        start = int(datetime(2020, 1, 1, 10, 1, tzinfo=timezone.utc).timestamp() * 1000)
+        end = int(datetime(2020, 1, 1, 10, 4, tzinfo=timezone.utc).timestamp() * 1000)
+        response = client.get(f'/api/dataproviders/{dataprovider.id}/readings/', {'start': start, 'end': end})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['resolution'], '1m')
+        self.assertEqual(
+            [dict(reading) for reading in response.data['readings']], [
+                {
+                    'timestamp': start,
+                    'minimum': 1,
+                    'maximum': 3,
+                    'average': 2,
+                    'count': 2
+                }, {
+                    'timestamp': start + 60000,
+                    'minimum': 2,
+                    'maximum': 4,
+                    'average': 3,
+                    'count': 2
+                }
+            ]
+        )
+        response = client.get(
+            f'/api/dataproviders/{dataprovider.id}/readings/', {
+                'start': 0,
+                'end': end,
+                'resolution': '1h'
+            }
+        )
+        self.assertEqual(response.data['readings'][0]['average'], 2)
+        response = client.get(f'/api/dataproviders/{dataprovider.id}/readings/', {'start': 'now', 'end': end})
+        self.assertEqual(response.status_code, 400)
+        response = client.get(
+            f'/api/dataproviders/{dataprovider.id}/readings/', {
+                'start': start,
+                'end': end,
+                'resolution': '1s'
+            }
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_US23_I7_dataproviderreadings_get_without_perm(self):
+        """
+            Test if a user without perm doesn't receive the aggregated values of a data provider.
+
+            Inputs:
+                user (UserProfile): a UserProfile without permissions to view data providers.
+
+            Expected Output:
+                We expect a 401 status code in the response.
+        """
+        user = UserProfile.objects.create(username="user", password="p4ssword")
+        client = APIClient()
+        client.force_authenticate(user=user)
+        dataprovider = DataProvider.objects.get(file_name="fichier_test_dataprovider.py")
+        response = client.get(f'/api/dataproviders/{dataprovider.id}/readings/', {'start': 0, 'end': 1})
+        self.assertEqual(response.status_code, 401)
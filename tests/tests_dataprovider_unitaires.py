@@ -1,16 +1,63 @@
+import asyncio
 import os
+import struct
+import subprocess
+import sys
+import threading
+from concurrent.futures import Executor, Future
+from datetime import date, datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest import mock
 
 import pytest
+from apscheduler.schedulers.background import BackgroundScheduler
 from init_db_tests import init_db
 
 from django.contrib.auth.models import Permission
-from django.test import TestCase
-from maintenancemanagement.models import Equipment, Field
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from maintenancemanagement.models import Equipment, Field, FieldObject, Task
 from openCMMS.settings import BASE_DIR
 from rest_framework.test import APIClient
+from umodbus.client import tcp
 from usersmanagement.models import UserProfile
-from utils.data_provider import _trigger_dataprovider
-from utils.models import DataProvider
+from utils import data_provider
+from utils.data_provider import (
+    CLOSED_CIRCUIT,
+    DATABASE_JOBSTORE,
+    MEMORY_JOBSTORE,
+    CircuitBreaker,
+    GetDataException,
+    PollingPool,
+    ReadingWriter,
+    ReadPlanner,
+    plan_reads,
+    reconcile_jobs,
+)
+from utils.jobstores import DjangoJobStore
+from utils.modbus import ModbusConnectionPool
+from utils.models import DataProvider, Reading, ReadingRollup, ScheduledJob
+from utils.plugins import InvalidPluginError, registry
+from utils.readings import maintain_readings, purge, roll_up
+from utils.scheduler import LeaderLock
+
+
+class DeferredExecutor(Executor):
+    """Keep the calls, run in the thread of the test once its event loop is done, inside its transaction."""
+
+    def __init__(self):
+        self.calls = []
+
+    def submit(self, fn, *args, **kwargs):
+        self.calls.append((fn, args, kwargs))
+        future = Future()
+        future.set_result(None)
+        return future
+
+    def run_calls(self):
+        for fn, args, kwargs in self.calls:
+            fn(*args, **kwargs)
 
 
 class DataProviderTest(TestCase):
@@ -20,6 +67,22 @@ class DataProviderTest(TestCase):
         with django_db_blocker.unblock():
             init_db()
 
+    def poll(self, dataprovider):
+        """
+            Poll the data provider as the scheduler worker does, then save the value got.
+        """
+        writer = ReadingWriter(executor=None, interval=60, batch_size=10)
+        breaker = CircuitBreaker(1, 10, 30, lambda dataprovider_id, circuit: None)
+        planner = ReadPlanner(PollingPool(concurrency=1, timeout=1), window=0.01, max_gap=0, max_quantity=1)
+        executor = DeferredExecutor()
+        with mock.patch.multiple(
+            data_provider, circuit_breaker=breaker, read_planner=planner, reading_writer=writer, database_executor=executor
+        ):
+            asyncio.run(data_provider._poll_dataprovider(dataprovider))
+        executor.run_calls()
+        writer.flush()
+        return breaker
+
     def add_add_perm(self, user):
         """
             Add add permission to user
@@ -60,6 +123,526 @@ class DataProviderTest(TestCase):
             format='json'
         )
         dataprovider = DataProvider.objects.get(name='dataprovider de test')
-        _trigger_dataprovider(dataprovider)
+        self.poll(dataprovider)
         self.assertEqual(int(Field.objects.get(name="Nb bouteilles").object_set.get().value), 2)
         os.remove(os.path.join(BASE_DIR, 'utils/data_providers/temp_test_data_providers.py'))
+
+    def test_US23_U2_dataprovider_execution_triggers_watching_tasks(self):
+        """
+            Test if a data provider execution triggers the tasks watching the updated field.
+
+            Inputs:
+                file (File): a temporary file which will return a value for the data provider.
+                watching_task (Task): a task with an above threshold trigger condition on the updated field.
+                other_task (Task): a task with an above threshold trigger condition on another field.
+
+            Expected Output:
+                We expect the watching_task to be triggered right after the data provider execution.
+                We expect the other_task not to be triggered.
+        """
+        with open(os.path.join(BASE_DIR, 'utils/data_providers/temp_test_trigger_data_providers.py'), "w+") as file:
+            file.write('def get_data(ip_address, port):\n')
+            file.write('    return 70000')
+        updated_field_object = Field.objects.get(name="Nb bouteilles").object_set.get()
+        other_field_object = Field.objects.get(name="Pression").object_set.get()
+        watching_task = Task.objects.create(name='Watching task', is_triggered=False)
+        FieldObject.objects.create(
+            described_object=watching_task,
+            field=Field.objects.get(name="Above Threshold"),
+            value=f"60000|{updated_field_object.id}|7d"
+        )
+        other_task = Task.objects.create(name='Other task', is_triggered=False)
+        FieldObject.objects.create(
+            described_object=other_task,
+            field=Field.objects.get(name="Above Threshold"),
+            value=f"0|{other_field_object.id}|7d"
+        )
+        dataprovider = DataProvider.objects.create(
+            file_name='temp_test_trigger_data_providers.py',
+            name='dataprovider de test',
+            recurrence='10d',
+            ip_address='127.0.0.1',
+            port=5002,
+            equipment=Equipment.objects.get(name='Embouteilleuse AXB1'),
+            field_object=updated_field_object,
+        )
+        self.poll(dataprovider)
+        os.remove(os.path.join(BASE_DIR, 'utils/data_providers/temp_test_trigger_data_providers.py'))
+        self.assertTrue(Task.objects.get(name='Watching task').is_triggered)
+        self.assertEqual(Task.objects.get(name='Watching task').end_date, date.today() + timedelta(days=7))
+        self.assertFalse(Task.objects.get(name='Other task').is_triggered)
+
+    def test_US23_U3_polling_pool_timeout_and_concurrency(self):
+        """
+            Test if the polling pool cancels slow polls and bounds the number of simultaneous polls.
+
+            Inputs:
+                module (SimpleNamespace): a data provider module whose get_data_async answers after 0.1 second,
+                    or never for the ip address 'unreachable'.
+                pool (PollingPool): a pool polling at most 2 data providers at the same time.
+
+            Expected Output:
+                We expect to get the value of the reachable data providers.
+                We expect a GetDataException for the unreachable one, after the timeout.
+                We expect no more than 2 polls at the same time.
+        """
+        running = []
+        max_running = []
+
+        async def get_data_async(ip_address, port):
+            running.append(ip_address)
+            max_running.append(len(running))
+            await asyncio.sleep(10 if ip_address == 'unreachable' else 0.1)
+            running.remove(ip_address)
+            return port
+
+        async def poll(pool, ip_address, port):
+            try:
+                return await pool.get_data(SimpleNamespace(get_data_async=get_data_async), ip_address, port)
+            except GetDataException:
+                return None
+
+        async def poll_all():
+            pool = PollingPool(concurrency=2, timeout=0.5)
+            return await asyncio.gather(*[poll(pool, 'unreachable' if i == 0 else 'device', i) for i in range(6)])
+
+        self.assertEqual(asyncio.run(poll_all()), [None, 1, 2, 3, 4, 5])
+        self.assertEqual(max(max_running), 2)
+
+    def test_US23_U4_modbus_connection_pool_reuses_connections(self):
+        """
+            Test if the modbus connection pool shares one connection per device and reconnects when it is closed.
+
+            Inputs:
+                device (Server): a modbus device answering 42 to every read holding registers request.
+                pool (ModbusConnectionPool): the connection pool sending the requests.
+
+            Expected Output:
+                We expect 5 simultaneous requests to the device to be sent over a single connection.
+                We expect a request sent after the device closed the connection to succeed over a new one.
+        """
+        connections = []
+
+        async def handle(reader, writer):
+            connections.append(writer)
+            try:
+                while True:
+                    request = await reader.readexactly(12)
+                    writer.write(request[:4] + struct.pack('>HBBBH', 5, request[6], 3, 2, 42))
+            except asyncio.IncompleteReadError:
+                writer.close()
+
+        async def send_messages():
+            device = await asyncio.start_server(handle, 'localhost', 0)
+            port = device.sockets[0].getsockname()[1]
+            pool = ModbusConnectionPool()
+            message = tcp.read_holding_registers(slave_id=1, starting_address=0, quantity=1)
+            responses = await asyncio.gather(*[pool.send_message('localhost', port, message) for _ in range(5)])
+            connections[0].close()
+            responses.append(await pool.send_message('localhost', port, message))
+            pool.close()
+            device.close()
+            return responses
+
+        self.assertEqual(asyncio.run(send_messages()), [[42]] * 6)
+        self.assertEqual(len(connections), 2)
+
+    def test_US23_U5_plan_reads(self):
+        """
+            Test if the addresses are grouped into blocks of nearby addresses.
+
+            Inputs:
+                addresses (list): unsorted addresses, with a duplicate.
+
+            Expected Output:
+                We expect blocks of sorted addresses at most 2 unread addresses apart and spanning at most 5 addresses.
+        """
+        self.assertEqual(
+            plan_reads([9, 0, 1, 3, 3, 4, 6, 20], max_gap=2, max_quantity=5), [[0, 1, 3, 4], [6, 9], [20]]
+        )
+
+    def test_US23_U6_read_planner_coalesces_reads(self):
+        """
+            Test if the reads of a device are coalesced into a single get_data_many call.
+
+            Inputs:
+                module (SimpleNamespace): a data provider module whose get_data_many_async returns the addresses
+                    multiplied by 10.
+                planner (ReadPlanner): a planner coalescing the reads of a device made during 0.05 second.
+
+            Expected Output:
+                We expect each data provider to get the value of its address.
+                We expect one get_data_many call per device and block of nearby addresses.
+        """
+        calls = []
+
+        async def get_data_many_async(ip_address, port, addresses):
+            calls.append((ip_address, addresses))
+            return [address * 10 for address in addresses]
+
+        async def poll_all():
+            module = SimpleNamespace(get_data_many_async=get_data_many_async, get_data_many=None)
+            planner = ReadPlanner(PollingPool(concurrency=2, timeout=1), window=0.05, max_gap=2, max_quantity=125)
+            reads = [('plc1', 0), ('plc1', 2), ('plc1', 1), ('plc1', 2), ('plc1', 50), ('plc2', 0)]
+            return await asyncio.gather(*[planner.get_data(module, ip, 502, address) for ip, address in reads])
+
+        self.assertEqual(asyncio.run(poll_all()), [0, 20, 10, 20, 500, 0])
+        self.assertEqual(sorted(calls), [('plc1', [0, 1, 2]), ('plc1', [50]), ('plc2', [0])])
+
+    def test_US23_U7_reading_writer_saves_values_in_bulk(self):
+        """
+            Test if the buffered values of the data providers are saved in bulk.
+
+            Inputs:
+                active_dataprovider (DataProvider): an activated data provider, which got 2 values.
+                inactive_dataprovider (DataProvider): a data provider marked as not working, which got a value.
+                writer (ReadingWriter): the buffer of the values.
+
+            Expected Output:
+                We expect the 3 values to be waiting and to be appended to the readings history.
+                We expect the last values to be saved with a single update of the field objects.
+                We expect only the inactive_dataprovider row to be updated, to mark it as working.
+                We expect the flush to be logged as a warning, 3 values having been waiting.
+        """
+        nb_bouteilles = Field.objects.get(name="Nb bouteilles").object_set.get()
+        pression = Field.objects.get(name="Pression").object_set.get()
+        equipment = Equipment.objects.get(name='Embouteilleuse AXB1')
+        active_dataprovider = DataProvider.objects.create(
+            file_name='a.py', ip_address='127.0.0.1', recurrence='1m', equipment=equipment, field_object=nb_bouteilles
+        )
+        inactive_dataprovider = DataProvider.objects.create(
+            file_name='a.py',
+            ip_address='127.0.0.1',
+            recurrence='1m',
+            equipment=equipment,
+            field_object=pression,
+            is_activated=None
+        )
+        writer = ReadingWriter(executor=None, interval=60, batch_size=10, warning_queue_depth=3)
+
+        async def add_readings():
+            writer.add(active_dataprovider, 1)
+            writer.add(inactive_dataprovider, 3)
+            writer.add(active_dataprovider, 2)
+
+        asyncio.run(add_readings())
+        self.assertEqual(writer.queue_depth, 3)
+        with CaptureQueriesContext(connection) as context, self.assertLogs('utils.data_provider', 'WARNING') as logs:
+            writer.flush()
+        self.assertIn('3 values saved', logs.output[0])
+        updates = [query['sql'] for query in context.captured_queries if query['sql'].startswith('UPDATE')]
+        self.assertEqual(len([sql for sql in updates if 'maintenancemanagement_fieldobject' in sql]), 1)
+        self.assertEqual(len([sql for sql in updates if 'utils_dataprovider' in sql]), 1)
+        self.assertEqual(FieldObject.objects.get(id=nb_bouteilles.id).value, '2')
+        self.assertEqual(FieldObject.objects.get(id=pression.id).value, '3')
+        self.assertTrue(DataProvider.objects.get(id=inactive_dataprovider.id).is_activated)
+        self.assertEqual(
+            list(active_dataprovider.reading_set.order_by('timestamp').values_list('value', flat=True)), [1, 2]
+        )
+        self.assertEqual(list(inactive_dataprovider.reading_set.values_list('value', flat=True)), [3])
+        self.assertEqual(writer.metrics()['queue_depth'], 0)
+        self.assertEqual(writer.metrics()['flush_count'], 1)
+
+    @override_settings(READINGS_ROLLUP_DELAY=10, READINGS_RETENTION_DAYS={'raw': 1, '1m': 1, '1h': None, '1d': None})
+    def test_US23_U8_readings_roll_up_and_purge(self):
+        """
+            Test if the readings are aggregated once per resolution and deleted after their retention.
+
+            Inputs:
+                dataprovider (DataProvider): a data provider with 5 readings during 3 minutes of 2 hours of a day.
+
+            Expected Output:
+                We expect one rollup per minute, hour and day, with the minimum, maximum, average and count of the
+                readings.
+                We expect the minute which is not complete yet to be left for later.
+                We expect a second aggregation not to create rollups twice.
+                We expect a reading saved late, after its minute was aggregated, to be aggregated again at each
+                resolution.
+                We expect the readings older than 1 day and the minute rollups older than 1 day to be deleted.
+        """
+        dataprovider = DataProvider.objects.get(file_name="fichier_test_dataprovider.py")
+        for hour, minute, second, value in [(10, 0, 0, 1), (10, 0, 30, 3), (10, 1, 0, 5), (11, 0, 0, 7), (11, 0, 40, 9)]:
+            Reading.objects.create(
+                dataprovider=dataprovider,
+                timestamp=datetime(2020, 1, 1, hour, minute, second, tzinfo=timezone.utc),
+                value=value
+            )
+        Reading.objects.create(dataprovider=dataprovider, timestamp=datetime(2020, 1, 2, tzinfo=timezone.utc), value=0)
+        roll_up(datetime(2020, 1, 2, 0, 0, 30, tzinfo=timezone.utc))
+        roll_up(datetime(2020, 1, 2, 0, 0, 30, tzinfo=timezone.utc))
+
+        def rollups(resolution):
+            return [
+                (rollup.bucket.hour, rollup.bucket.minute, rollup.minimum, rollup.maximum, rollup.average, rollup.count)
+                for rollup in dataprovider.rollup_set.filter(resolution=resolution).order_by('bucket')
+            ]
+
+        self.assertEqual(rollups(ReadingRollup.MINUTE), [(10, 0, 1, 3, 2, 2), (10, 1, 5, 5, 5, 1), (11, 0, 7, 9, 8, 2)])
+        self.assertEqual(rollups(ReadingRollup.HOUR), [(10, 0, 1, 5, 3, 3), (11, 0, 7, 9, 8, 2)])
+        self.assertEqual(rollups(ReadingRollup.DAY), [(0, 0, 1, 9, 5, 5)])
+        Reading.objects.create(
+            dataprovider=dataprovider, timestamp=datetime(2020, 1, 1, 10, 0, 45, tzinfo=timezone.utc), value=11
+        )
+        roll_up(datetime(2020, 1, 2, 0, 0, 40, tzinfo=timezone.utc))
+        self.assertEqual(rollups(ReadingRollup.MINUTE)[0], (10, 0, 1, 11, 5, 3))
+        self.assertEqual(rollups(ReadingRollup.HOUR), [(10, 0, 1, 11, 5, 4), (11, 0, 7, 9, 8, 2)])
+        self.assertEqual(rollups(ReadingRollup.DAY), [(0, 0, 1, 11, 6, 6)])
+        purge(datetime(2020, 1, 2, 23, tzinfo=timezone.utc))
+        self.assertEqual(dataprovider.reading_set.count(), 1)
+        self.assertEqual(dataprovider.rollup_set.filter(resolution=ReadingRollup.MINUTE).count(), 0)
+        self.assertEqual(dataprovider.rollup_set.count(), 3)
+
+    def test_US23_U9_reconcile_jobs_follows_the_data_providers(self):
+        """
+            Test if the jobs of the scheduler worker follow the data providers edited by the web processes.
+
+            Inputs:
+                dataprovider (DataProvider): a data provider added, updated, deactivated then deleted.
+
+            Expected Output:
+                We expect one job per data provider, replaced when its recurrence changes.
+                We expect the job of a daily poll to be kept in the database, the one of a frequent poll in memory.
+                We expect the job to be paused while the data provider is deactivated.
+                We expect the job to be removed with the data provider.
+        """
+        dataprovider = DataProvider.objects.create(
+            file_name='modbus_example.py',
+            name='reconciled',
+            recurrence='1d',
+            ip_address='127.0.0.1',
+            equipment=Equipment.objects.get(name="Embouteilleuse AXB1"),
+            field_object=FieldObject.objects.get(value="1.012")
+        )
+        job_id = f'dataprovider-{dataprovider.id}'
+        data_provider.setup()
+        scheduler = data_provider.scheduler
+        reconcile_jobs()
+        self.assertEqual(scheduler.get_job(job_id).trigger.interval, timedelta(days=1))
+        self.assertEqual(DataProvider.objects.get(id=dataprovider.id).job_id, job_id)
+        self.assertIn(job_id, [job.id for job in scheduler.get_jobs(jobstore=DATABASE_JOBSTORE)])
+        DataProvider.objects.filter(id=dataprovider.id).update(recurrence='2m')
+        reconcile_jobs()
+        self.assertEqual(scheduler.get_job(job_id).trigger.interval, timedelta(minutes=2))
+        self.assertNotIn(job_id, [job.id for job in scheduler.get_jobs(jobstore=DATABASE_JOBSTORE)])
+        self.assertIn(job_id, [job.id for job in scheduler.get_jobs(jobstore=MEMORY_JOBSTORE)])
+        DataProvider.objects.filter(id=dataprovider.id).update(is_activated=False)
+        reconcile_jobs()
+        self.assertIsNone(scheduler.get_job(job_id).next_run_time)
+        DataProvider.objects.filter(id=dataprovider.id).delete()
+        reconcile_jobs()
+        self.assertIsNone(scheduler.get_job(job_id))
+
+    def test_US23_U10_leader_lock_is_exclusive(self):
+        """
+            Test if a single scheduler worker can hold the leader lock.
+
+            Inputs:
+                lock (LeaderLock): the lock taken by this worker then by another one.
+
+            Expected Output:
+                We expect the other worker not to take the lock while it is held, and to take it once released.
+        """
+        lock = LeaderLock(key=12345)
+        results = []
+
+        def other_worker():
+            other_lock = LeaderLock(key=12345)
+            results.append(other_lock.acquire())
+            if results[-1]:
+                other_lock.release()
+            connection.close()
+
+        self.assertTrue(lock.acquire())
+        self.assertTrue(lock.is_held())
+        thread = threading.Thread(target=other_worker)
+        thread.start()
+        thread.join()
+        lock.release()
+        self.assertFalse(lock.is_held())
+        thread = threading.Thread(target=other_worker)
+        thread.start()
+        thread.join()
+        self.assertEqual(results, [False, True])
+
+    def test_US23_U11_jobs_are_kept_in_the_database(self):
+        """
+            Test if the jobs of the scheduler worker are kept in the database.
+
+            Inputs:
+                job (Job): a job added, restored by another scheduler, paused then removed.
+
+            Expected Output:
+                We expect the other scheduler to restore the job with its next run time.
+                We expect only the next run time of the restored job to be saved after a run, the rest when it changes.
+                We expect the paused job to be saved without next run time.
+                We expect the row of the job to be deleted with it.
+        """
+        scheduler = BackgroundScheduler(jobstores={'default': DjangoJobStore()})
+        scheduler.start(paused=True)
+        self.addCleanup(scheduler.shutdown, wait=False)
+        job = scheduler.add_job(maintain_readings, 'interval', id='readings', hours=1)
+        self.assertEqual(ScheduledJob.objects.get().id, 'readings')
+        other_scheduler = BackgroundScheduler(jobstores={'default': DjangoJobStore()})
+        other_scheduler.start(paused=True)
+        self.addCleanup(other_scheduler.shutdown, wait=False)
+        restored_job = other_scheduler.get_job('readings')
+        self.assertEqual(restored_job.func, maintain_readings)
+        self.assertEqual(restored_job.next_run_time, job.next_run_time)
+        store = other_scheduler._lookup_jobstore('default')
+        job_state = ScheduledJob.objects.get().job_state
+        restored_job._modify(next_run_time=restored_job.next_run_time + timedelta(hours=1))
+        with CaptureQueriesContext(connection) as context:
+            store.update_job(restored_job)
+        self.assertEqual([query['sql'].count('job_state') for query in context.captured_queries], [0])
+        self.assertEqual(bytes(ScheduledJob.objects.get().job_state), bytes(job_state))
+        self.assertEqual(scheduler.get_job('readings').next_run_time, restored_job.next_run_time)
+        other_scheduler.modify_job('readings', name='hourly readings')
+        self.assertEqual(scheduler.get_job('readings').name, 'hourly readings')
+        scheduler.pause_job('readings')
+        self.assertIsNone(ScheduledJob.objects.get().next_run_time)
+        self.assertIsNone(other_scheduler.get_job('readings').next_run_time)
+        scheduler.remove_job('readings')
+        self.assertFalse(ScheduledJob.objects.exists())
+
+    def test_US23_U12_plugin_registry_follows_the_files(self):
+        """
+            Test if the modules of the data providers are kept until their file changes.
+
+            Inputs:
+                file (File): a temporary data provider file written, rewritten, broken then removed.
+
+            Expected Output:
+                We expect the same module to be returned while the file doesn't change.
+                We expect the module to be imported again once the file changed.
+                We expect a file without get_data not to be listed and to raise an InvalidPluginError.
+                We expect a removed file to raise an ImportError.
+        """
+        path = os.path.join(BASE_DIR, 'utils/data_providers/temp_test_registry_data_providers.py')
+        self.addCleanup(lambda: os.path.exists(path) and os.remove(path))
+        with open(path, "w+") as file:
+            file.write('def get_data(ip_address, port):\n')
+            file.write('    return 1')
+        module = registry.get('temp_test_registry_data_providers.py')
+        self.assertIs(registry.get('temp_test_registry_data_providers.py'), module)
+        self.assertIn('temp_test_registry_data_providers.py', registry.file_names())
+        with open(path, "w+") as file:
+            file.write('def get_data(ip_address, port=502):\n')
+            file.write('    return 20')
+        self.assertEqual(registry.get('temp_test_registry_data_providers.py', refresh=True).get_data('127.0.0.1'), 20)
+        with open(path, "w+") as file:
+            file.write('def get_data(ip_address):\n')
+            file.write('    return 3')
+        with self.assertRaises(InvalidPluginError):
+            registry.get('temp_test_registry_data_providers.py', refresh=True)
+        self.assertNotIn('temp_test_registry_data_providers.py', registry.file_names())
+        os.remove(path)
+        with self.assertRaises(ImportError):
+            registry.get('temp_test_registry_data_providers.py')
+
+    def test_US23_U13_circuit_breaker_backs_off_failing_data_providers(self):
+        """
+            Test if a failing data provider stops being polled, for a delay doubling up to its cap.
+
+            Inputs:
+                dataprovider (DataProvider): a data provider failing 4 times, then answering.
+
+            Expected Output:
+                We expect the circuit to open at the second failure, for 10 seconds.
+                We expect one poll to be allowed once the delay elapsed, the circuit being half-open.
+                We expect the delay to double at each failed try, up to 30 seconds.
+                We expect the circuit to close once the data provider answers.
+                We expect only the changes of state to be saved.
+        """
+        changes = []
+        circuit_breaker = CircuitBreaker(2, 10, 30, lambda dataprovider_id, circuit: changes.append(circuit))
+        dataprovider = DataProvider.objects.get(file_name="fichier_test_dataprovider.py")
+        now = datetime(2021, 1, 1, tzinfo=timezone.utc)
+        circuit_breaker.record_failure(dataprovider, now)
+        self.assertEqual(changes, [])
+        self.assertTrue(circuit_breaker.allow(dataprovider, now))
+        circuit_breaker.record_failure(dataprovider, now)
+        self.assertEqual(changes, [(DataProvider.OPEN, 2, now + timedelta(seconds=10))])
+        self.assertFalse(circuit_breaker.allow(dataprovider, now + timedelta(seconds=9)))
+        self.assertTrue(circuit_breaker.allow(dataprovider, now + timedelta(seconds=10)))
+        self.assertEqual(changes[-1].state, DataProvider.HALF_OPEN)
+        circuit_breaker.record_failure(dataprovider, now + timedelta(seconds=10))
+        self.assertEqual(changes[-1], (DataProvider.OPEN, 3, now + timedelta(seconds=30)))
+        circuit_breaker.allow(dataprovider, now + timedelta(seconds=30))
+        circuit_breaker.record_failure(dataprovider, now + timedelta(seconds=30))
+        self.assertEqual(changes[-1], (DataProvider.OPEN, 4, now + timedelta(seconds=60)))
+        circuit_breaker.allow(dataprovider, now + timedelta(seconds=60))
+        circuit_breaker.record_success(dataprovider)
+        circuit_breaker.record_success(dataprovider)
+        self.assertEqual(changes[-1], CLOSED_CIRCUIT)
+        self.assertEqual(len(changes), 7)
+
+    def test_US23_U14_failing_data_provider_is_deactivated_whatever_the_error(self):
+        """
+            Test if a data provider whose module raises any exception is counted as failing and deactivated.
+
+            Inputs:
+                file (File): a temporary data provider module whose get_data raises an OSError.
+                dataprovider (DataProvider): a data provider using this module.
+
+            Expected Output:
+                We expect the data provider to open its circuit and to be marked as not working.
+        """
+        path = os.path.join(BASE_DIR, 'utils/data_providers/temp_test_failing_data_providers.py')
+        with open(path, "w+") as file:
+            file.write('def get_data(ip_address, port):\n')
+            file.write('    raise OSError("connection refused")')
+        self.addCleanup(os.remove, path)
+        dataprovider = DataProvider.objects.create(
+            file_name='temp_test_failing_data_providers.py',
+            ip_address='127.0.0.1',
+            recurrence='1m',
+            equipment=Equipment.objects.get(name='Embouteilleuse AXB1'),
+            field_object=Field.objects.get(name="Nb bouteilles").object_set.get(),
+            is_activated=True,
+        )
+        with self.assertLogs('utils.data_provider', level='WARNING') as logs:
+            breaker = self.poll(dataprovider)
+        self.assertEqual(breaker.get(dataprovider).state, DataProvider.OPEN)
+        self.assertIsNone(DataProvider.objects.get(id=dataprovider.id).is_activated)
+        self.assertTrue(any('connection refused' in output for output in logs.output))
+
+    def test_US23_U15_read_planner_fails_the_reads_missing_from_a_block(self):
+        """
+            Test if the reads of a block are failed when the module returns fewer values than addresses.
+
+            Inputs:
+                module (SimpleNamespace): a data provider module whose get_data_many_async returns a single value.
+                planner (ReadPlanner): a planner coalescing the reads of a device made during 0.01 second.
+
+            Expected Output:
+                We expect every read of the block to raise a GetDataException instead of waiting forever.
+        """
+
+        async def get_data_many_async(ip_address, port, addresses):
+            return [0]
+
+        async def poll_all():
+            module = SimpleNamespace(get_data_many_async=get_data_many_async, get_data_many=None)
+            planner = ReadPlanner(PollingPool(concurrency=1, timeout=1), window=0.01, max_gap=2, max_quantity=125)
+            reads = [planner.get_data(module, 'plc1', 502, address) for address in (0, 1)]
+            return await asyncio.wait_for(asyncio.gather(*reads, return_exceptions=True), 1)
+
+        results = asyncio.run(poll_all())
+        self.assertEqual([type(result) for result in results], [GetDataException, GetDataException])
+
+    def test_US23_U16_web_processes_build_no_scheduler(self):
+        """
+            Test if importing the views of the data providers, as a web process does, builds no scheduler.
+
+            Inputs:
+                process: a new python process setting up django and importing the views.
+
+            Expected Output:
+                We expect no event loop, scheduler or database executor to be built.
+        """
+        code = (
+            'import django; django.setup(); import utils.views; from utils import data_provider; '
+            'print(data_provider.event_loop, data_provider.scheduler, data_provider.database_executor)'
+        )
+        output = subprocess.run([sys.executable, '-c', code], cwd=BASE_DIR, capture_output=True, text=True, check=True)
+        self.assertEqual(output.stdout.split(), ['None', 'None', 'None'])
@@ -5,6 +5,7 @@ from init_db_tests import init_db
 from PIL import Image
 
 from django.contrib.auth.models import Permission
+from django.core.cache import cache
 from django.test import TestCase
 from maintenancemanagement.models import (
     Equipment,
@@ -13,6 +14,7 @@ from maintenancemanagement.models import (
     FieldGroup,
     FieldObject,
     FieldValue,
+    RequirementsVersion,
 )
 from maintenancemanagement.serializers import (
     EquipmentDetailsSerializer,
@@ -398,6 +400,66 @@ class EquipmentTests(TestCase):
         response = client.get('/api/maintenancemanagement/equipments/requirements/')
         self.assertEqual(response.status_code, 401)
 
+    def test_US4_I8_equipmentrequirements_get_after_change(self):
+        """
+            Test if a user gets the equipment types requirements updated after a change
+
+            Inputs:
+                user (UserProfile): a UserProfile with permissions to add equipments.
+                field_value (FieldValue): a value added to a field of an equipment type.
+
+            Expected Output:
+                We expect a 304 status code when the ETag of the requirements is sent back.
+                We expect a 200 status code and the new value once the field changed.
+        """
+        user = UserProfile.objects.create(username="user", password="p4ssword")
+        self.add_add_perm(user)
+        client = APIClient()
+        client.force_authenticate(user=user)
+        # The rollback of the test does not remove the requirements it cached.
+        self.addCleanup(cache.clear)
+        response = client.get('/api/maintenancemanagement/equipments/requirements/')
+        etag = response['ETag']
+        response = client.get('/api/maintenancemanagement/equipments/requirements/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        FieldValue.objects.create(value='NewFieldValueTest', field=Field.objects.get(name='FieldWithValueTest'))
+        response = client.get('/api/maintenancemanagement/equipments/requirements/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        equipment_type_json = next(
+            equipment_type_json for equipment_type_json in response.json()
+            if equipment_type_json['name'] == 'EquipmentTypeTest'
+        )
+        self.assertEqual(equipment_type_json['field'][1]['value'], ['FieldValueTest', 'NewFieldValueTest'])
+
+    def test_US4_I8_equipmentrequirements_changed_by_another_process(self):
+        """
+            Test if the equipment types requirements changed by another process are sent again
+
+            Inputs:
+                user (UserProfile): a UserProfile with permissions to add equipments.
+                field_value (FieldValue): a value renamed by another process, which sets a new version.
+
+            Expected Output:
+                We expect a 200 status code, another ETag and the new value, the cache of this process being kept.
+        """
+        user = UserProfile.objects.create(username="user", password="p4ssword")
+        self.add_add_perm(user)
+        client = APIClient()
+        client.force_authenticate(user=user)
+        response = client.get('/api/maintenancemanagement/equipments/requirements/')
+        etag = response['ETag']
+        # Another process saves the change, without any signal in this one.
+        FieldValue.objects.filter(value='FieldValueTest').update(value='RenamedFieldValueTest')
+        RequirementsVersion.objects.update(version='0' * 32)
+        response = client.get('/api/maintenancemanagement/equipments/requirements/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        equipment_type_json = next(
+            equipment_type_json for equipment_type_json in response.json()
+            if equipment_type_json['name'] == 'EquipmentTypeTest'
+        )
+        self.assertEqual(equipment_type_json['field'][1]['value'], ['RenamedFieldValueTest'])
+
     def test_US7_I1_equipmentlist_post_with_file_with_perm(self):
         """
             Test if a user with perm can add an equipment with a file
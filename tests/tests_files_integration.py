@@ -1,14 +1,27 @@
-from io import BytesIO
+import hashlib
+import os
+from io import BytesIO, StringIO
 
-from maintenancemanagement.models import File
+from maintenancemanagement.files import sniff_file_type, validate_files
+from maintenancemanagement.models import File, Task
 from maintenancemanagement.serializers import FileSerializer
+from maintenancemanagement.thumbnails import (
+    get_thumbnail,
+    make_missing_thumbnails,
+    thumbnail_name,
+)
 from openCMMS import settings
 from PIL import Image
-from usersmanagement.models import UserProfile
+from PyPDF4 import PdfFileWriter
+from usersmanagement.models import Team, UserProfile
 
 from django.contrib.auth.models import Permission
 from django.contrib.contenttypes.models import ContentType
-from django.test import Client, TestCase
+from django.core.management import call_command
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db.models import F
+from django.test import Client, TestCase, override_settings
 from rest_framework.test import APIClient
 
 
@@ -195,6 +208,63 @@ class FileTests(TestCase):
         response = client.post("/api/maintenancemanagement/files/", data, format='multipart')
         self.assertEqual(response.status_code, 400)
 
+    def test_files_I1_pdf_file_is_checked_in_background(self):
+        """
+        Test if a pdf file is accepted from its header, then checked by the scheduler worker.
+
+                Inputs:
+                    user (UserProfile): a user we created with no permission.
+                    file (BytesIO) : a pdf file, then a file with a pdf header and no pdf structure.
+
+                Expected Outputs:
+                    We expect the response's status code to be 201 for both files, and is_valid to be None.
+                    We expect the first file to be marked as valid and the second one as not valid once checked.
+        """
+        user = self.set_up_without_perm()
+        client = APIClient()
+        client.force_authenticate(user=user)
+        response = client.post(
+            "/api/maintenancemanagement/files/", {
+                'file': self.temporary_image('PDF'),
+                'is_manual': 'True'
+            },
+            format='multipart'
+        )
+        broken_response = client.post(
+            "/api/maintenancemanagement/files/", {
+                'file': BytesIO(b'%PDF-1.4\n' + b'0' * 4096),
+                'is_manual': 'True'
+            },
+            format='multipart'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(broken_response.status_code, 201)
+        self.assertIsNone(response.data['is_valid'])
+        validate_files()
+        self.assertTrue(File.objects.get(pk=response.data['id']).is_valid)
+        self.assertFalse(File.objects.get(pk=broken_response.data['id']).is_valid)
+
+    def test_files_U1_sniff_file_type_reads_the_header_only(self):
+        """
+        Test if the type of a file is found from its first bytes, without moving in the file.
+
+                Inputs:
+                    files (BytesIO): a png, a jpeg, a pdf and a bmp file, a text file and one starting with BM.
+
+                Expected Outputs:
+                    We expect png, jpeg, pdf, bmp then None twice, the position of each file being kept.
+        """
+        files = [self.temporary_image('png'), self.temporary_image('JPEG'), self.temporary_image('PDF')]
+        files.append(self.temporary_image('BMP'))
+        files.append(BytesIO(b'Coco veut un gateau'))
+        files.append(BytesIO(b'BM' + b'Coco veut un gateau' * 2))
+        for file in files:
+            file.seek(3)
+        self.assertEqual(
+            [sniff_file_type(file) for file in files], ['png', 'jpeg', 'pdf', 'bmp', None, None]
+        )
+        self.assertEqual([file.tell() for file in files], [3, 3, 3, 3, 3, 3])
+
     def test_add_file_without_connected(self):
         """
         Test if a client with no authenticated user can't add a file.
@@ -297,3 +367,300 @@ class FileTests(TestCase):
         user = UserProfile.objects.get(id=user.pk)
         response = client.delete(f'/api/maintenancemanagement/files/{pk}/')
         self.assertEqual(response.status_code, 401)
+
+    def upload_task_file(self, user):
+        """
+            Upload a png file attached to a task of a team of the user
+        """
+        client = APIClient()
+        client.force_authenticate(user=user)
+        response = client.post(
+            '/api/maintenancemanagement/files/', {
+                'file': self.temporary_image('png'),
+                'is_manual': 'False'
+            },
+            format='multipart'
+        )
+        file = File.objects.get(pk=response.data['id'])
+        team = Team.objects.create(name='download team')
+        team.user_set.add(user)
+        task = Task.objects.create(name='download task')
+        task.teams.add(team)
+        task.files.add(file)
+        return client, file
+
+    def test_files_I5_download_file_of_a_task(self):
+        """
+        Test if a member of a team of a task can download its files, whole or by ranges.
+
+                Inputs:
+                    user (UserProfile): a user we created with no permission, member of a team of the task.
+                    file (File): a png file attached to the task.
+
+                Expected Outputs:
+                    We expect the whole file with a 200 status code when no range is asked.
+                    We expect the asked bytes with a 206 status code and their Content-Range.
+                    We expect a 416 status code for a range out of the file.
+        """
+        user = self.set_up_without_perm()
+        client, file = self.upload_task_file(user)
+        with open(file.file.path, 'rb') as content:
+            data = content.read()
+        response = client.get(f'/api/maintenancemanagement/files/{file.pk}/download/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), data)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['Content-Type'], 'image/png')
+        response = client.get(f'/api/maintenancemanagement/files/{file.pk}/download/', HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), data[10:20])
+        self.assertEqual(response['Content-Range'], f'bytes 10-19/{len(data)}')
+        self.assertEqual(response['Content-Length'], '10')
+        response = client.get(f'/api/maintenancemanagement/files/{file.pk}/download/', HTTP_RANGE='bytes=-4')
+        self.assertEqual(b''.join(response.streaming_content), data[-4:])
+        response = client.get(
+            f'/api/maintenancemanagement/files/{file.pk}/download/', HTTP_RANGE=f'bytes={len(data)}-'
+        )
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(data)}')
+
+    @override_settings(FILES_SENDFILE_HEADER='X-Accel-Redirect')
+    def test_files_I5_download_file_through_the_front_proxy(self):
+        """
+        Test if the download of a file is handed to the front proxy when it is configured.
+
+                Inputs:
+                    user (UserProfile): a user we created with no permission, member of a team of the task.
+                    file (File): a png file attached to the task.
+
+                Expected Outputs:
+                    We expect an empty response with the X-Accel-Redirect header giving the internal location.
+        """
+        user = self.set_up_without_perm()
+        client, file = self.upload_task_file(user)
+        response = client.get(f'/api/maintenancemanagement/files/{file.pk}/download/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{file.file.name}')
+        self.assertEqual(response.content, b'')
+
+    def test_files_I5_download_file_without_access(self):
+        """
+        Test if a user who can't see a file can't download it.
+
+                Inputs:
+                    user (UserProfile): a user we created with no permission, member of no team of the task.
+                    file (File): a png file attached to a task.
+
+                Expected Outputs:
+                    We expect the response's status_code to be 401, then 200 once the user can view the tasks.
+        """
+        _, file = self.upload_task_file(self.set_up_without_perm())
+        other_user = UserProfile.objects.create(username='other')
+        client = APIClient()
+        client.force_authenticate(user=other_user)
+        response = client.get(f'/api/maintenancemanagement/files/{file.pk}/download/')
+        self.assertEqual(response.status_code, 401)
+        other_user.user_permissions.add(Permission.objects.get(codename='view_task'))
+        client.force_authenticate(user=UserProfile.objects.get(pk=other_user.pk))
+        response = client.get(f'/api/maintenancemanagement/files/{file.pk}/download/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_files_I5_download_missing_file(self):
+        """
+        Test if a file whose content is missing from the storage is not found.
+
+                Inputs:
+                    user (UserProfile): a user we created with no permission, member of a team of the task.
+                    file (File): a png file attached to the task, whose content was deleted.
+
+                Expected Outputs:
+                    We expect the response's status_code to be 404 and the missing content to be logged.
+        """
+        user = self.set_up_without_perm()
+        client, file = self.upload_task_file(user)
+        default_storage.delete(file.file.name)
+        with self.assertLogs('maintenancemanagement.views.views_file', level='ERROR'):
+            response = client.get(f'/api/maintenancemanagement/files/{file.pk}/download/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_files_I6_thumbnails_of_an_image(self):
+        """
+        Test if the thumbnails of an image are made on their first request, then kept by digest of the image.
+
+                Inputs:
+                    user (UserProfile): a user we created with no permission, member of a team of the task.
+                    file (File): a 600x300 png file attached to the task.
+
+                Expected Outputs:
+                    We expect the thumbnail URLs of all sizes in the serialized file.
+                    We expect a png of 128x64 pixels, kept under the digest of the file and sent again unchanged.
+                    We expect a 404 status code for a size which is not made.
+        """
+        user = self.set_up_without_perm()
+        client = APIClient()
+        client.force_authenticate(user=user)
+        image = BytesIO()
+        Image.new('RGB', (600, 300), (200, 10, 10)).save(image, 'png')
+        image.seek(0)
+        response = client.post(
+            '/api/maintenancemanagement/files/', {
+                'file': image,
+                'is_manual': 'False'
+            }, format='multipart'
+        )
+        file = File.objects.get(pk=response.data['id'])
+        url = f'/api/maintenancemanagement/files/{file.pk}/thumbnail/128/'
+        self.assertEqual(response.data['thumbnails']['128'], url)
+        self.assertEqual(set(response.data['thumbnails']), {'128', '512'})
+        client.force_authenticate(user=UserProfile.objects.create(username='other', is_superuser=True))
+        response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/png')
+        with Image.open(BytesIO(b''.join(response.streaming_content))) as thumbnail:
+            self.assertEqual(thumbnail.size, (128, 64))
+            self.assertEqual(thumbnail.getpixel((64, 32)), (200, 10, 10))
+        path = default_storage.path(thumbnail_name(File.objects.get(pk=file.pk).digest, 512))
+        modified = os.stat(path).st_mtime_ns
+        self.assertEqual(client.get(url.replace('128', '512')).status_code, 200)
+        self.assertEqual(os.stat(path).st_mtime_ns, modified)
+        response = client.get(url.replace('128', '64'))
+        self.assertEqual(response.status_code, 404)
+
+    def test_files_I6_thumbnail_of_a_scanned_pdf(self):
+        """
+        Test if the thumbnail of a pdf is made from the image of its first page, by the scheduler worker.
+
+                Inputs:
+                    files (File): a pdf of a scanned page in colors, one of a fax scanned page and one without image.
+
+                Expected Outputs:
+                    We expect the thumbnails of the scanned pages, with their colors, and none for the last pdf.
+                    We expect the files to be done once, until the digest of their content changes.
+        """
+        files = []
+        for mode in ('RGB', '1'):
+            image = Image.new(mode, (400, 200), 'white')
+            image.paste(Image.new(mode, (200, 200)), (0, 0))
+            content = BytesIO()
+            image.save(content, 'PDF')
+            files.append(File.objects.create(file=SimpleUploadedFile('scan.pdf', content.getvalue())))
+        files.append(File.objects.create(file=SimpleUploadedFile('empty.pdf', b'%PDF-1.4\n')))
+        make_missing_thumbnails()
+        for file in files[:2]:
+            file = File.objects.get(pk=file.pk)
+            self.assertEqual(file.thumbnails_digest, file.digest)
+            with Image.open(default_storage.path(get_thumbnail(file, 128))) as thumbnail:
+                self.assertEqual(thumbnail.size, (128, 64))
+                self.assertEqual(thumbnail.convert('L').getpixel((10, 32)), 0)
+                self.assertEqual(thumbnail.convert('L').getpixel((118, 32)), 255)
+        self.assertIsNone(get_thumbnail(File.objects.get(pk=files[2].pk), 128))
+        self.assertFalse(File.objects.exclude(thumbnails_digest=F('digest')).exists())
+        File.objects.filter(pk=files[0].pk).update(digest='0' * 64)
+        self.assertEqual(list(File.objects.exclude(thumbnails_digest=F('digest'))), [files[0]])
+        make_missing_thumbnails()
+        self.assertTrue(os.path.exists(default_storage.path(thumbnail_name('0' * 64, 512))))
+
+    def test_files_I6_thumbnails_of_files_without_preview(self):
+        """
+        Test if the thumbnail URLs are only given for a preview, and a missing content doesn't stop the others.
+
+                Inputs:
+                    files (File): a pdf without image to check, a png file whose content is missing and a png file.
+
+                Expected Outputs:
+                    We expect no thumbnail URL for the pdf once it is checked, and the URLs of the png file.
+                    We expect the missing content to be logged, the thumbnails of the other png file being made.
+                    We expect a 404 status code for a thumbnail of the missing content.
+        """
+        image = BytesIO()
+        Image.new('RGB', (60, 30)).save(image, 'png')
+        writer, content = PdfFileWriter(), BytesIO()
+        writer.addBlankPage(100, 100)
+        writer.write(content)
+        pdf = File.objects.create(file=SimpleUploadedFile('blank.pdf', content.getvalue()), is_valid=None)
+        missing, png = [File.objects.create(file=SimpleUploadedFile('image.png', image.getvalue())) for _ in range(2)]
+        default_storage.delete(missing.file.name)
+        validate_files()
+        pdf = File.objects.get(pk=pdf.pk)
+        self.assertTrue(pdf.is_valid)
+        self.assertFalse(pdf.has_thumbnails)
+        self.assertEqual(FileSerializer(pdf).data['thumbnails'], {})
+        self.assertEqual(set(FileSerializer(png).data['thumbnails']), {'128', '512'})
+        with self.assertLogs('maintenancemanagement.thumbnails', level='ERROR'):
+            make_missing_thumbnails()
+        self.assertTrue(File.objects.get(pk=png.pk).has_thumbnails)
+        self.assertIsNone(File.objects.get(pk=missing.pk).thumbnails_digest)
+        client = APIClient()
+        client.force_authenticate(user=UserProfile.objects.create(username='other', is_superuser=True))
+        with self.assertLogs('maintenancemanagement.views.views_file', level='ERROR'):
+            response = client.get(f'/api/maintenancemanagement/files/{missing.pk}/thumbnail/128/')
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(FILE_UPLOAD_MAX_MEMORY_SIZE=100)
+    def test_files_I7_same_content_is_stored_once(self):
+        """
+        Test if a content uploaded twice is stored once, and deleted with the last file sharing it.
+
+                Inputs:
+                    user (UserProfile): a user we created with no permission.
+                    file (BytesIO) : a png image uploaded twice, bigger than the memory upload size.
+
+                Expected Outputs:
+                    We expect both files to share a content stored in the directory of its SHA-256 digest.
+                    We expect the content to be kept when the first file is deleted, and deleted with the second.
+        """
+        user = self.set_up_without_perm()
+        client = APIClient()
+        client.force_authenticate(user=user)
+        content = BytesIO()
+        Image.new('RGB', (60, 60), (10, 200, 10)).save(content, 'png')
+        digest = hashlib.sha256(content.getvalue()).hexdigest()
+        files = []
+        for _ in range(2):
+            response = client.post(
+                '/api/maintenancemanagement/files/', {
+                    'file': BytesIO(content.getvalue()),
+                    'is_manual': 'False'
+                },
+                format='multipart'
+            )
+            self.assertEqual(response.status_code, 201)
+            files.append(File.objects.get(pk=response.data['id']))
+        self.assertEqual([file.digest for file in files], [digest, digest])
+        self.assertEqual(files[0].file.name, files[1].file.name)
+        self.assertTrue(files[0].file.name.startswith(f'files/{digest[:2]}/{digest}/'))
+        path = files[0].file.path
+        client.force_authenticate(user=UserProfile.objects.create(username='other', is_superuser=True))
+        self.assertEqual(client.delete(f'/api/maintenancemanagement/files/{files[0].pk}/').status_code, 204)
+        self.assertTrue(os.path.exists(path))
+        self.assertEqual(client.delete(f'/api/maintenancemanagement/files/{files[1].pk}/').status_code, 204)
+        self.assertFalse(os.path.exists(path))
+
+    def test_files_U2_dedupe_files_command(self):
+        """
+        Test if the dedupe_files command keeps a single copy of the files stored several times.
+
+                Inputs:
+                    files (File): two files stored in two copies of the same content, and a file of another content.
+
+                Expected Outputs:
+                    We expect a dry run to report the copy to delete, without saving the digests or deleting it.
+                    We expect the files of the same content to share the first copy, the second one being deleted.
+                    We expect the other file to be left as it is.
+        """
+        files = [
+            File.objects.create(file=SimpleUploadedFile('manual.pdf', content))
+            for content in (b'%PDF-1.4 manual', b'%PDF-1.4 manual', b'%PDF-1.4 other')
+        ]
+        names = [file.file.name for file in files]
+        output = StringIO()
+        call_command('dedupe_files', '--dry-run', stdout=output)
+        self.assertIn('3 files hashed, 1 copies to delete', output.getvalue())
+        self.assertFalse(File.objects.exclude(digest=None).exists())
+        self.assertTrue(default_storage.exists(names[1]))
+        output = StringIO()
+        call_command('dedupe_files', stdout=output)
+        self.assertIn('3 files hashed, 1 copies deleted', output.getvalue())
+        self.assertEqual([File.objects.get(pk=file.pk).file.name for file in files], [names[0], names[0], names[2]])
+        self.assertFalse(default_storage.exists(names[1]))
+        self.assertEqual(default_storage.open(names[0]).read(), b'%PDF-1.4 manual')
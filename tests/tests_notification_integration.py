@@ -1,9 +1,13 @@
 import datetime
+import os
+import tempfile
 
 from usersmanagement.models import Team, TeamType, UserProfile
 from utils.notifications import *
 
-from django.test import TestCase
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 
 
 class NotificationsTests(TestCase):
@@ -63,3 +67,52 @@ class NotificationsTests(TestCase):
         self.assertEqual(email.subject, 'Notification Open-CMMS')
         self.assertEqual(email.to[0], 'joe.d@ll.com')
         self.assertEqual(1, len(email.to))
+
+    def test_US17_I2_send_notifications_to_many_users(self):
+        """
+        Test if the notifications of many users are computed in one query and sent over one connection
+
+                Inputs:
+                    users (UserProfile): 10 users of a team with a late, a today and a coming task, plus joe
+
+                Expected outputs:
+                    We expect the imminent tasks of all the users to be got with a single query
+                    We expect a mail for each user, sent over one connection
+        """
+        self.set_up()
+        team = Team.objects.get(name="team")
+        for i in range(10):
+            team.user_set.add(UserProfile.objects.create(username=f'user {i}', email=f'user{i}@ll.com'))
+        with CaptureQueriesContext(connection) as context:
+            imminent_tasks = get_all_imminent_tasks()
+        self.assertEqual(len(context.captured_queries), 1)
+        self.assertEqual(len(imminent_tasks), 11)
+        for tasks in imminent_tasks.values():
+            self.assertEqual([{task.name for task in bucket} for bucket in tasks],
+                             [{'task_yesterday'}, {'task_today'}, {'task_tomorrow'}])
+        metrics = send_notifications()
+        self.assertEqual(len(mail.outbox), 11)
+        self.assertEqual(metrics['sent'], 11)
+        self.assertEqual(metrics['users'], 11)
+        self.assertTrue({'query_duration', 'render_duration', 'send_duration'} <= set(metrics))
+        self.assertEqual(sorted(email.to[0] for email in mail.outbox)[0], 'joe.d@ll.com')
+        self.assertEqual(mail.outbox[0].alternatives[0][1], 'text/html')
+
+    def test_US17_I2_send_notifications_dry_run(self):
+        """
+        Test if a dry run writes the notifications in files instead of sending them
+
+                Inputs:
+                    user (UserProfile): A UserProfile we create with tasks to do (yesterday, today, tomorrow)
+
+                Expected outputs:
+                    We expect no mail sent and the notification written in NOTIFICATIONS_DRY_RUN_PATH
+        """
+        self.set_up()
+        with tempfile.TemporaryDirectory() as path, override_settings(NOTIFICATIONS_DRY_RUN_PATH=path):
+            metrics = send_notifications(dry_run=True)
+            written = ''.join(open(os.path.join(path, name)).read() for name in os.listdir(path))
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(metrics['sent'], 1)
+        self.assertIn('To: joe.d@ll.com', written)
+        self.assertIn('task_yesterday', written)
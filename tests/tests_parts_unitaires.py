@@ -0,0 +1,178 @@
+import csv
+import json
+import os
+import tempfile
+from decimal import Decimal
+from io import StringIO
+
+from frontend.models import Part, Supplier
+from frontend.parts_import import COLUMNS, PartsImporter
+from frontend.search import find_parts
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+
+class PartsImportTests(TestCase):
+
+    def setUp(self):
+        """
+            Create the directory of the CSV files
+        """
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'parts.csv')
+        self.supplier = Supplier.objects.create(name='ACME')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write_csv(self, rows):
+        """
+            Write the rows in the CSV file, the missing columns being empty
+        """
+        with open(self.path, 'w', newline='') as csv_file:
+            writer = csv.DictWriter(csv_file, fieldnames=list(COLUMNS))
+            writer.writeheader()
+            for row in rows:
+                writer.writerow(
+                    dict(
+                        {
+                            'descrip': 'part',
+                            'cost': '1.50',
+                            'onhand': '2',
+                            'onorder': '0',
+                            'stock': 'T',
+                            'active': 'T',
+                            'class': 'A',
+                            'unitms': 'EA',
+                        }, **row
+                    )
+                )
+
+    def test_parts_U1_import_creates_updates_and_rejects_by_chunks(self):
+        """
+            Test if the parts are created or updated by part number, the bad rows being rejected.
+
+            Inputs:
+                csv file: five rows written by chunks of two, a bad cost, an unknown supplier, then one row changed.
+
+            Expected Output:
+                We expect three parts created with their supplier and converted values, and two rows rejected.
+                We expect the changed row to update its part when imported again.
+        """
+        self.write_csv(
+            [
+                {'partno': 'P1', 'supplierid': str(self.supplier.pk), 'lastordr': '2024-01-31', 'lead': '3.5'},
+                {'partno': 'P2', 'cost': 'abc'},
+                {'partno': 'P3', 'supplierid': str(self.supplier.pk + 1)},
+                {'partno': 'P4', 'stock': 'F'},
+                {'partno': '', 'descrip': 'unnumbered'},
+            ]
+        )
+        progress = []
+        importer = PartsImporter(self.path, chunk_size=2, progress=lambda metrics, _: progress.append(dict(metrics)))
+        metrics = importer.run()
+        self.assertEqual((metrics['rows'], metrics['created'], metrics['updated'], metrics['rejected']), (5, 3, 0, 2))
+        self.assertEqual([step['rows'] for step in progress], [2, 4, 5])
+        part = Part.objects.get(part_number='P1')
+        self.assertEqual(part.supplier, self.supplier)
+        self.assertEqual(part.cost, Decimal('1.50'))
+        self.assertEqual(str(part.last_order), '2024-01-31')
+        self.assertFalse(Part.objects.get(part_number='P4').stock)
+        with open(importer.reject_path, newline='') as rejects:
+            rejected = list(csv.DictReader(rejects))
+        self.assertEqual([row['partno'] for row in rejected], ['P2', 'P3'])
+        self.assertIn('no such supplier', rejected[1]['error'])
+        self.assertFalse(os.path.exists(importer.checkpoint_path))
+        self.write_csv([{'partno': 'P1', 'descrip': 'changed'}])
+        metrics = PartsImporter(self.path).run()
+        self.assertEqual((metrics['created'], metrics['updated']), (0, 1))
+        self.assertEqual(Part.objects.get(part_number='P1').description, 'changed')
+        self.assertEqual(Part.objects.count(), 3)
+
+    def test_parts_U2_import_resumes_after_its_checkpoint(self):
+        """
+            Test if an interrupted import is resumed after the rows of its checkpoint.
+
+            Inputs:
+                csv file: three rows, with a checkpoint of the first two rows.
+
+            Expected Output:
+                We expect only the last row to be imported, the command reporting the progress and the end.
+        """
+        self.write_csv([{'partno': 'P1'}, {'partno': 'P2'}, {'partno': 'P3'}])
+        with open(self.path + '.checkpoint', 'w') as checkpoint:
+            json.dump({'rows': 2}, checkpoint)
+        output = StringIO()
+        call_command('import_parts', self.path, '--resume', stdout=output)
+        self.assertEqual(list(Part.objects.values_list('part_number', flat=True)), ['P3'])
+        self.assertIn('3 rows, 1 created, 0 updated, 0 rejected', output.getvalue())
+        self.assertIn('Finished importing parts', output.getvalue())
+        self.assertFalse(os.path.exists(self.path + '.checkpoint'))
+
+
+class PartsSearchTests(TestCase):
+
+    def setUp(self):
+        """
+            Create parts matching by part number or by description
+        """
+        for number, description in [
+            ('B-100', 'bearing housing'),
+            ('SKF-6204', 'ball bearing'),
+            ('V-20', 'bearings seal'),
+            ('SKF-6205', 'ball bearing'),
+            ('G-1', 'gasket'),
+        ]:
+            Part.objects.create(part_number=number, description=description, cost=1, on_hand=1, on_order=0)
+
+    def test_parts_U3_search_ranks_part_numbers_first_and_matches_prefixes(self):
+        """
+            Test if the parts matching by part number come before the ones matching by description.
+
+            Inputs:
+                query: 'skf', 'bear' and 'ball bear'.
+
+            Expected Output:
+                We expect the parts matched by a part number, then by description, the words as prefixes.
+        """
+        parts, next_cursor = find_parts('skf')
+        self.assertEqual([part.part_number for part in parts], ['SKF-6204', 'SKF-6205'])
+        self.assertIsNone(next_cursor)
+        parts, _ = find_parts('bear')
+        self.assertEqual(len(parts), 4)
+        parts, _ = find_parts('6205 bear')
+        self.assertEqual([part.part_number for part in parts], ['SKF-6205'])
+        parts, _ = find_parts('ball bear')
+        self.assertEqual([part.part_number for part in parts], ['SKF-6204', 'SKF-6205'])
+        parts, _ = find_parts('b')
+        self.assertEqual([part.part_number for part in parts], ['B-100'])
+        self.assertEqual(find_parts('  '), ([], None))
+
+    def test_parts_U4_search_pages_follow_their_cursor(self):
+        """
+            Test if the pages of the results are given after the cursor of the previous one.
+
+            Inputs:
+                query: 'bear', by pages of 3 parts, then a page with a wrong cursor.
+
+            Expected Output:
+                We expect the pages to hold all the matches once, best ranked first.
+                We expect the view to show the next link, and to refuse the wrong cursor.
+        """
+        first, next_cursor = find_parts('bear', page_size=3)
+        second, last_cursor = find_parts('bear', next_cursor, page_size=3)
+        self.assertEqual(len(first), 3)
+        self.assertIsNone(last_cursor)
+        self.assertEqual(first[0].part_number, 'B-100')
+        self.assertEqual(
+            sorted(part.pk for part in first + second),
+            sorted(Part.objects.filter(description__contains='bear').values_list('pk', flat=True)),
+        )
+        with self.settings(PARTS_SEARCH_PAGE_SIZE=3):
+            response = self.client.get(reverse('search_parts'), {'q': 'bear'})
+        self.assertEqual(response.context['next_cursor'], next_cursor)
+        self.assertContains(response, 'after=' + next_cursor)
+        response = self.client.get(reverse('search_parts'), {'q': 'bear', 'after': 'wrong'})
+        self.assertEqual(response.status_code, 400)
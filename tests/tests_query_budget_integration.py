@@ -0,0 +1,150 @@
+import pytest
+from init_db_tests import init_db
+from query_budget_tests import assert_max_queries
+
+from django.test import TestCase
+from maintenancemanagement.models import (
+    Equipment,
+    EquipmentType,
+    Field,
+    FieldGroup,
+    FieldObject,
+    File,
+    Task,
+)
+from rest_framework.test import APIClient
+from usersmanagement.models import Team, UserProfile
+
+
+class QueryBudgetTests(TestCase):
+
+    @pytest.fixture(scope="class", autouse=True)
+    def init_database(django_db_setup, django_db_blocker):
+        with django_db_blocker.unblock():
+            init_db()
+
+    def set_up_client(self):
+        """
+            Set up a client authenticated as a superuser
+        """
+        user = UserProfile.objects.create(username='budget', is_superuser=True)
+        client = APIClient()
+        client.force_authenticate(user=user)
+        return client
+
+    def create_equipment(self, name, number_of_fields):
+        """
+            Create an equipment with fields and files
+        """
+        field_group = FieldGroup.objects.create(name=f'{name} field group', is_equipment=True)
+        equipment_type = EquipmentType.objects.create(name=f'{name} type')
+        equipment_type.fields_groups.add(field_group)
+        equipment = Equipment.objects.create(name=name, equipment_type=equipment_type)
+        for i in range(number_of_fields):
+            field = Field.objects.create(name=f'{name} field {i}', field_group=field_group)
+            FieldObject.objects.create(described_object=equipment, field=field, value=str(i))
+            equipment.files.add(File.objects.create(file=f'{name} {i}.png', is_manual=False))
+        return equipment
+
+    def create_task(self, name, number_of_conditions):
+        """
+            Create a task with trigger conditions, end conditions, teams and files
+        """
+        equipment = self.create_equipment(f'{name} equipment', number_of_conditions)
+        task = Task.objects.create(name=name, equipment=equipment)
+        watched_field_objects = FieldObject.objects.filter(object_id=equipment.id)
+        for i, watched_field_object in enumerate(watched_field_objects):
+            FieldObject.objects.create(
+                described_object=task,
+                field=Field.objects.get(name="Above Threshold"),
+                value=f"{i}|{watched_field_object.id}|7d"
+            )
+            FieldObject.objects.create(
+                described_object=task, field=Field.objects.get(name="Checkbox"), description=f'end {i}'
+            )
+            team = Team.objects.create(name=f'{name} team {i}')
+            team.user_set.add(UserProfile.objects.create(username=f'{name} user {i}'))
+            task.teams.add(team)
+            task.files.add(File.objects.create(file=f'{name} file {i}.png', is_manual=False))
+        return task
+
+    def test_US5_I3_taskdetails_query_budget(self):
+        """
+        Test if the details of a task are sent in a number of queries which does not depend on its conditions.
+
+                Inputs:
+                    task (Task): 1 then 5 trigger conditions, end conditions, teams, files and equipment fields.
+
+                Expected Outputs:
+                    We expect the same number of queries, at most 7, for both tasks.
+        """
+        client = self.set_up_client()
+        query_counts = []
+        for number_of_conditions in [1, 5]:
+            task = self.create_task(f'task {number_of_conditions}', number_of_conditions)
+            with assert_max_queries(self, 7) as context:
+                response = client.get(f'/api/maintenancemanagement/tasks/{task.id}/', format='json')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.json()['trigger_conditions']), number_of_conditions)
+            self.assertEqual(len(response.json()['end_conditions']), number_of_conditions)
+            query_counts.append(len(context.captured_queries))
+        self.assertEqual(query_counts[0], query_counts[1])
+
+    def test_US5_I3_taskdetails_participant_query_budget(self):
+        """
+        Test if the details of a task are sent to a member of its teams without any query to check it.
+
+                Inputs:
+                    user (UserProfile): a user without permissions, member of a team of the task.
+
+                Expected Outputs:
+                    We expect at most 9 queries, the 7 of a user with all permissions and the 2 loading the user's
+                    teams and permissions.
+        """
+        task = self.create_task('participant task', 1)
+        user = UserProfile.objects.create(username='participant')
+        task.teams.first().user_set.add(user)
+        client = APIClient()
+        # The user is loaded again for each request, as by the authentication.
+        client.force_authenticate(user=UserProfile.objects.get(pk=user.pk))
+        with assert_max_queries(self, 9):
+            response = client.get(f'/api/maintenancemanagement/tasks/{task.id}/', format='json')
+        self.assertEqual(response.status_code, 200)
+
+    def test_US5_I1_tasklist_query_budget(self):
+        """
+        Test if the task list is sent within its query budget.
+
+                Inputs:
+                    tasks (Task): 5 tasks with conditions, teams and files.
+
+                Expected Outputs:
+                    We expect at most 4 queries.
+        """
+        client = self.set_up_client()
+        for i in range(5):
+            self.create_task(f'listed task {i}', 2)
+        with assert_max_queries(self, 4):
+            response = client.get('/api/maintenancemanagement/tasks/', format='json')
+        self.assertEqual(response.status_code, 200)
+
+    def test_US4_I1_equipmentlist_query_budget(self):
+        """
+        Test if the equipment list is sent in a number of queries which does not depend on the number of equipments.
+
+                Inputs:
+                    equipments (Equipment): 1 then 5 more equipments with fields and files.
+
+                Expected Outputs:
+                    We expect the same number of queries, at most 3, for both lists.
+        """
+        client = self.set_up_client()
+        query_counts = []
+        for number_of_equipments in [1, 5]:
+            for i in range(number_of_equipments):
+                self.create_equipment(f'equipment {number_of_equipments} {i}', 2)
+            with assert_max_queries(self, 3) as context:
+                response = client.get('/api/maintenancemanagement/equipments/', format='json')
+            self.assertEqual(response.status_code, 200)
+            query_counts.append(len(context.captured_queries))
+        self.assertEqual(query_counts[0], query_counts[1])
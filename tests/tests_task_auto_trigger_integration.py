@@ -3,8 +3,15 @@ from datetime import date, timedelta
 import pytest
 from init_db_tests import init_db
 
+from django.db import connection
 from django.test import TestCase
-from maintenancemanagement.models import Field, FieldObject, Task
+from django.test.utils import CaptureQueriesContext
+from maintenancemanagement.models import (
+    Field,
+    FieldObject,
+    Task,
+    TriggerCondition,
+)
 from utils.trigger_tasks import (
     at_least_one_conditon_is_verified,
     check_tasks,
@@ -282,3 +289,73 @@ class TaskAutoTriggerTests(TestCase):
         self.assertEqual(Task.objects.get(name="Task 1").end_date, date.today() + timedelta(days=3))
         self.assertEqual(Task.objects.get(name="Task 2").end_date, date.today() + timedelta(days=5))
         self.assertEqual(Task.objects.get(name="Task 3").end_date, date.today() + timedelta(days=7))
+
+    def test_US22_I2_check_tasks_constant_number_of_queries(self):
+        """
+            Test if check_tasks does the same number of queries whatever the number of tasks.
+
+            Inputs:
+                tasks (List<Task>): tasks with recurrence, threshold and frequency trigger conditions.
+
+            Expected Output:
+                We expect check_tasks to do as many queries for 2 tasks as for 20 tasks.
+                We expect all the tasks with a verified trigger condition to be triggered.
+        """
+        related_field_object = FieldObject.objects.get(field=Field.objects.get(name="Nb bouteilles"))
+        recurrence = Field.objects.get(name="Recurrence")
+        above_threshold = Field.objects.get(name="Above Threshold")
+        frequency = Field.objects.get(name="Frequency")
+
+        def create_tasks(number):
+            for i in range(number):
+                task = Task.objects.create(
+                    name=f'Task {i}', end_date=(date.today() + timedelta(days=5)), is_triggered=False
+                )
+                FieldObject.objects.create(described_object=task, field=recurrence, value="30d|5d")
+                FieldObject.objects.create(
+                    described_object=task, field=above_threshold, value=f"40000|{related_field_object.id}|7d"
+                )
+                FieldObject.objects.create(
+                    described_object=task, field=frequency, value=f"10000|{related_field_object.id}|7d|50000"
+                )
+
+        create_tasks(2)
+        with CaptureQueriesContext(connection) as few_tasks_queries:
+            check_tasks()
+        self.assertFalse(Task.objects.filter(is_triggered=False).exists())
+        create_tasks(20)
+        with CaptureQueriesContext(connection) as many_tasks_queries:
+            check_tasks()
+        self.assertFalse(Task.objects.filter(is_triggered=False).exists())
+        self.assertEqual(len(few_tasks_queries), len(many_tasks_queries))
+
+    def test_US22_I3_trigger_condition_parameters_are_stored(self):
+        """
+            Test if the parameters of a trigger condition are stored in real columns.
+
+            Inputs:
+                task (Task): a task with a recurrence and a frequency trigger condition.
+
+            Expected Output:
+                We expect to find the typed parameters of both trigger conditions.
+                We expect to find the frequency trigger condition from the field object it watches.
+        """
+        related_field_object = FieldObject.objects.get(field=Field.objects.get(name="Nb bouteilles"))
+        task = Task.objects.create(name='Task', end_date=(date.today() + timedelta(days=5)), is_triggered=False)
+        recurrence = FieldObject.objects.create(
+            described_object=task, field=Field.objects.get(name="Recurrence"), value="30d|5d"
+        )
+        frequency = FieldObject.objects.create(
+            described_object=task,
+            field=Field.objects.get(name="Frequency"),
+            value=f"10000|{related_field_object.id}|7d|60000"
+        )
+        recurrence_condition = TriggerCondition.objects.get(field_object=recurrence)
+        self.assertEqual(recurrence_condition.recurrence, timedelta(days=30))
+        self.assertEqual(recurrence_condition.delay, timedelta(days=5))
+        self.assertIsNone(recurrence_condition.source)
+        frequency_condition = TriggerCondition.objects.get(field_object=frequency)
+        self.assertEqual(frequency_condition.threshold, 10000)
+        self.assertEqual(frequency_condition.delay, timedelta(days=7))
+        self.assertEqual(frequency_condition.next_trigger, 60000)
+        self.assertEqual(list(related_field_object.dependent_trigger_condition_set.all()), [frequency_condition])
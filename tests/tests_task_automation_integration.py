@@ -618,3 +618,80 @@ class TaskTests(TestCase):
         for team0, team1 in zip(teams0, teams1):
             self.assertEqual(team0, team1)
         self.assertEqual(tasks.filter(over='False')[0].end_date, date.today() + parse_time('50d'))
+
+    def test_US22_I1_with_frequency_on_deleted_field_object(self):
+        """
+             Test if a new task is created when the field object watched by its frequency was deleted.
+
+             Inputs:
+                user (UserProfile): a UserProfile with all permissions on tasks.
+                post data (JSON): a mock-up of a task with trigger conditions.
+                put data (JSON): finish the task.
+
+            Expected Output:
+                We expect that a new task is created with the recurrence only.
+        """
+        user = self.set_up_perm()
+        client = APIClient()
+        client.force_authenticate(user=user)
+        trigger_conditions = Field.objects.filter(field_group=FieldGroup.objects.get(name="Trigger Conditions"))
+        field_object = FieldObject.objects.get(field=Field.objects.get(name="Nb bouteilles"))
+        end_conditions = Field.objects.filter(field_group=FieldGroup.objects.get(name="End Conditions"))
+        client.post(
+            '/api/maintenancemanagement/tasks/', {
+                'name':
+                    'verifier pneus',
+                'description':
+                    'desc_task_test_create_task_with_perm_with_trigger_conditions',
+                'trigger_conditions':
+                    [
+                        {
+                            "field": trigger_conditions.get(name="Recurrence").id,
+                            "value": "50d",
+                            "delay": "7d",
+                            "description": "test_create_task_with_perm_with_trigger_conditions_frequency",
+                        }, {
+                            'field': trigger_conditions.get(name='Frequency').id,
+                            'value': '10000',
+                            'field_object_id': field_object.id,
+                            'delay': '2d',
+                            'description': 'test_add_task_with_perm_with_trigger_conditions_frequency'
+                        }
+                    ],
+                'end_conditions':
+                    [
+                        {
+                            "field": end_conditions.get(name="Checkbox").id,
+                            "value": "",
+                            "description": "test_add_task_with_perm_with_end_conditions_1"
+                        }
+                    ]
+            },
+            format='json'
+        )
+        task = Task.objects.get(name='verifier pneus')
+        field_object.delete()
+        with self.assertLogs('maintenancemanagement.views.views_task', level='WARNING'):
+            response = client.put(
+                f'/api/maintenancemanagement/tasks/{task.id}/', {
+                    'end_conditions':
+                        [
+                            {
+                                "id": FieldObject.objects.get(field=end_conditions.get(name="Checkbox")).id,
+                                "value": "True",
+                                "description": "test_add_task_with_perm_with_end_conditions_1"
+                            }
+                        ]
+                },
+                format='json'
+            )
+        self.assertEqual(response.status_code, 200)
+        tasks = Task.objects.filter(name='verifier pneus')
+        self.assertEqual(tasks.count(), 2)
+        new_task = tasks.get(over='False')
+        content_type_object = ContentType.objects.get_for_model(new_task)
+        conditions = FieldObject.objects.filter(
+            object_id=new_task.id, content_type=content_type_object, field__field_group__name='Trigger Conditions'
+        )
+        self.assertEqual([condition.field.name for condition in conditions], ['Recurrence'])
+        self.assertEqual(new_task.end_date, date.today() + parse_time('50d'))
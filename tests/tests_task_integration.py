@@ -1,3 +1,4 @@
+from datetime import date
 from io import BytesIO
 
 import pytest
@@ -5,7 +6,11 @@ from init_db_tests import init_db
 from PIL import Image
 
 from django.contrib.auth.models import Permission
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import F
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from maintenancemanagement.models import (
     Field,
     FieldGroup,
@@ -122,6 +127,113 @@ class TaskTests(TestCase):
         response = client.get('/api/maintenancemanagement/tasks/', {"template": "true"}, format='json')
         self.assertEqual(response.data, serializer.data)
 
+    def test_US5_I1_tasklist_get_constant_number_of_queries(self):
+        """
+        Test if the task list is sent in a number of queries which does not depend on the number of tasks.
+
+                Inputs:
+                    user (UserProfile): a UserProfile we setup with all permissions on tasks.
+                    tasks (Task): 2 then 12 tasks, each one with 2 teams of 2 users and 2 files.
+
+                Expected Outputs:
+                    We expect the same number of queries for 2 and 12 tasks.
+                    We expect 4 queries : the tasks, their teams, the users of the teams and their files.
+        """
+        user = self.set_up_perm()
+        client = APIClient()
+        client.force_authenticate(user=user)
+        client.get('/api/maintenancemanagement/tasks/', format='json')
+        query_counts = []
+        for number_of_tasks in [2, 10]:
+            for i in range(number_of_tasks):
+                task = Task.objects.create(name=f'task {len(query_counts)} {i}')
+                for j in range(2):
+                    team = Team.objects.create(name=f'team {len(query_counts)} {i} {j}')
+                    team.user_set.add(*[UserProfile.objects.create(username=f'{team.name} {k}') for k in range(2)])
+                    task.teams.add(team)
+                    task.files.add(File.objects.create(file=f'{team.name}.png', is_manual=False))
+            with CaptureQueriesContext(connection) as context:
+                response = client.get('/api/maintenancemanagement/tasks/', format='json')
+            self.assertEqual(response.status_code, 200)
+            query_counts.append(len(context.captured_queries))
+        self.assertEqual(query_counts, [4, 4])
+
+    def test_US5_I1_tasklist_get_paginated_with_perm(self):
+        """
+        Test if a user with perm can go through the task list page by page.
+
+                Inputs:
+                    user (UserProfile): a UserProfile we setup with all permissions on tasks.
+                    tasks (Task): 5 tasks, over or not, with or without an end date.
+
+                Expected Outputs:
+                    We expect pages of 2 tasks, following each other with the next url.
+                    We expect all the tasks ordered by over, end_date and id, the null values last.
+        """
+        user = self.set_up_perm()
+        for over, end_date in [(False, date(2021, 1, 2)), (True, None), (False, None), (None, date(2021, 1, 1)),
+                               (False, date(2021, 1, 2))]:
+            Task.objects.create(name='paginated task', over=over, end_date=end_date)
+        client = APIClient()
+        client.force_authenticate(user=user)
+        ids = []
+        url = '/api/maintenancemanagement/tasks/?page_size=2'
+        while url:
+            response = client.get(url, format='json')
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.data['results']), 2)
+            ids += [task['id'] for task in response.data['results']]
+            url = response.data['next']
+        expected_tasks = Task.objects.filter(is_template=False).order_by(
+            F('over').asc(nulls_last=True), F('end_date').asc(nulls_last=True), 'id'
+        )
+        self.assertEqual(ids, [task.id for task in expected_tasks])
+
+    def test_US5_I1_tasklist_get_filtered_with_perm(self):
+        """
+        Test if a user with perm can filter the task list and select the fields of the tasks.
+
+                Inputs:
+                    user (UserProfile): a UserProfile we setup with all permissions on tasks.
+                    tasks (Task): 3 tasks of a team, one of them being over, and a task of no team.
+
+                Expected Outputs:
+                    We expect only the tasks of the team which are not over, with their id and name only.
+                    We expect only the tasks of the team ending in the given range.
+                    We expect a 400 status code for a filter or a cursor which is not valid.
+        """
+        user = self.set_up_perm()
+        team = Team.objects.create(name='filtered team')
+        for over, end_date in [(False, date(2021, 1, 1)), (False, date(2021, 2, 1)), (True, date(2021, 1, 1))]:
+            Task.objects.create(name='filtered task', over=over, end_date=end_date).teams.add(team)
+        Task.objects.create(name='other task', end_date=date(2021, 1, 1))
+        client = APIClient()
+        client.force_authenticate(user=user)
+        response = client.get(
+            '/api/maintenancemanagement/tasks/', {
+                'team': team.id,
+                'over': 'false',
+                'fields': 'id,name'
+            },
+            format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 2)
+        self.assertEqual([set(task) for task in response.data], [{'id', 'name'}] * 2)
+        response = client.get(
+            '/api/maintenancemanagement/tasks/', {
+                'team': team.id,
+                'end_date_after': '2021-01-15',
+                'end_date_before': '2021-03-01'
+            },
+            format='json'
+        )
+        self.assertEqual([task['end_date'] for task in response.data], ['2021-02-01'])
+        response = client.get('/api/maintenancemanagement/tasks/', {'team': 'blue'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        response = client.get('/api/maintenancemanagement/tasks/', {'cursor': 'not a cursor'}, format='json')
+        self.assertEqual(response.status_code, 400)
+
     def test_US5_I1_tasklist_get_without_perm(self):
         """
         Test if a user without perm doesn't receive the data.
@@ -251,6 +363,41 @@ class TaskTests(TestCase):
         response = client.get(f'/api/maintenancemanagement/tasks/{pk}/')
         self.assertEqual(response.status_code, 401)
 
+    def test_US5_I3_taskdetail_get_with_trigger_conditions_as_entered(self):
+        """
+        Test if the trigger conditions of a task detail are sent as they were entered.
+
+                Inputs:
+                    user (UserProfile): a UserProfile we setup with all permissions on tasks.
+                    task (Task): a task with a trigger condition without delay and one not well formed.
+
+                Expected Outputs:
+                    We expect the value and the delay of the trigger conditions to be the stored strings.
+                    We expect the condition not well formed to be listed, without field object.
+        """
+        user = self.set_up_perm()
+        client = APIClient()
+        client.force_authenticate(user=user)
+        field_object = FieldObject.objects.get(field=Field.objects.get(name="Nb bouteilles"))
+        task = Task.objects.create(name='verifier pneus')
+        FieldObject.objects.create(
+            described_object=task, field=Field.objects.get(name="Above Threshold"), value=f'0.6|{field_object.id}|0d'
+        )
+        FieldObject.objects.create(
+            described_object=task, field=Field.objects.get(name="Under Threshold"), value='BAD|VALUE|2d'
+        )
+        with self.assertLogs('maintenancemanagement.serializers', level='ERROR'):
+            response = client.get(f'/api/maintenancemanagement/tasks/{task.id}/')
+        self.assertEqual(response.status_code, 200)
+        trigger_conditions = response.json()['trigger_conditions']
+        self.assertEqual(len(trigger_conditions), 2)
+        self.assertEqual(trigger_conditions[0]['value'], '0.6')
+        self.assertEqual(trigger_conditions[0]['delay'], '0d')
+        self.assertEqual(trigger_conditions[0]['field_object']['id'], field_object.id)
+        self.assertEqual(trigger_conditions[1]['value'], 'BAD')
+        self.assertEqual(trigger_conditions[1]['delay'], '2d')
+        self.assertIsNone(trigger_conditions[1]['field_object'])
+
     def test_US5_I4_taskdetail_put_with_perm(self):
         """
         Test if a user with perm can change a task.
@@ -1261,6 +1408,37 @@ class TaskTests(TestCase):
         response = client.get('/api/maintenancemanagement/tasks/requirements')
         self.assertEqual(response.status_code, 401)
 
+    def test_US19_I1_taskrequirements_not_modified(self):
+        """
+        Test if a user gets the template requirements again only when they changed.
+
+                Inputs:
+                    user (UserProfile): a user with all permissions on tasks.
+                    field_object (FieldObject): an end condition added to a template.
+
+                Expected Outputs:
+                    We expect a 304 status code when the ETag of the requirements is sent back.
+                    We expect a 200 status code, another ETag and the new end condition once the template changed.
+        """
+        user = self.set_up_perm()
+        client = APIClient()
+        client.force_authenticate(user=user)
+        # The rollback of the test does not remove the requirements it cached.
+        self.addCleanup(cache.clear)
+        response = client.get('/api/maintenancemanagement/tasks/requirements')
+        etag = response['ETag']
+        response = client.get('/api/maintenancemanagement/tasks/requirements', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        template = Task.objects.get(name='TemplateTest')
+        FieldObject.objects.create(described_object=template, field=Field.objects.get(name="Checkbox"))
+        response = client.get('/api/maintenancemanagement/tasks/requirements', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        template_json = next(
+            template_json for template_json in response.json()['task_templates'] if template_json['id'] == template.id
+        )
+        self.assertEqual([end_condition['name'] for end_condition in template_json['end_conditions']], ['Checkbox'])
+
     def test_US11_I2_tasklist_post_with_no_end_condition(self):
         """
         Test that a checkbox is created if no end_conditions are given
@@ -1,8 +1,12 @@
-from usersmanagement.models import UserProfile
+from usersmanagement.models import Team, TeamType, UserProfile
+from usersmanagement.permissions import get_team_ids
 from usersmanagement.serializers import UserProfileSerializer
 from usersmanagement.views.views_user import init_database, is_first_user
 
+from django.contrib.auth.models import Permission
+from django.db import connection
 from django.test import Client, RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
 
 
 class UserTests(TestCase):
@@ -270,3 +274,72 @@ class UserTests(TestCase):
         user = self.set_up(False)
         user.reactivate_user()
         self.assertEqual(user.is_active, True)
+
+    def test_US2_U5_permissions_resolved_once(self):
+        """
+            Test if the teams and the permissions of a user are loaded once per request
+
+            Inputs:
+                user (UserProfile) : a user of a team, loaded again as for each request
+
+            Expected Output:
+                We expect the permissions to be checked without any query once loaded
+                We expect a permission revoked to be refused to the user loaded again
+        """
+        user = self.set_up(True)
+        team = Team.objects.create(name='resolved team')
+        team.user_set.add(user)
+        team.permissions.add(Permission.objects.get(codename='view_task'))
+        user = UserProfile.objects.get(pk=user.pk)
+        self.assertTrue(user.has_perm('maintenancemanagement.view_task'))
+        with CaptureQueriesContext(connection) as context:
+            self.assertTrue(user.has_perm('maintenancemanagement.view_task'))
+            self.assertFalse(user.has_perm('maintenancemanagement.add_task'))
+            self.assertEqual(get_team_ids(user), {team.id})
+        self.assertEqual(len(context.captured_queries), 0)
+        team.permissions.through.objects.filter(group_id=team.pk).delete()
+        self.assertFalse(UserProfile.objects.get(pk=user.pk).has_perm('maintenancemanagement.view_task'))
+
+    def test_US2_U5_permissions_invalidated(self):
+        """
+            Test if the permissions of a user loaded again follow their changes
+
+            Inputs:
+                user (UserProfile) : a user added to a team, then given a permission through its team type
+
+            Expected Output:
+                We expect the new team and the new permission once loaded again
+        """
+        user = self.set_up(True)
+        self.assertEqual(get_team_ids(UserProfile.objects.get(pk=user.pk)), set())
+        team_type = TeamType.objects.create(name='resolved team type')
+        team = Team.objects.create(name='resolved team', team_type=team_type)
+        team.user_set.add(user)
+        self.assertEqual(get_team_ids(UserProfile.objects.get(pk=user.pk)), {team.id})
+        self.assertFalse(UserProfile.objects.get(pk=user.pk).has_perm('maintenancemanagement.view_task'))
+        team_type.perms.add(Permission.objects.get(codename='view_task'))
+        team_type._apply_()
+        self.assertTrue(UserProfile.objects.get(pk=user.pk).has_perm('maintenancemanagement.view_task'))
+
+    def test_US2_U6_permissions_not_inherited_by_a_new_user_of_the_same_id(self):
+        """
+            Test if a user created with the id of a deleted user doesn't get its teams and permissions
+
+            Inputs:
+                user (UserProfile) : a user of a team with a permission, loaded then deleted
+                new_user (UserProfile) : a user created with the id of the deleted user
+
+            Expected Output:
+                We expect the new user to have no team and no permission
+        """
+        user = self.set_up(True)
+        team = Team.objects.create(name='resolved team')
+        team.user_set.add(user)
+        team.permissions.add(Permission.objects.get(codename='view_task'))
+        self.assertTrue(UserProfile.objects.get(pk=user.pk).has_perm('maintenancemanagement.view_task'))
+        user_id = user.pk
+        UserProfile.objects.filter(pk=user_id).delete()
+        UserProfile.objects.create(pk=user_id, username='jerry')
+        new_user = UserProfile.objects.get(pk=user_id)
+        self.assertEqual(get_team_ids(new_user), set())
+        self.assertFalse(new_user.has_perm('maintenancemanagement.view_task'))
@@ -1,6 +1,6 @@
 """This file contain the model for the usermanagement app."""
 from django.contrib.auth.models import AbstractUser, Group, Permission
-from django.db import models
+from django.db import models, transaction
 
 
 class UserProfile(AbstractUser):
@@ -61,10 +61,28 @@ class TeamType(models.Model):
         )
 
     def _apply_(self):
-        teams_with_this_teamtype = self.team_set.all()
-        for team in teams_with_this_teamtype:
-            # team.permissions.set()
-            team.permissions.set(list(self.perms.all()))
+        """Give the teams of this team type the permissions of the type.
+
+        The permissions to add and to remove are computed once for all the
+        teams, then removed with a single delete and added with a single
+        insert on the permissions table of the groups, in one transaction.
+        """
+        group_permissions = Group.permissions.through.objects
+        perm_ids = set(self.perms.values_list('id', flat=True))
+        team_ids = set(self.team_set.values_list('pk', flat=True))
+        with transaction.atomic():
+            current = set(
+                group_permissions.filter(group_id__in=team_ids).values_list('group_id', 'permission_id')
+            )
+            group_permissions.filter(group_id__in=team_ids).exclude(permission_id__in=perm_ids).delete()
+            group_permissions.bulk_create(
+                [
+                    Group.permissions.through(group_id=team_id, permission_id=perm_id)
+                    for team_id in team_ids
+                    for perm_id in perm_ids
+                    if (team_id, perm_id) not in current
+                ]
+            )
 
 
 class Team(Group):
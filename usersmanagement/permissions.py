@@ -0,0 +1,46 @@
+"""This file resolves the permissions and the teams of the users.
+
+The team ids and the permissions of a user are loaded once and kept on the
+user, for the rest of the request. They are not kept across the requests:
+the user is loaded again by each request, which so sees a revoked
+permission at once, in every process.
+"""
+
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.models import Permission
+from django.db.models import Q
+
+
+def resolve_permissions(user):
+    """Return the team ids and the permissions of the user.
+
+    The permissions are given as 'app_label.codename' strings, like
+    get_all_permissions, whether the user is active or not.
+    """
+    if not hasattr(user, '_resolved_permissions'):
+        permissions = Permission.objects.filter(Q(user=user) | Q(group__user=user)).order_by()
+        user._resolved_permissions = {
+            'team_ids': frozenset(user.groups.values_list('id', flat=True)),
+            'permissions': frozenset(
+                '{}.{}'.format(app_label, codename)
+                for app_label, codename in permissions.values_list('content_type__app_label', 'codename')
+            ),
+        }
+    return user._resolved_permissions
+
+
+def get_team_ids(user):
+    """Return the ids of the teams of the user."""
+    return resolve_permissions(user)['team_ids']
+
+
+class CachedModelBackend(ModelBackend):
+    """Define the ModelBackend reading the permissions of the resolver."""
+
+    def get_all_permissions(self, user_obj, obj=None):
+        """Return the permissions of the user, resolved once per request."""
+        if not user_obj.is_active or user_obj.is_anonymous or obj is not None:
+            return set()
+        if user_obj.is_superuser:
+            return super().get_all_permissions(user_obj, obj)
+        return set(resolve_permissions(user_obj)['permissions'])
@@ -8,7 +8,9 @@ from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from usersmanagement.models import Team, UserProfile
+from usersmanagement.permissions import get_team_ids
 from usersmanagement.serializers import TeamDetailsSerializer, TeamSerializer
+from utils.pagination import list_response
 
 logger = logging.getLogger(__name__)
 
@@ -22,7 +24,9 @@ class TeamList(APIView):
     """Contains HTTP methods GET, POST used on /usermanagement/teams/."""
 
     @swagger_auto_schema(
-        operation_description='Send the list of Team.',
+        operation_description='Send the list of Team. \
+            It can be filtered with team_type, paginated with cursor and page_size, \
+            and restricted to some fields with fields.',
         responses={
             200: 'The request went well.',
             401: 'The client was not authorized to see the ressource.'
@@ -40,9 +44,8 @@ class TeamList(APIView):
         GET request : list all teams and return the data.
         """
         if request.user.has_perm(VIEW_TEAM):
-            teams = Team.objects.all()
-            serializer = TeamSerializer(teams, many=True)
-            return Response(serializer.data)
+            teams = Team.objects.all().prefetch_related('user_set')
+            return list_response(request, teams, TeamSerializer, ['id'], {'team_type': 'team_type'})
         return Response(status=status.HTTP_401_UNAUTHORIZED)
 
     @swagger_auto_schema(
@@ -292,4 +295,4 @@ def belongs_to_team(user, team):
     Return :
     boolean : True if the user belongs to team, else False
     """
-    return user.groups.filter(id=team.id).exists()
+    return team.id in get_team_ids(user)
@@ -19,6 +19,7 @@ from usersmanagement.serializers import (
     UserProfileSerializer,
 )
 from utils.init_db import initialize_db
+from utils.pagination import list_response
 
 logger = logging.getLogger(__name__)
 
@@ -55,7 +56,9 @@ class UserList(APIView):
     """
 
     @swagger_auto_schema(
-        operation_description="Send the list of user in database.",
+        operation_description="Send the list of user in database. \
+            It can be filtered with team and is_active, paginated with cursor and page_size, \
+            and restricted to some fields with fields.",
         responses={
             200: "Send back the list.",
             401: "The client was not authorized to see the ressource."
@@ -65,8 +68,12 @@ class UserList(APIView):
         """docstrings."""
         if request.user.has_perm(VIEW_USERPROFILE):
             users = UserProfile.objects.all()
-            serializer = UserProfileSerializer(users, many=True)
-            return Response(serializer.data)
+            return list_response(
+                request, users, UserProfileSerializer, ['id'], {
+                    'team': 'groups',
+                    'is_active': 'is_active'
+                }
+            )
         else:
             return Response(status=status.HTTP_401_UNAUTHORIZED)
 
@@ -360,11 +367,8 @@ class GetUserPermissions(APIView):
             return Response(status=status.HTTP_404_NOT_FOUND)
 
         if request.user.has_perm(ADD_USERPROFILE) or request.user == user:
-            permissions = user.get_all_permissions()
-            codename = []
-            for perm in permissions:
-                codename.append(perm.split('.')[1])
-            return Response(codename)
+            # The permissions are resolved once for the request by the backend.
+            return Response([perm.split('.')[1] for perm in user.get_all_permissions()])
         else:
             return Response(status=status.HTTP_401_UNAUTHORIZED)
 
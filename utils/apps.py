@@ -3,18 +3,10 @@ from django.apps import AppConfig
 
 
 class UtilsConfig(AppConfig):
-    """The app class."""
+    """The app class.
+
+    Its background jobs are run by the run_scheduler command.
+    """
 
     name = 'utils'
 
-    def ready(self):
-        """Launch our APSchedulers for our background tasks."""
-        try:
-            from utils import notifications
-            notifications.start()
-            from utils import data_provider
-            data_provider.start()
-            from utils import trigger_tasks
-            trigger_tasks.start()
-        except Exception:
-            pass
@@ -1,19 +1,37 @@
 """This is our script that execute all the get_data methods."""
-import importlib
+import asyncio
 import logging
 import re
+import threading
+import time
+import zlib
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 
+from apscheduler.executors.asyncio import AsyncIOExecutor
+from apscheduler.executors.base import BaseExecutor
+from apscheduler.jobstores.memory import MemoryJobStore
 from apscheduler.schedulers.background import BackgroundScheduler
 
-from django.core.exceptions import ObjectDoesNotExist
+from django.conf import settings
+from django.utils import timezone
 from maintenancemanagement.models import FieldObject
-from utils.models import DataProvider
-
-scheduler = BackgroundScheduler()
-scheduler.start()
+from utils.jobstores import DjangoJobStore
+from utils.models import DataProvider, Reading
+from utils.plugins import InvalidPluginError, registry
+from utils.trigger_tasks import check_tasks_watching
 
 logger = logging.getLogger(__name__)
 
+IMPORT_ERROR_LOGGER = "The dataProvider {file_name} could not be imported."
+GET_DATA_ERROR_LOGGER = "The execution of get_data of {file_name} run into an error.\n{error}"
+# The polls of a data provider are aligned on this date, whenever it was added.
+POLLING_EPOCH = datetime(2020, 1, 1, tzinfo=timezone.utc)
+JOB_ID_PREFIX = 'dataprovider-'
+MEMORY_JOBSTORE = 'default'
+DATABASE_JOBSTORE = 'database'
+
 
 class GetDataException(Exception):
     """Exception corresponding to get_data method."""
@@ -27,71 +45,587 @@ class DataProviderException(Exception):
     pass
 
 
+class PollingPool:
+    """
+    Define a pool polling data providers from an asyncio event loop.
+
+    At most `concurrency` data providers are polled at the same time and
+    each poll is cancelled after `timeout` seconds. A data provider module
+    defining a `get_data_async` coroutine is awaited directly, without
+    blocking any thread, otherwise its `get_data` function runs in a thread
+    pool of `concurrency` threads.
+
+    A thread can't be cancelled: a `get_data` function still running after
+    the timeout keeps its thread until it returns, and the next polls wait
+    for a free thread. A module without `get_data_async` must so set a
+    timeout on its own sockets, as `modbus_example` does, or a few hung
+    devices take all the threads.
+    """
+
+    def __init__(self, concurrency, timeout):
+        """Create a pool polling at most `concurrency` data providers."""
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self._semaphore = None
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='data-provider')
+
+    async def get_data(self, module, ip_address, port):
+        """Return the value got by the given data provider module."""
+        return await self._poll(module, 'get_data', ip_address, port)
+
+    async def get_data_many(self, module, ip_address, port, addresses):
+        """Return the values of the addresses got by a data provider module."""
+        return await self._poll(module, 'get_data_many', ip_address, port, addresses)
+
+    async def _poll(self, module, function_name, ip_address, port, *args):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        async with self._semaphore:
+            if hasattr(module, function_name + '_async'):
+                data = getattr(module, function_name + '_async')(ip_address, port, *args)
+            else:
+                data = asyncio.get_event_loop().run_in_executor(
+                    self._executor, getattr(module, function_name), ip_address, port, *args
+                )
+            try:
+                return await asyncio.wait_for(data, self.timeout)
+            except asyncio.TimeoutError:
+                raise GetDataException(
+                    "{ip_address}:{port} did not answer within {timeout} seconds".format(
+                        ip_address=ip_address, port=port, timeout=self.timeout
+                    )
+                )
+
+
+class ReadPlanner:
+    """
+    Define a planner coalescing the reads of the data providers of a device.
+
+    The addresses read on a device during `window` seconds are merged into
+    blocks of nearby addresses, see `plan_reads`, and each block is read with
+    a single `get_data_many` call whose values are fanned out to the data
+    providers. A data provider module without `get_data_many` is polled one
+    value at a time with `get_data`.
+    """
+
+    def __init__(self, polling_pool, window, max_gap, max_quantity):
+        """Create a planner reading the blocks through the polling pool."""
+        self.polling_pool = polling_pool
+        self.window = window
+        self.max_gap = max_gap
+        self.max_quantity = max_quantity
+        self._batches = {}
+
+    async def get_data(self, module, ip_address, port, address):
+        """Return the value of the address got by the data provider module."""
+        if not hasattr(module, 'get_data_many'):
+            return await self.polling_pool.get_data(module, ip_address, port)
+        loop = asyncio.get_event_loop()
+        key = (id(module), ip_address, port)
+        if key not in self._batches:
+            self._batches[key] = {}
+            loop.call_later(self.window, self._flush, key, module)
+        batch = self._batches[key]
+        if address not in batch:
+            batch[address] = loop.create_future()
+        # The value is shared, a cancelled poll must not cancel it for others.
+        return await asyncio.shield(batch[address])
+
+    def _flush(self, key, module):
+        batch = self._batches.pop(key)
+        _, ip_address, port = key
+        for addresses in plan_reads(batch, self.max_gap, self.max_quantity):
+            asyncio.ensure_future(self._read(module, ip_address, port, addresses, batch))
+
+    async def _read(self, module, ip_address, port, addresses, batch):
+        # Every future of the block is resolved, or its polls wait forever.
+        try:
+            values = list(await self.polling_pool.get_data_many(module, ip_address, port, addresses))
+            if len(values) != len(addresses):
+                raise GetDataException(
+                    "{ip_address}:{port} returned {count} values for {expected} addresses".format(
+                        ip_address=ip_address, port=port, count=len(values), expected=len(addresses)
+                    )
+                )
+        except Exception as e:
+            for address in addresses:
+                if not batch[address].done():
+                    batch[address].set_exception(e)
+        else:
+            for address, value in zip(addresses, values):
+                batch[address].set_result(value)
+
+
+def plan_reads(addresses, max_gap, max_quantity):
+    """Group the given addresses into blocks read with a single request.
+
+    Two consecutive addresses of a block are at most `max_gap` unread
+    addresses apart and a block spans at most `max_quantity` addresses.
+    """
+    blocks = []
+    for address in sorted(set(addresses)):
+        if blocks and address - blocks[-1][-1] - 1 <= max_gap and address - blocks[-1][0] < max_quantity:
+            blocks[-1].append(address)
+        else:
+            blocks.append([address])
+    return blocks
+
+
+class ReadingWriter:
+    """
+    Define a buffer saving the values got by the data providers in bulk.
+
+    The values are collected from the event loop and saved from `executor`
+    every `interval` seconds, or as soon as `batch_size` values are
+    waiting. The metrics are logged at each flush, with a warning when
+    `warning_queue_depth` values or more were waiting.
+    """
+
+    def __init__(self, executor, interval, batch_size, warning_queue_depth=None):
+        """Create a buffer flushed by the given executor."""
+        self.executor = executor
+        self.interval = interval
+        self.batch_size = batch_size
+        self.warning_queue_depth = warning_queue_depth
+        self.flush_count = 0
+        self.last_flush_latency = 0
+        self.max_flush_latency = 0
+        self._readings = []
+        self._lock = threading.Lock()
+        self._timer = None
+
+    @property
+    def queue_depth(self):
+        """Return the number of values waiting to be saved."""
+        return len(self._readings)
+
+    def metrics(self):
+        """Return the metrics of the buffer, latencies are in seconds."""
+        return {
+            'queue_depth': self.queue_depth,
+            'flush_count': self.flush_count,
+            'last_flush_latency': self.last_flush_latency,
+            'max_flush_latency': self.max_flush_latency,
+        }
+
+    def add(self, dataprovider, value):
+        """Buffer the value got by a data provider, inside the event loop."""
+        with self._lock:
+            self._readings.append((dataprovider, value, timezone.now()))
+            queue_depth = len(self._readings)
+        loop = asyncio.get_event_loop()
+        if queue_depth >= self.batch_size:
+            self._schedule_flush(loop)
+        elif self._timer is None:
+            self._timer = loop.call_later(self.interval, self._schedule_flush, loop)
+
+    def _schedule_flush(self, loop):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        loop.run_in_executor(self.executor, self.flush)
+
+    def flush(self):
+        """Save the buffered values."""
+        with self._lock:
+            readings, self._readings = self._readings, []
+        if not readings:
+            return
+        start = time.perf_counter()
+        try:
+            _write_readings(readings)
+        except Exception:
+            logger.exception("The values of {} data providers could not be saved.".format(len(readings)))
+        self.flush_count += 1
+        self.last_flush_latency = time.perf_counter() - start
+        self.max_flush_latency = max(self.max_flush_latency, self.last_flush_latency)
+        if self.warning_queue_depth is not None and len(readings) >= self.warning_queue_depth:
+            level = logging.WARNING
+        else:
+            level = logging.DEBUG
+        logger.log(
+            level,
+            "{count} values saved in {last_flush_latency:.3f}s, {queue_depth} waiting, {flush_count} flushes, "
+            "the slowest in {max_flush_latency:.3f}s".format(count=len(readings), **self.metrics())
+        )
+
+
+Circuit = namedtuple('Circuit', ['state', 'failure_count', 'next_probe_at'])
+CLOSED_CIRCUIT = Circuit(DataProvider.CLOSED, 0, None)
+
+
+class CircuitBreaker:
+    """
+    Define the circuit breakers of the data providers polled by the worker.
+
+    A data provider failing `threshold` times in a row is open: it is not
+    polled until its next probe, `backoff` seconds later. The probe is a
+    single poll, half-open, which closes the circuit if it succeeds and opens
+    it again otherwise, the delay doubling up to `max_backoff` seconds.
+    Each change of state is given to `on_change` to be saved.
+    """
+
+    def __init__(self, threshold, backoff, max_backoff, on_change):
+        """Create the circuit breakers, all the circuits being closed."""
+        self.threshold = threshold
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.on_change = on_change
+        self._circuits = {}
+        self._lock = threading.Lock()
+
+    def load(self, dataproviders):
+        """Take the saved circuits of the given data providers."""
+        with self._lock:
+            self._circuits = {
+                dataprovider.id:
+                Circuit(dataprovider.circuit_state, dataprovider.failure_count, dataprovider.next_probe_at)
+                for dataprovider in dataproviders
+            }
+
+    def get(self, dataprovider):
+        """Return the circuit of the data provider."""
+        return self._circuits.get(dataprovider.id, CLOSED_CIRCUIT)
+
+    def allow(self, dataprovider, now):
+        """Return whether the data provider may be polled at now."""
+        circuit = self.get(dataprovider)
+        if circuit.state != DataProvider.OPEN:
+            return True
+        if now < circuit.next_probe_at:
+            return False
+        self._set(dataprovider, circuit._replace(state=DataProvider.HALF_OPEN), True)
+        return True
+
+    def record_success(self, dataprovider):
+        """Close the circuit of a data provider which answered."""
+        circuit = self.get(dataprovider)
+        if circuit != CLOSED_CIRCUIT:
+            self._set(dataprovider, CLOSED_CIRCUIT, circuit.state != DataProvider.CLOSED)
+
+    def record_failure(self, dataprovider, now):
+        """Count a failed poll, opening the circuit from the threshold."""
+        circuit = self.get(dataprovider)
+        failure_count = circuit.failure_count + 1
+        if circuit.state == DataProvider.CLOSED and failure_count < self.threshold:
+            self._set(dataprovider, circuit._replace(failure_count=failure_count), False)
+            return
+        # The exponent is bounded, the delay being capped long before.
+        delay = min(self.backoff * 2**min(failure_count - self.threshold, 32), self.max_backoff)
+        next_probe_at = now + timedelta(seconds=delay)
+        self._set(dataprovider, Circuit(DataProvider.OPEN, failure_count, next_probe_at), True)
+        logger.warning(
+            "The data provider '{}' failed {} times, it is not polled until {}.".format(
+                dataprovider.name, failure_count, next_probe_at
+            )
+        )
+
+    def reset(self, dataprovider):
+        """Close the circuit of a data provider whose parameters changed."""
+        circuit = self.get(dataprovider)
+        self._set(dataprovider, CLOSED_CIRCUIT, circuit.state != DataProvider.CLOSED)
+
+    def _set(self, dataprovider, circuit, changed):
+        with self._lock:
+            self._circuits[dataprovider.id] = circuit
+        if changed:
+            self.on_change(dataprovider.id, circuit)
+
+
+class EventLoopExecutor(AsyncIOExecutor):
+    """
+    Define an executor running coroutine jobs in the given event loop.
+
+    It lets a background scheduler, which calls its job store from its own
+    thread, run the jobs in an event loop running in another thread.
+    """
+
+    def __init__(self, event_loop):
+        """Define an executor running the jobs in event_loop."""
+        super().__init__()
+        self.event_loop = event_loop
+
+    def start(self, scheduler, alias):
+        """Start the executor in the event loop given at its creation."""
+        BaseExecutor.start(self, scheduler, alias)
+        self._eventloop = self.event_loop
+        self._pending_futures = set()
+
+    def _do_submit_job(self, job, run_times):
+        self._eventloop.call_soon_threadsafe(super()._do_submit_job, job, run_times)
+
+
+# The event loop, the scheduler and what the polls use are only built by the
+# scheduler worker, see setup, the web processes importing this module only
+# use its helpers.
+event_loop = None
+scheduler = None
+polling_pool = None
+read_planner = None
+database_executor = None
+reading_writer = None
+circuit_breaker = None
+_setup_lock = threading.Lock()
+
+
+def setup():
+    """Build the event loop, the scheduler and the pools of the polls, once.
+
+    The scheduler keeps the jobs of the frequent polls in memory, they are
+    added again when the worker starts, and the other jobs in the database.
+    It is not run by the event loop as the ORM can't be used from it. The
+    results of the polls are saved from the database executor for the same
+    reason.
+    """
+    global event_loop, scheduler, polling_pool, read_planner, database_executor, reading_writer, circuit_breaker
+    with _setup_lock:
+        if scheduler is not None:
+            return
+        event_loop = asyncio.new_event_loop()
+        scheduler = BackgroundScheduler(
+            jobstores={MEMORY_JOBSTORE: MemoryJobStore(), DATABASE_JOBSTORE: DjangoJobStore()},
+            executors={'default': EventLoopExecutor(event_loop)},
+            job_defaults={
+                'coalesce': True,
+                'misfire_grace_time': 60
+            }
+        )
+        polling_pool = PollingPool(
+            settings.DATA_PROVIDERS_POLLING_CONCURRENCY, settings.DATA_PROVIDERS_POLLING_TIMEOUT
+        )
+        read_planner = ReadPlanner(
+            polling_pool,
+            settings.DATA_PROVIDERS_COALESCING_WINDOW,
+            settings.DATA_PROVIDERS_COALESCING_MAX_GAP,
+            settings.DATA_PROVIDERS_COALESCING_MAX_QUANTITY,
+        )
+        database_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='data-provider-database')
+        reading_writer = ReadingWriter(
+            database_executor,
+            settings.DATA_PROVIDERS_WRITE_INTERVAL,
+            settings.DATA_PROVIDERS_WRITE_BATCH_SIZE,
+            settings.DATA_PROVIDERS_WRITE_WARNING_QUEUE_DEPTH,
+        )
+        circuit_breaker = CircuitBreaker(
+            settings.DATA_PROVIDERS_FAILURE_THRESHOLD,
+            settings.DATA_PROVIDERS_BACKOFF,
+            settings.DATA_PROVIDERS_MAX_BACKOFF,
+            lambda dataprovider_id, circuit: database_executor.submit(_save_circuit, dataprovider_id, circuit),
+        )
+
+
 def start():
-    """Initialise all data provider jobs when django starts."""
-    dataproviders = DataProvider.objects.filter()
-    for dataprovider in dataproviders:
-        add_job(dataprovider)
+    """Start the polling of all the data providers in the scheduler worker.
+
+    The jobs kept in memory are added, the ones kept in the database are
+    only updated with the changes of the data providers, then the data
+    providers are checked in the event loop, without delaying the start.
+    """
+    setup()
+    dataproviders = list(DataProvider.objects.all())
+    circuit_breaker.load(dataproviders)
+    threading.Thread(target=event_loop.run_forever, name='data-providers-event-loop', daemon=True).start()
+    scheduler.start()
+    reconcile_jobs()
+    # The data providers whose circuit is open are tried at their next probe.
+    closed = [dataprovider for dataprovider in dataproviders if dataprovider.circuit_state == DataProvider.CLOSED]
+    asyncio.run_coroutine_threadsafe(probe_dataproviders(closed), event_loop)
+
+
+def reconcile_jobs():
+    """Update the jobs with the data providers added, changed or deleted.
+
+    The data providers are edited by the web processes, the jobs of the
+    worker follow them by calling this method periodically. A job is only
+    replaced when the polling parameters of its data provider changed, its
+    circuit being closed again.
+    """
+    dataproviders = {_job_id(dataprovider): dataprovider for dataprovider in DataProvider.objects.all()}
+    jobs, jobstores = {}, {}
+    for jobstore in (MEMORY_JOBSTORE, DATABASE_JOBSTORE):
+        for job in scheduler.get_jobs(jobstore=jobstore):
+            if job.id.startswith(JOB_ID_PREFIX):
+                jobs[job.id], jobstores[job.id] = job, jobstore
+    for job_id in jobs.keys() - dataproviders.keys():
+        scheduler.remove_job(job_id)
+    for job_id, dataprovider in dataproviders.items():
+        job = jobs.get(job_id)
+        if job is None:
+            add_job(dataprovider)
+        elif _polling_parameters(job.kwargs['dataprovider']) != _polling_parameters(dataprovider):
+            add_job(dataprovider)
+            circuit_breaker.reset(dataprovider)
+        elif jobstores[job_id] != _get_jobstore(dataprovider):
+            add_job(dataprovider)
+
+
+async def probe_dataproviders(dataproviders):
+    """Check that the data providers answer, the failing ones are marked.
+
+    At most DATA_PROVIDERS_PROBE_CONCURRENCY data providers are checked at
+    the same time, leaving room for the polls.
+    """
+    semaphore = asyncio.Semaphore(settings.DATA_PROVIDERS_PROBE_CONCURRENCY)
+    await asyncio.gather(*[_probe_dataprovider(dataprovider, semaphore) for dataprovider in dataproviders])
+
+
+async def _probe_dataprovider(dataprovider, semaphore):
+    async with semaphore:
         try:
-            test_dataprovider_configuration(dataprovider.file_name, dataprovider.ip_address, dataprovider.port)
+            module = registry.get(dataprovider.file_name)
+            await polling_pool.get_data(module, dataprovider.ip_address, dataprovider.port)
         except Exception as e:
-            dataprovider.is_activated = None
-            dataprovider.save()
-            logger.warning("The data provider '{}' doesn't work : {}".format(dataprovider.name, e))
+            message = "The data provider '{}' doesn't work : {}".format(dataprovider.name, e)
+            await asyncio.get_event_loop().run_in_executor(database_executor, _deactivate, dataprovider, message)
 
 
 def add_job(dataprovider):
-    """Add a job for the given data provider."""
+    """Add a job for the given data provider, or replace its job.
+
+    The data providers polling the same device with the same recurrence are
+    polled at the same time, so that their reads are coalesced. The polls of
+    the different devices are spread by a delay derived from the device. As
+    the polls are aligned on POLLING_EPOCH, a job kept in memory is added
+    again with the same run times.
+    """
+    job_id = _job_id(dataprovider)
     recurrence = _parse_time(dataprovider.recurrence)
+    _remove_job(job_id)
     if recurrence:
-        job = scheduler.add_job(
-            _trigger_dataprovider,
+        scheduler.add_job(
+            _poll_dataprovider,
             'interval',
+            id=job_id,
+            jobstore=_get_jobstore(dataprovider),
             kwargs={"dataprovider": dataprovider},
             days=recurrence["days"],
             hours=recurrence["hours"],
-            minutes=recurrence["minutes"]
+            minutes=recurrence["minutes"],
+            start_date=POLLING_EPOCH + timedelta(seconds=_device_delay(dataprovider))
         )
-        dataprovider.job_id = job.id
-        dataprovider.save()
         if dataprovider.is_activated is False:
-            scheduler.pause_job(dataprovider.job_id)
+            scheduler.pause_job(job_id)
+    if dataprovider.job_id != job_id:
+        dataprovider.job_id = job_id
+        DataProvider.objects.filter(pk=dataprovider.pk).update(job_id=job_id)
+
+
+def _remove_job(job_id):
+    if scheduler.get_job(job_id):
+        scheduler.remove_job(job_id)
+
+
+def _job_id(dataprovider):
+    return JOB_ID_PREFIX + str(dataprovider.pk)
+
+
+def _get_jobstore(dataprovider):
+    """Return the job store of a data provider, saving its runs or not."""
+    interval = timedelta(**_parse_time(dataprovider.recurrence))
+    if interval.total_seconds() >= settings.DATA_PROVIDERS_STORED_JOBS_MIN_INTERVAL:
+        return DATABASE_JOBSTORE
+    return MEMORY_JOBSTORE
 
 
-def _trigger_dataprovider(dataprovider):
-    """Update the indicated field from a data provider."""
-    module = ""
+def _polling_parameters(dataprovider):
+    """Return what a job depends on, its activation being set by the polls."""
+    return (
+        dataprovider.file_name, dataprovider.ip_address, dataprovider.port, dataprovider.address,
+        dataprovider.recurrence, dataprovider.field_object_id, dataprovider.is_activated is False
+    )
+
+
+def _device_delay(dataprovider):
+    """Return the delay in seconds of the polls of a data provider device."""
+    device = "{}|{}|{}".format(dataprovider.file_name, dataprovider.ip_address, dataprovider.port)
+    milliseconds = settings.DATA_PROVIDERS_POLLING_SPREAD * 1000
+    return zlib.crc32(device.encode()) % milliseconds / 1000 if milliseconds else 0
+
+
+async def _poll_dataprovider(dataprovider):
+    """Update the indicated field from a data provider, in the event loop.
+
+    The poll is skipped while the circuit of the data provider is open.
+    """
+    if not circuit_breaker.allow(dataprovider, timezone.now()):
+        return
+    loop = asyncio.get_event_loop()
     try:
-        module = importlib.import_module(f"utils.data_providers.{dataprovider.file_name[:-3]}")
-        field = FieldObject.objects.get(id=dataprovider.field_object.id)
-        value = module.get_data(dataprovider.ip_address, dataprovider.port)
-        logger.info("FieldObject '{}' UPDATED with value : {}".format(repr(field), value))
-        field.value = value
-        field.save()
-        dataprovider.is_activated = True
-        dataprovider.save()
+        module = registry.get(dataprovider.file_name)
+        value = await read_planner.get_data(module, dataprovider.ip_address, dataprovider.port, dataprovider.address)
     except ImportError:
-        dataprovider.is_activated = None
-        dataprovider.save()
-        logger.warning(
-            "The dataProvider {filename} could not be imported.\n{}".format(
-                ImportError, filename=dataprovider.file_name
-            )
-        )
-    except ObjectDoesNotExist:
-        dataprovider.is_activated = None
-        dataprovider.save()
-        logger.warning(
-            "The field {field} was not found.\n{}".format(ObjectDoesNotExist, field=dataprovider.field_object)
-        )
-    except GetDataException:
-        dataprovider.is_activated = None
-        dataprovider.save()
-        logger.warning(
-            "The execution of get_data of the module {module} run into an error.\n{}".format(
-                GetDataException, module=module
-            )
-        )
+        message = IMPORT_ERROR_LOGGER.format(file_name=dataprovider.file_name)
+        await loop.run_in_executor(database_executor, _deactivate, dataprovider, message)
+    except GetDataException as e:
+        circuit_breaker.record_failure(dataprovider, timezone.now())
+        message = GET_DATA_ERROR_LOGGER.format(file_name=dataprovider.file_name, error=e)
+        await loop.run_in_executor(database_executor, _deactivate, dataprovider, message)
+    except Exception as e:
+        # A device error or a bug of the module fails the poll the same way.
+        circuit_breaker.record_failure(dataprovider, timezone.now())
+        message = GET_DATA_ERROR_LOGGER.format(file_name=dataprovider.file_name, error=repr(e))
+        await loop.run_in_executor(database_executor, _deactivate, dataprovider, message)
+    else:
+        circuit_breaker.record_success(dataprovider)
+        reading_writer.add(dataprovider, value)
+
+
+def _write_readings(readings):
+    """Save the values got by data providers and trigger the watching tasks.
+
+    The field objects are fetched in one query and updated in one bulk
+    update with the last value of each data provider. All the numeric values
+    are appended to the readings history. A data provider row is only updated
+    when its state changes, the values of the deleted ones are dropped. The
+    state is read from the database, the data providers of the jobs being
+    the ones of their last change.
+    """
+    field_objects = FieldObject.objects.in_bulk([dataprovider.field_object_id for dataprovider, _, _ in readings])
+    dataprovider_ids = [dataprovider.id for dataprovider, _, _ in readings]
+    existing_dataproviders = dict(
+        DataProvider.objects.filter(id__in=dataprovider_ids).values_list('id', 'is_activated')
+    )
+    updated_field_objects = {}
+    activated_dataproviders = []
+    history = []
+    for dataprovider, value, timestamp in readings:
+        if dataprovider.id not in existing_dataproviders:
+            continue
+        field_object = field_objects.get(dataprovider.field_object_id)
+        if field_object is None:
+            _deactivate(dataprovider, "The field {field} was not found.".format(field=dataprovider.field_object_id))
+            continue
+        logger.info("FieldObject '{}' UPDATED with value : {}".format(repr(field_object), value))
+        field_object.value = value
+        updated_field_objects[field_object.id] = field_object
+        if existing_dataproviders[dataprovider.id] is not True:
+            existing_dataproviders[dataprovider.id] = True
+            activated_dataproviders.append(dataprovider.id)
+        dataprovider.is_activated = True
+        try:
+            history.append(Reading(dataprovider_id=dataprovider.id, timestamp=timestamp, value=float(value)))
+        except (TypeError, ValueError):
+            pass
+    FieldObject.objects.bulk_update(updated_field_objects.values(), ['value'])
+    Reading.objects.bulk_create(history, batch_size=1000)
+    if activated_dataproviders:
+        DataProvider.objects.filter(id__in=activated_dataproviders).update(is_activated=True)
+    if updated_field_objects:
+        check_tasks_watching(*updated_field_objects.values())
+
+
+def _deactivate(dataprovider, message):
+    """Mark a data provider as not working."""
+    dataprovider.is_activated = None
+    DataProvider.objects.filter(id=dataprovider.id).exclude(is_activated=None).update(is_activated=None)
+    logger.warning(message)
+
+
+def _save_circuit(dataprovider_id, circuit):
+    """Save the new state of the circuit of a data provider."""
+    DataProvider.objects.filter(id=dataprovider_id).update(
+        circuit_state=circuit.state, failure_count=circuit.failure_count, next_probe_at=circuit.next_probe_at
+    )
 
 
 def _parse_time(time_str):
@@ -109,11 +643,11 @@ def _parse_time(time_str):
 def test_dataprovider_configuration(file_name, ip_address, port):
     """Trigger the get_data method and return the result or an error."""
     try:
-        module = importlib.import_module(f"utils.data_providers.{file_name[:-3]}")
+        module = registry.get(file_name, refresh=True)
         return module.get_data(ip_address, port)
-    except ModuleNotFoundError:
-        raise DataProviderException("Python file not found, please enter 'name_of_your_file.py'")
-    except AttributeError:
+    except InvalidPluginError:
         raise DataProviderException('Python file is not well formated, please follow the example')
+    except ImportError:
+        raise DataProviderException("Python file not found, please enter 'name_of_your_file.py'")
     except GetDataException:
         raise DataProviderException('IP not found or python file not working')
@@ -1,11 +1,15 @@
 """This file is an example for DataProvider python file."""
 
+import asyncio
 import socket
 
 from umodbus import conf
 from umodbus.client import tcp
 
 from utils.data_provider import GetDataException
+from utils.modbus import connection_pool
+
+TIMEOUT = 5  # Seconds before giving up on an unreachable device
 
 
 def get_data(ip_address, port=502):
@@ -13,13 +17,68 @@ def get_data(ip_address, port=502):
     try:
         # Start of your code (example below)
         conf.SIGNED_VALUES = False
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.connect((ip_address, port))
+        sock = socket.create_connection((ip_address, port), timeout=TIMEOUT)
         message = tcp.read_holding_registers(slave_id=1, starting_address=0, quantity=1)
         response = tcp.send_message(message, sock)
         sock.close()
         return response[0]
         # End of your code
-    except ConnectionRefusedError as e:
+    except OSError as e:
+        raise GetDataException(e)
+    # Add exception if needed
+
+
+async def get_data_async(ip_address, port=502):
+    """get_data_async is optional, it is the non-blocking version of get_data.
+
+    When it is defined, the data providers are polled with it so that an
+    unreachable device does not block a thread. The connection pool keeps one
+    connection per device open, shared by all the data providers reading it.
+    """
+    try:
+        # Start of your code (example below)
+        conf.SIGNED_VALUES = False
+        message = tcp.read_holding_registers(slave_id=1, starting_address=0, quantity=1)
+        response = await connection_pool.send_message(ip_address, port, message)
+        return response[0]
+        # End of your code
+    except (OSError, asyncio.IncompleteReadError) as e:
+        raise GetDataException(e)
+    # Add exception if needed
+
+
+def get_data_many(ip_address, port, addresses):
+    """get_data_many is optional, it returns the values of sorted addresses.
+
+    The addresses are close enough to be read with a single request.
+    """
+    try:
+        # Start of your code (example below)
+        conf.SIGNED_VALUES = False
+        sock = socket.create_connection((ip_address, port), timeout=TIMEOUT)
+        message = tcp.read_holding_registers(
+            slave_id=1, starting_address=addresses[0], quantity=addresses[-1] - addresses[0] + 1
+        )
+        response = tcp.send_message(message, sock)
+        sock.close()
+        return [response[address - addresses[0]] for address in addresses]
+        # End of your code
+    except OSError as e:
+        raise GetDataException(e)
+    # Add exception if needed
+
+
+async def get_data_many_async(ip_address, port, addresses):
+    """get_data_many_async is optional, the non-blocking get_data_many."""
+    try:
+        # Start of your code (example below)
+        conf.SIGNED_VALUES = False
+        message = tcp.read_holding_registers(
+            slave_id=1, starting_address=addresses[0], quantity=addresses[-1] - addresses[0] + 1
+        )
+        response = await connection_pool.send_message(ip_address, port, message)
+        return [response[address - addresses[0]] for address in addresses]
+        # End of your code
+    except (OSError, asyncio.IncompleteReadError) as e:
         raise GetDataException(e)
     # Add exception if needed
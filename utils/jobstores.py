@@ -0,0 +1,130 @@
+"""This file keeps the jobs of the scheduler worker in the database."""
+
+import logging
+import pickle
+
+from apscheduler.job import Job
+from apscheduler.jobstores.base import BaseJobStore, ConflictingIdError, JobLookupError
+from apscheduler.util import datetime_to_utc_timestamp, utc_timestamp_to_datetime
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from utils.models import ScheduledJob
+
+logger = logging.getLogger(__name__)
+
+
+class DjangoJobStore(BaseJobStore):
+    """
+    Define a job store keeping the jobs in the ScheduledJob table.
+
+    The jobs are kept when the scheduler worker stops, so that the worker
+    taking over finds them as they were, with their next run times. The
+    next run time of a job is read from its column: after a run, only the
+    column is updated when the rest of the job pickles as the row read.
+    """
+
+    def __init__(self, pickle_protocol=pickle.HIGHEST_PROTOCOL):
+        """Define a job store pickling the jobs with the given protocol."""
+        super().__init__()
+        self.pickle_protocol = pickle_protocol
+        # The states of the rows read or written, without their next run time.
+        self._saved_states = {}
+
+    def lookup_job(self, job_id):
+        """Return the job of the given id, or None."""
+        row = ScheduledJob.objects.filter(id=job_id).values_list('job_state', 'next_run_time').first()
+        return self._reconstitute_job(*row) if row is not None else None
+
+    def get_due_jobs(self, now):
+        """Return the jobs to run at now, sorted by next run time."""
+        return self._get_jobs(next_run_time__lte=datetime_to_utc_timestamp(now))
+
+    def get_next_run_time(self):
+        """Return the earliest next run time of the jobs."""
+        next_run_time = ScheduledJob.objects.filter(next_run_time__isnull=False).order_by('next_run_time') \
+            .values_list('next_run_time', flat=True).first()
+        return utc_timestamp_to_datetime(next_run_time)
+
+    def get_all_jobs(self):
+        """Return the jobs, sorted by next run time, the paused ones last."""
+        jobs = self._get_jobs()
+        self._fix_paused_jobs_sorting(jobs)
+        return jobs
+
+    def add_job(self, job):
+        """Add the job, its id must not be used yet."""
+        job_state = self._restored_state(self._pickle_state(job))
+        try:
+            with transaction.atomic():
+                ScheduledJob.objects.create(
+                    id=job.id, next_run_time=datetime_to_utc_timestamp(job.next_run_time), job_state=job_state
+                )
+        except IntegrityError:
+            raise ConflictingIdError(job.id)
+        self._saved_states[job.id] = job_state
+
+    def update_job(self, job):
+        """Save the changes of the job, only its next run time after a run."""
+        changes = {'next_run_time': datetime_to_utc_timestamp(job.next_run_time)}
+        job_state = self._pickle_state(job)
+        if self._saved_states.get(job.id) != job_state:
+            job_state = changes['job_state'] = self._restored_state(job_state)
+        if not ScheduledJob.objects.filter(id=job.id).update(**changes):
+            self._saved_states.pop(job.id, None)
+            raise JobLookupError(job.id)
+        self._saved_states[job.id] = job_state
+
+    def remove_job(self, job_id):
+        """Remove the job of the given id."""
+        self._saved_states.pop(job_id, None)
+        deleted, _ = ScheduledJob.objects.filter(id=job_id).delete()
+        if not deleted:
+            raise JobLookupError(job_id)
+
+    def remove_all_jobs(self):
+        """Remove all the jobs."""
+        self._saved_states.clear()
+        ScheduledJob.objects.all().delete()
+
+    def _pickle_state(self, job):
+        # The next run time is kept in its column only.
+        return pickle.dumps(dict(job.__getstate__(), next_run_time=None), self.pickle_protocol)
+
+    def _restored_state(self, job_state):
+        # A job pickles differently once restored, its objects being shared
+        # differently, so the state is saved as it pickles once restored.
+        return self._pickle_state(self._restore_job(job_state, None))
+
+    def _reconstitute_job(self, job_state, next_run_time):
+        job = self._restore_job(job_state, next_run_time)
+        self._saved_states[job.id] = bytes(job_state)
+        return job
+
+    def _restore_job(self, job_state, next_run_time):
+        job_state = pickle.loads(job_state)
+        job_state['next_run_time'] = utc_timestamp_to_datetime(next_run_time)
+        job_state['jobstore'] = self
+        job = Job.__new__(Job)
+        job.__setstate__(job_state)
+        job._scheduler = self._scheduler
+        job._jobstore_alias = self._alias
+        return job
+
+    def _get_jobs(self, **conditions):
+        jobs = []
+        failed_job_ids = []
+        rows = ScheduledJob.objects.filter(**conditions).order_by(F('next_run_time').asc(nulls_last=True))
+        for job_id, job_state, next_run_time in rows.values_list('id', 'job_state', 'next_run_time'):
+            try:
+                jobs.append(self._reconstitute_job(job_state, next_run_time))
+            except BaseException:
+                logger.exception("The job {} could not be restored, it is removed.".format(job_id))
+                failed_job_ids.append(job_id)
+        if failed_job_ids:
+            ScheduledJob.objects.filter(id__in=failed_job_ids).delete()
+        return jobs
+
+    def __repr__(self):
+        """Define the representation of the job store."""
+        return '<DjangoJobStore>'
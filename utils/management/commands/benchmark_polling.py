@@ -0,0 +1,123 @@
+"""Benchmark the polling of data providers against the modbus stand-in."""
+import asyncio
+import logging
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from utils import modbus_server
+from utils.data_provider import GetDataException, PollingPool, ReadPlanner
+from utils.data_providers import modbus_example
+
+# Size of the thread pool APScheduler used to poll every data provider.
+APSCHEDULER_THREAD_POOL_SIZE = 10
+
+
+class Command(BaseCommand):
+    """Measure how many data providers are polled per second."""
+
+    help = 'Poll the modbus server stand-in with the polling engine and with a blocking thread pool'
+
+    def add_arguments(self, parser):
+        """Define the arguments of the command."""
+        parser.add_argument('--providers', type=int, default=1000, help='Number of data providers to poll')
+        parser.add_argument(
+            '--unreachable',
+            type=int,
+            default=0,
+            help='Number of these data providers targeting a device which never answers'
+        )
+        parser.add_argument('--concurrency', type=int, default=settings.DATA_PROVIDERS_POLLING_CONCURRENCY)
+        parser.add_argument('--timeout', type=float, default=settings.DATA_PROVIDERS_POLLING_TIMEOUT)
+        parser.add_argument('--skip-blocking', action='store_true', help='Only benchmark the polling engine')
+        parser.add_argument(
+            '--coalesce',
+            action='store_true',
+            help='Also benchmark the polling engine coalescing the reads of the 10 registers of the server'
+        )
+
+    def handle(self, *args, **options):
+        """Run the benchmark."""
+        logging.getLogger('umodbus').setLevel(logging.WARNING)
+        threading.Thread(target=modbus_server.app.serve_forever, daemon=True).start()
+        unreachable_device = self._start_unreachable_device()
+        host, port = modbus_server.app.server_address
+        targets = [(host, port)] * (options['providers'] - options['unreachable'])
+        targets += [unreachable_device] * options['unreachable']
+        modbus_example.TIMEOUT = options['timeout']
+
+        if not options['skip_blocking']:
+            duration, failures = self._benchmark_blocking(targets)
+            self._report('Blocking thread pool', len(targets), duration, failures)
+        pool = PollingPool(options['concurrency'], options['timeout'])
+        duration, failures = asyncio.run(self._benchmark_engine(pool, targets))
+        self._report('Polling engine', len(targets), duration, failures)
+        if options['coalesce']:
+            planner = ReadPlanner(
+                PollingPool(options['concurrency'], options['timeout']),
+                settings.DATA_PROVIDERS_COALESCING_WINDOW,
+                settings.DATA_PROVIDERS_COALESCING_MAX_GAP,
+                settings.DATA_PROVIDERS_COALESCING_MAX_QUANTITY,
+            )
+            duration, failures = asyncio.run(self._benchmark_coalescing(planner, targets))
+            self._report('Coalescing polling engine', len(targets), duration, failures)
+        modbus_server.app.shutdown()
+
+    def _start_unreachable_device(self):
+        """Listen on a port without ever accepting, like a frozen device."""
+        device = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        device.bind(('localhost', 0))
+        device.listen(1)
+        self._unreachable_device = device
+        return device.getsockname()
+
+    def _benchmark_blocking(self, targets):
+        failures = 0
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=APSCHEDULER_THREAD_POOL_SIZE) as executor:
+            for succeeded in executor.map(self._get_data_blocking, targets):
+                failures += not succeeded
+        return time.perf_counter() - start, failures
+
+    def _get_data_blocking(self, target):
+        try:
+            modbus_example.get_data(*target)
+            return True
+        except GetDataException:
+            return False
+
+    async def _benchmark_engine(self, pool, targets):
+        start = time.perf_counter()
+        results = await asyncio.gather(*[self._get_data_engine(pool, target) for target in targets])
+        return time.perf_counter() - start, results.count(False)
+
+    async def _get_data_engine(self, pool, target):
+        try:
+            await pool.get_data(modbus_example, *target)
+            return True
+        except GetDataException:
+            return False
+
+    async def _benchmark_coalescing(self, planner, targets):
+        start = time.perf_counter()
+        results = await asyncio.gather(
+            *[self._get_data_coalescing(planner, target, address % 10) for address, target in enumerate(targets)]
+        )
+        return time.perf_counter() - start, results.count(False)
+
+    async def _get_data_coalescing(self, planner, target, address):
+        try:
+            await planner.get_data(modbus_example, *target, address)
+            return True
+        except GetDataException:
+            return False
+
+    def _report(self, name, polls, duration, failures):
+        self.stdout.write(
+            "{name}: {polls} polls in {duration:.2f}s, {rate:.0f} polls/s, {failures} failed".format(
+                name=name, polls=polls, duration=duration, rate=polls / duration, failures=failures
+            )
+        )
@@ -0,0 +1,120 @@
+"""Benchmark the memory used to receive and check a large file upload."""
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+from io import BytesIO
+
+from PyPDF4.pdf import PdfFileReader
+
+from django.core.handlers.wsgi import WSGIRequest
+from django.core.management.base import BaseCommand
+from maintenancemanagement.serializers import FileSerializer
+
+BOUNDARY = 'BenchmarkUploadBoundary'
+MEGABYTE = 1024 * 1024
+
+
+def _read_whole_file(file):
+    """Check the file as before, by parsing it from memory."""
+    try:
+        PdfFileReader(BytesIO(file.read()))
+    except Exception:
+        pass
+
+
+def _sniff_header(file):
+    """Check the file from its header, as the file serializer does."""
+    serializer = FileSerializer(data={'file': file, 'is_manual': True})
+    if not serializer.is_valid():
+        raise ValueError(serializer.errors)
+
+
+def _receive(check, body_path, results):
+    """Receive the upload, check it and send the peak RSS growth in bytes."""
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    with open(body_path, 'rb') as body:
+        request = WSGIRequest(
+            {
+                'REQUEST_METHOD': 'POST',
+                'PATH_INFO': '/api/maintenancemanagement/files/',
+                'CONTENT_TYPE': f'multipart/form-data; boundary={BOUNDARY}',
+                'CONTENT_LENGTH': str(os.path.getsize(body_path)),
+                'wsgi.input': body,
+            }
+        )
+        check(request.FILES['file'])
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is given in kilobytes on Linux.
+    results.put(((peak - baseline) * 1024, time.perf_counter() - start))
+
+
+def _write_pdf(body, size):
+    """Write a one page pdf whose content stream is size MB, by chunks."""
+    start = body.tell()
+    offsets = []
+
+    def write_object(content):
+        offsets.append(body.tell() - start)
+        body.write(content)
+
+    body.write(b'%PDF-1.4\n')
+    write_object(b'1 0 obj\n<< /Type /Catalog /Pages 2 0 R >>\nendobj\n')
+    write_object(b'2 0 obj\n<< /Type /Pages /Kids [3 0 R] /Count 1 >>\nendobj\n')
+    write_object(b'3 0 obj\n<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R >>\nendobj\n')
+    # The content is made of comment lines, ignored when the page is drawn.
+    line = b'%' + b'0' * 62 + b'\n'
+    write_object(f'4 0 obj\n<< /Length {size * MEGABYTE} >>\nstream\n'.encode())
+    for _ in range(size):
+        body.write(line * (MEGABYTE // len(line)))
+    body.write(b'\nendstream\nendobj\n')
+    xref = body.tell() - start
+    body.write(f'xref\n0 {len(offsets) + 1}\n0000000000 65535 f \n'.encode())
+    for offset in offsets:
+        body.write(f'{offset:010} 00000 n \n'.encode())
+    body.write(f'trailer\n<< /Size {len(offsets) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n'.encode())
+
+
+class Command(BaseCommand):
+    """Measure the peak memory used to receive and check large pdf uploads."""
+
+    help = 'Receive large pdf uploads, checked by reading them whole then from their header, and report the peak RSS'
+
+    def add_arguments(self, parser):
+        """Define the arguments of the command."""
+        parser.add_argument('--sizes', type=int, nargs='+', default=[50, 200], help='Sizes of the uploads in MB')
+
+    def handle(self, *args, **options):
+        """Run the benchmark."""
+        context = multiprocessing.get_context('fork')
+        for size in options['sizes']:
+            body_path = self._write_body(size)
+            try:
+                for name, check in (('Whole file read', _read_whole_file), ('Header sniffing', _sniff_header)):
+                    # A new process receives each upload, for its peak RSS.
+                    results = context.Queue()
+                    process = context.Process(target=_receive, args=(check, body_path, results))
+                    process.start()
+                    growth, duration = results.get()
+                    process.join()
+                    self.stdout.write(
+                        "{name}: {size} MB upload, peak RSS +{growth:.1f} MB, {duration:.2f}s".format(
+                            name=name, size=size, growth=growth / MEGABYTE, duration=duration
+                        )
+                    )
+            finally:
+                os.remove(body_path)
+
+    def _write_body(self, size):
+        """Write the multipart body of a pdf upload of size MB, by chunks."""
+        descriptor, body_path = tempfile.mkstemp(suffix='.multipart')
+        with os.fdopen(descriptor, 'wb') as body:
+            body.write(
+                f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="file"; filename="manual.pdf"\r\n'
+                'Content-Type: application/pdf\r\n\r\n'.encode()
+            )
+            _write_pdf(body, size)
+            body.write(f'\r\n--{BOUNDARY}--\r\n'.encode())
+        return body_path
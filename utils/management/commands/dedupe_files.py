@@ -0,0 +1,28 @@
+"""Share the content of the files uploaded several times."""
+from django.core.management.base import BaseCommand
+from maintenancemanagement.files import dedupe_files
+
+
+class Command(BaseCommand):
+    """Keep a single copy of the content of the files in the media."""
+
+    help = 'Hash the files, move the files of the same content to a single copy and delete the other copies'
+
+    def add_arguments(self, parser):
+        """Define the arguments of the command."""
+        parser.add_argument(
+            '--dry-run', action='store_true', help='Report the copies which would be deleted without deleting them'
+        )
+
+    def handle(self, *args, **options):
+        """Dedupe the files and report the space freed."""
+        metrics = dedupe_files(dry_run=options['dry_run'])
+        self.stdout.write(
+            "{hashed} files hashed, {deleted} copies {action}, {freed:.1f} MB {freed_action}".format(
+                hashed=metrics['hashed'],
+                deleted=metrics['deleted'],
+                action='to delete' if options['dry_run'] else 'deleted',
+                freed=metrics['freed'] / (1024 * 1024),
+                freed_action='to free' if options['dry_run'] else 'freed'
+            )
+        )
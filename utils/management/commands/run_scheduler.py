@@ -0,0 +1,20 @@
+"""Run the background jobs of openCMMS."""
+import sys
+
+from django.core.management.base import BaseCommand
+from utils import scheduler
+
+
+class Command(BaseCommand):
+    """Run the notifications, the trigger of tasks and the data providers."""
+
+    help = 'Run the background jobs, or wait to take over the scheduler worker which runs them'
+
+    def handle(self, *args, **options):
+        """Run the scheduler worker until it is stopped or loses its lock."""
+        try:
+            scheduler.run()
+        except KeyboardInterrupt:
+            return
+        # The worker lost its lock, it is restarted to wait for it again.
+        sys.exit(1)
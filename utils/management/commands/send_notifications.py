@@ -0,0 +1,29 @@
+"""Send the daily notifications, or write them for a benchmark."""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from utils.notifications import send_notifications
+
+
+class Command(BaseCommand):
+    """Send the notifications of the late and imminent tasks."""
+
+    help = 'Send the notifications of the late and imminent tasks and report the duration of each stage'
+
+    def add_arguments(self, parser):
+        """Define the arguments of the command."""
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Write the notifications in NOTIFICATIONS_DRY_RUN_PATH instead of sending them'
+        )
+
+    def handle(self, *args, **options):
+        """Send the notifications and report the metrics."""
+        metrics = send_notifications(dry_run=options['dry_run'])
+        self.stdout.write(
+            "{users} users notified, {sent} mails {action}: query {query_duration:.2f}s, "
+            "render {render_duration:.2f}s, send {send_duration:.2f}s".format(
+                action='written in ' + settings.NOTIFICATIONS_DRY_RUN_PATH if options['dry_run'] else 'sent',
+                **metrics
+            )
+        )
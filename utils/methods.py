@@ -29,3 +29,31 @@ def parse_time(time_str):
         if param:
             time_params[name] = int(param)
     return timedelta(**time_params)
+
+
+def parse_trigger_condition(field_name, value):
+    r"""Convert the value of a trigger condition into its typed parameters.
+
+    Trigger conditions values are encoded as :
+        - 'recurrence|delay' for Recurrence
+        - 'threshold|field_object_id|delay' for Above and Under Threshold
+        - 'frequency|field_object_id|delay|next_trigger' for Frequency
+
+    Return a dict with the keys threshold, recurrence, source_id, delay and
+    next_trigger. Raise ParseTimeException, ValueError or IndexError if the
+    value is not well formed.
+    """
+    splited = value.split('|')
+    params = {'threshold': None, 'recurrence': None, 'source_id': None, 'next_trigger': None}
+    if field_name == 'Recurrence':
+        if splited[0] != 'None':
+            params['recurrence'] = parse_time(splited[0])
+        params['delay'] = parse_time(splited[1])
+        return params
+    if splited[0] != 'None':
+        params['threshold'] = float(splited[0].replace(" ", ""))
+    params['source_id'] = int(splited[1])
+    params['delay'] = parse_time(splited[2])
+    if field_name == 'Frequency':
+        params['next_trigger'] = float(splited[3])
+    return params
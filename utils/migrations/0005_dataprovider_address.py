@@ -0,0 +1,18 @@
+# Generated by Django 3.1.1 on 2026-10-18 18:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('utils', '0004_auto_20201207_1548'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataprovider',
+            name='address',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
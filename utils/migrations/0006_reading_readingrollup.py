@@ -0,0 +1,53 @@
+# Generated by Django 3.1.1 on 2026-10-18 18:32
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('utils', '0005_dataprovider_address'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReadingRollup',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resolution', models.CharField(choices=[('1m', 'Minute'), ('1h', 'Hour'), ('1d', 'Day')], max_length=2)),
+                ('bucket', models.DateTimeField()),
+                ('minimum', models.FloatField()),
+                ('maximum', models.FloatField()),
+                ('total', models.FloatField()),
+                ('count', models.PositiveIntegerField()),
+                ('dataprovider', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='rollup_set', related_query_name='rollup', to='utils.dataprovider')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Reading',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('timestamp', models.DateTimeField()),
+                ('value', models.FloatField()),
+                ('dataprovider', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='reading_set', related_query_name='reading', to='utils.dataprovider')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='readingrollup',
+            index=models.Index(fields=['resolution', 'bucket'], name='utils_readi_resolut_04d507_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='readingrollup',
+            unique_together={('dataprovider', 'resolution', 'bucket')},
+        ),
+        migrations.AddIndex(
+            model_name='reading',
+            index=models.Index(fields=['dataprovider', 'timestamp'], name='utils_readi_datapro_c683f3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reading',
+            index=django.contrib.postgres.indexes.BrinIndex(fields=['timestamp'], name='utils_readi_timesta_c6523d_brin'),
+        ),
+    ]
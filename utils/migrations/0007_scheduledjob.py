@@ -0,0 +1,21 @@
+# Generated by Django 3.1.1 on 2026-10-18 19:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('utils', '0006_reading_readingrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScheduledJob',
+            fields=[
+                ('id', models.CharField(max_length=191, primary_key=True, serialize=False)),
+                ('next_run_time', models.FloatField(blank=True, db_index=True, null=True)),
+                ('job_state', models.BinaryField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 3.1.1 on 2026-10-18 19:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('utils', '0007_scheduledjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataprovider',
+            name='circuit_state',
+            field=models.CharField(choices=[('closed', 'Closed'), ('open', 'Open'), ('half-open', 'Half-open')], default='closed', max_length=9),
+        ),
+        migrations.AddField(
+            model_name='dataprovider',
+            name='failure_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='dataprovider',
+            name='next_probe_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,101 @@
+"""This file keeps the Modbus TCP connections open between two polls."""
+
+import asyncio
+import logging
+
+from umodbus.client import tcp
+from umodbus.functions import expected_response_pdu_size_from_request_pdu
+
+logger = logging.getLogger(__name__)
+
+# An exception response is shorter than any other one, so it is read first.
+EXCEPTION_ADU_SIZE = 9
+MBAP_HEADER_SIZE = 7
+
+
+class ModbusConnection:
+    """
+    Define a persistent connection to a Modbus TCP device.
+
+    The connection is opened on the first request and kept open. Requests
+    are sent one at a time, as a device answers them in order. If the device
+    closed the connection, it is opened again and the request sent once more.
+    """
+
+    def __init__(self, ip_address, port):
+        """Define a connection to the device at ip_address:port."""
+        self.ip_address = ip_address
+        self.port = port
+        self._reader = None
+        self._writer = None
+        self._lock = None
+        self._loop = None
+
+    async def send_message(self, message):
+        """Send a request ADU to the device and return the parsed response."""
+        self._bind_to_running_loop()
+        async with self._lock:
+            try:
+                return await self._send_message(message)
+            except (OSError, asyncio.IncompleteReadError):
+                # The device may have closed the connection since the last one.
+                self.close()
+                return await self._send_message(message)
+            except BaseException:
+                # A cancelled request would leave its response in the stream.
+                self.close()
+                raise
+
+    async def _send_message(self, message):
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.open_connection(self.ip_address, self.port)
+            logger.debug("Connection to {}:{} opened".format(self.ip_address, self.port))
+        self._writer.write(message)
+        response = await self._reader.readexactly(EXCEPTION_ADU_SIZE)
+        tcp.raise_for_exception_adu(response)
+        response_size = expected_response_pdu_size_from_request_pdu(message[MBAP_HEADER_SIZE:]) + MBAP_HEADER_SIZE
+        response += await self._reader.readexactly(response_size - EXCEPTION_ADU_SIZE)
+        return tcp.parse_response_adu(response, message)
+
+    def _bind_to_running_loop(self):
+        """Reset the connection if it was opened by another event loop."""
+        loop = asyncio.get_event_loop()
+        if self._loop is not loop:
+            self.close()
+            self._lock = asyncio.Lock()
+            self._loop = loop
+
+    def close(self):
+        """Close the connection, the next request will open it again."""
+        if self._writer is not None and not self._loop.is_closed():
+            self._writer.close()
+        self._reader = None
+        self._writer = None
+
+
+class ModbusConnectionPool:
+    """Define a pool sharing one connection per Modbus TCP device."""
+
+    def __init__(self):
+        """Define an empty pool."""
+        self._connections = {}
+
+    def get_connection(self, ip_address, port):
+        """Return the connection to the device at ip_address:port."""
+        key = (ip_address, port)
+        if key not in self._connections:
+            self._connections[key] = ModbusConnection(ip_address, port)
+        return self._connections[key]
+
+    async def send_message(self, ip_address, port, message):
+        """Send a request ADU to the device at ip_address:port."""
+        return await self.get_connection(ip_address, port).send_message(message)
+
+    def close(self):
+        """Close all the connections of the pool."""
+        for connection in self._connections.values():
+            connection.close()
+        self._connections = {}
+
+
+connection_pool = ModbusConnectionPool()
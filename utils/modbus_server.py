@@ -4,7 +4,7 @@ import logging
 import threading
 import time
 from collections import defaultdict
-from socketserver import TCPServer
+from socketserver import ThreadingTCPServer
 
 from umodbus import conf
 from umodbus.server.tcp import RequestHandler, get_server
@@ -15,8 +15,11 @@ log_to_stream(level=logging.DEBUG)
 data_store = defaultdict(int)
 conf.SIGNED_VALUES = False
 
-TCPServer.allow_reuse_address = True
-app = get_server(TCPServer, ('localhost', 5002), RequestHandler)
+# Like a real PLC, answer several clients at once.
+ThreadingTCPServer.allow_reuse_address = True
+ThreadingTCPServer.daemon_threads = True
+ThreadingTCPServer.request_queue_size = 1024
+app = get_server(ThreadingTCPServer, ('localhost', 5002), RequestHandler)
 
 
 @app.route(slave_ids=[1], function_codes=[1, 2, 3, 4], addresses=list(range(0, 10)))
@@ -1,16 +1,23 @@
 """This is the models file for our utilities."""
 from maintenancemanagement.models import Equipment, FieldObject
 
+from django.contrib.postgres.indexes import BrinIndex
 from django.db import models
 
 
 class DataProvider(models.Model):
     """Define a dataprovider."""
 
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+    CIRCUIT_STATES = [(CLOSED, 'Closed'), (OPEN, 'Open'), (HALF_OPEN, 'Half-open')]
+
     name = models.CharField(max_length=100, default="", blank=False, null=False)
     file_name = models.CharField(max_length=100, blank=False, null=False)
     ip_address = models.CharField(max_length=100, blank=False, null=False)
     port = models.PositiveIntegerField(default=502, blank=True, null=True)
+    address = models.PositiveIntegerField(default=0)
     equipment = models.ForeignKey(
         Equipment,
         verbose_name="Linked equipment",
@@ -34,6 +41,10 @@ class DataProvider(models.Model):
     recurrence = models.CharField(max_length=100, blank=False, null=False)
     is_activated = models.BooleanField(default=True, blank=False, null=True)
     job_id = models.CharField(max_length=100, default='')
+    # The polls of a failing data provider are suspended while it is open.
+    circuit_state = models.CharField(max_length=9, choices=CIRCUIT_STATES, default=CLOSED)
+    failure_count = models.PositiveIntegerField(default=0)
+    next_probe_at = models.DateTimeField(blank=True, null=True)
 
     def __str__(self):
         """Define string representation of a dataprovider."""
@@ -42,8 +53,8 @@ class DataProvider(models.Model):
     def __repr__(self):
         """Define the representation of a dataprovider."""
         return '<DataProvider: ' + "id={id}, name='{name}', filename='{file_name}', equipment=\
-'{equipment_name}', field_object='{field_object_field_name}', ip_address={ip_address}, port={port}, recurrence=\
-{recurrence}, is_activated={is_activated}, job_id={job_id}".format(
+'{equipment_name}', field_object='{field_object_field_name}', ip_address={ip_address}, port={port}, address=\
+{address}, recurrence={recurrence}, is_activated={is_activated}, job_id={job_id}".format(
             id=self.id,
             name=self.name,
             file_name=self.file_name,
@@ -51,7 +62,109 @@ class DataProvider(models.Model):
             field_object_field_name=self.field_object.field.name,
             ip_address=self.ip_address,
             port=self.port,
+            address=self.address,
             recurrence=self.recurrence,
             is_activated=self.is_activated,
             job_id=self.job_id
         ) + '>'
+
+
+class Reading(models.Model):
+    """Define a value got by a data provider, kept as history."""
+
+    dataprovider = models.ForeignKey(
+        DataProvider,
+        on_delete=models.CASCADE,
+        related_name="reading_set",
+        related_query_name="reading",
+        db_index=False
+    )
+    timestamp = models.DateTimeField()
+    value = models.FloatField()
+
+    class Meta:
+        """Add metadata on the class."""
+
+        # The rows are appended in time order, a BRIN index stays tiny.
+        indexes = [models.Index(fields=['dataprovider', 'timestamp']), BrinIndex(fields=['timestamp'])]
+
+    def __repr__(self):
+        """Define the representation of a reading."""
+        return "<Reading: dataprovider={dataprovider}, timestamp={timestamp}, value={value}>".format(
+            dataprovider=self.dataprovider_id, timestamp=self.timestamp, value=self.value
+        )
+
+
+class ReadingRollup(models.Model):
+    """Define the aggregated values got by a data provider during a period."""
+
+    MINUTE = '1m'
+    HOUR = '1h'
+    DAY = '1d'
+    RESOLUTIONS = [(MINUTE, 'Minute'), (HOUR, 'Hour'), (DAY, 'Day')]
+
+    dataprovider = models.ForeignKey(
+        DataProvider,
+        on_delete=models.CASCADE,
+        related_name="rollup_set",
+        related_query_name="rollup",
+        db_index=False
+    )
+    resolution = models.CharField(max_length=2, choices=RESOLUTIONS)
+    bucket = models.DateTimeField()
+    minimum = models.FloatField()
+    maximum = models.FloatField()
+    total = models.FloatField()
+    count = models.PositiveIntegerField()
+
+    class Meta:
+        """Add metadata on the class."""
+
+        unique_together = [['dataprovider', 'resolution', 'bucket']]
+        indexes = [models.Index(fields=['resolution', 'bucket'])]
+
+    @property
+    def average(self):
+        """Return the average of the aggregated values."""
+        return self.total / self.count
+
+    def __repr__(self):
+        """Define the representation of a reading rollup."""
+        return "<ReadingRollup: dataprovider={dataprovider}, resolution={resolution}, bucket={bucket}, \
+minimum={minimum}, maximum={maximum}, average={average}>".format(
+            dataprovider=self.dataprovider_id,
+            resolution=self.resolution,
+            bucket=self.bucket,
+            minimum=self.minimum,
+            maximum=self.maximum,
+            average=self.average
+        )
+
+
+class RollupWatermark(models.Model):
+    """Define the last reading seen by the aggregation of the readings.
+
+    The readings saved after it are checked for periods already aggregated.
+    """
+
+    # The id of the last reading, which may have been deleted since.
+    last_reading_id = models.IntegerField()
+
+    def __repr__(self):
+        """Define the representation of the watermark."""
+        return "<RollupWatermark: last_reading_id={}>".format(self.last_reading_id)
+
+
+class ScheduledJob(models.Model):
+    """Define a job of the scheduler worker, kept between its restarts."""
+
+    id = models.CharField(max_length=191, primary_key=True)
+    # The next run time as a UTC timestamp, None while the job is paused.
+    next_run_time = models.FloatField(null=True, blank=True, db_index=True)
+    job_state = models.BinaryField()
+
+    def __repr__(self):
+        """Define the representation of a scheduled job."""
+        return "<ScheduledJob: id={id}, next_run_time={next_run_time}>".format(
+            id=self.id, next_run_time=self.next_run_time
+        )
@@ -1,13 +1,15 @@
 """This file allows to send email notifications."""
 
 import logging
+import time
 from datetime import date, timedelta
 
 from apscheduler.schedulers.background import BackgroundScheduler
 
 from django.conf import settings
 from django.core import mail
-from django.template.loader import render_to_string
+from django.db.models import Case, F, IntegerField, Value, When
+from django.template.loader import get_template, render_to_string
 from django.utils.html import strip_tags
 from maintenancemanagement.models import Task
 from usersmanagement.models import UserProfile
@@ -15,21 +17,121 @@ from usersmanagement.models import UserProfile
 logger = logging.getLogger(__name__)
 
 
-def send_notifications():
-    r"""\n# Send notifications to users who have late or imminent tasks."""
-    for user in UserProfile.objects.all():
-        template = get_notification_template(user)
-        if template:
-            plain_message = strip_tags(template)
+# The buckets of the imminent tasks, in the order of the template.
+LATE, TODAY, COMING = 0, 1, 2
+# Number of days, from today, during which a task is coming.
+COMING_DAYS = 6
+
+
+def send_notifications(dry_run=False):
+    r"""\n# Send notifications to users who have late or imminent tasks.
+
+    The notifications are sent by a pipeline of three stages: the imminent
+    tasks of all the users are got with a single query, the mails are
+    rendered, then they are all sent over a single connection. With
+    dry_run, they are written in NOTIFICATIONS_DRY_RUN_PATH instead.
+
+    Return :
+    metrics (dict) : the duration in seconds of each stage, the number of
+        users notified and the number of mails sent.
+    """
+    metrics = {}
+    start_time = time.perf_counter()
+    imminent_tasks = get_all_imminent_tasks()
+    metrics['query_duration'] = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    messages = render_notifications(imminent_tasks)
+    metrics['render_duration'] = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    if dry_run:
+        connection = mail.get_connection(
+            'django.core.mail.backends.filebased.EmailBackend', file_path=settings.NOTIFICATIONS_DRY_RUN_PATH
+        )
+    else:
+        connection = mail.get_connection()
+    metrics['sent'] = _send_messages(connection, messages)
+    metrics['send_duration'] = time.perf_counter() - start_time
+    metrics['users'] = len(messages)
+    logger.info("Notifications sent: {}".format(metrics))
+    return metrics
+
+
+def get_all_imminent_tasks(users=None):
+    r"""\n# Get late, today and coming tasks of all the users at once.
+
+    The tasks are joined to the users of their teams and put in their
+    bucket by a single query.
+
+    Parameter :
+    users (QuerySet) : the users to consider, all of them by default.
+
+    Return :
+    imminent_tasks (dict) : for each user with tasks, the tuple of sets
+        (late_tasks_set(), today_tasks_set(), coming_tasks_set()).
+    """
+    today = date.today()
+    # The users are filtered in the same call as the other conditions, so
+    # that they use the join which user_id is annotated from.
+    lookups = {'teams__user__isnull': False} if users is None else {'teams__user__in': users}
+    tasks = Task.objects.filter(
+        over=False, is_triggered=True, end_date__lt=today + timedelta(days=COMING_DAYS), **lookups
+    ).annotate(
+        user_id=F('teams__user'),
+        bucket=Case(
+            When(end_date__lt=today, then=Value(LATE)),
+            When(end_date=today, then=Value(TODAY)),
+            default=Value(COMING),
+            output_field=IntegerField()
+        )
+    )
+    imminent_tasks = {}
+    for task in tasks:
+        imminent_tasks.setdefault(task.user_id, (set(), set(), set()))[task.bucket].add(task)
+    return imminent_tasks
+
+
+def render_notifications(imminent_tasks):
+    r"""\n# Render the notification mails of the users.
+
+    Parameter :
+    imminent_tasks (dict) : the imminent tasks of each user, as given by
+        get_all_imminent_tasks.
+
+    Return :
+    messages (list) : the mails to send.
+    """
+    template = get_template('notification_mail.html')
+    emails = dict(UserProfile.objects.filter(pk__in=imminent_tasks).values_list('pk', 'email'))
+    # The users of the same teams have the same tasks, their mail is
+    # rendered once, the CSS being inlined at each rendering.
+    rendered = {}
+    messages = []
+    for user_id, tasks in imminent_tasks.items():
+        key = tuple(frozenset(task.id for task in bucket) for bucket in tasks)
+        if key not in rendered:
+            html_message = template.render({'tasks': tasks, 'base_url': settings.BASE_URL})
+            rendered[key] = (html_message, strip_tags(html_message))
+        html_message, plain_message = rendered[key]
+        message = mail.EmailMultiAlternatives(
+            'Notification Open-CMMS', plain_message, settings.EMAIL_HOST_USER, [emails[user_id]]
+        )
+        message.attach_alternative(html_message, 'text/html')
+        messages.append(message)
+    return messages
+
+
+def _send_messages(connection, messages):
+    """Send the messages over the connection, return how many were sent."""
+    sent = 0
+    with connection:
+        for message in messages:
             try:
-                mail.send_mail(
-                    'Notification Open-CMMS',
-                    plain_message,
-                    settings.EMAIL_HOST_USER, [user.email],
-                    html_message=template
-                )
+                sent += connection.send_messages([message])
             except Exception as e:
-                logger.error("There was an exception while sending a mail.\n{}", e)
+                logger.error("There was an exception while sending a mail.\n{}".format(e))
+    return sent
 
 
 def get_notification_template(user):
@@ -60,19 +162,7 @@ def get_imminent_tasks(user):
     tuple_of_sets_of_tasks ((late_tasks_set(), today_tasks_set(), \
         coming_tasks_set())) : the tasks assigned to the user.
     """
-    result = (set(), set(), set())
-    tasks = Task.objects.filter(
-        teams__pk__in=user.groups.all().values_list("id", flat=True).iterator(), over=False, is_triggered=True
-    )
-    for task in tasks:
-        if task.end_date:
-            if task.end_date < date.today():
-                result[0].add(task)
-            if task.end_date == date.today():
-                result[1].add(task)
-            if task.end_date > date.today() and task.end_date < (date.today() + timedelta(days=6)):
-                result[2].add(task)
-    return result
+    return get_all_imminent_tasks(users=[user]).get(user.pk, (set(), set(), set()))
 
 
 def start():
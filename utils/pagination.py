@@ -0,0 +1,106 @@
+"""This file paginates, filters and projects the lists sent by the API."""
+
+import base64
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Q
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination:
+    """
+    Define a keyset pagination of a queryset on the given ordering.
+
+    The cursor of a page holds the values of the ordering fields of the last
+    item of the previous page, so any page is fetched with a range scan of an
+    index on these fields, unlike an offset. The fields are sorted ascending,
+    the null values last.
+    """
+
+    def __init__(self, ordering):
+        """Create a pagination on the given fields, the last being unique."""
+        self.ordering = ordering
+
+    def paginate(self, queryset, request):
+        """Return the items of the requested page and the next page url."""
+        page_size = int(request.query_params.get('page_size', settings.LIST_PAGE_SIZE))
+        if page_size < 1:
+            raise ValueError("The page size must be positive.")
+        page_size = min(page_size, settings.LIST_MAX_PAGE_SIZE)
+        queryset = queryset.order_by(*[F(field).asc(nulls_last=True) for field in self.ordering])
+        cursor = request.query_params.get('cursor')
+        if cursor:
+            queryset = queryset.filter(self._after(self.ordering, self._decode(cursor)))
+        items = list(queryset[:page_size + 1])
+        if len(items) <= page_size:
+            return items, None
+        items = items[:page_size]
+        return items, replace_query_param(request.build_absolute_uri(), 'cursor', self._encode(items[-1]))
+
+    def _encode(self, item):
+        values = [getattr(item, field) for field in self.ordering]
+        return base64.urlsafe_b64encode(json.dumps(values, cls=DjangoJSONEncoder).encode()).decode()
+
+    def _decode(self, cursor):
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise ValueError("The cursor is not valid.")
+        return values
+
+    def _after(self, ordering, values):
+        """Return the condition of the items following the given values."""
+        field, value = ordering[0], values[0]
+        if value is None:
+            after = Q(pk__in=[])
+            same = Q(**{field + '__isnull': True})
+        else:
+            after = Q(**{field + '__gt': value}) | Q(**{field + '__isnull': True})
+            same = Q(**{field: value})
+        if len(ordering) == 1:
+            return after
+        return after | (same & self._after(ordering[1:], values[1:]))
+
+
+def list_response(request, queryset, serializer_class, ordering, filters=None):
+    """Return the response listing the given queryset.
+
+    Each query parameter named in `filters` filters the queryset with the
+    associated lookup. The `fields` parameter keeps only the given comma
+    separated fields of each item. When a `cursor` or a `page_size`
+    parameter is given, the list is paginated on `ordering` and sent as
+    {'next': url of the next page, 'results': items}, otherwise it is sent
+    whole. An invalid parameter sends HTTP 400.
+    """
+    try:
+        lookups = {
+            lookup: _parse_filter(request.query_params[parameter])
+            for parameter, lookup in (filters or {}).items()
+            if parameter in request.query_params
+        }
+        queryset = queryset.filter(**lookups)
+        paginated = 'cursor' in request.query_params or 'page_size' in request.query_params
+        if paginated:
+            queryset, next_page = KeysetPagination(ordering).paginate(queryset, request)
+    except (ValueError, ValidationError):
+        return Response(status=status.HTTP_400_BAD_REQUEST)
+    serializer = serializer_class(queryset, many=True)
+    if request.query_params.get('fields'):
+        fields = request.query_params['fields'].split(',')
+        for field in list(serializer.child.fields):
+            if field not in fields:
+                serializer.child.fields.pop(field)
+    if paginated:
+        return Response({'next': next_page, 'results': serializer.data})
+    return Response(serializer.data)
+
+
+def _parse_filter(value):
+    """Return the value of a filter, 'true' and 'false' being booleans."""
+    if value.lower() in ('true', 'false'):
+        return value.lower() == 'true'
+    return value
@@ -0,0 +1,129 @@
+"""This file discovers and keeps the modules of the data providers.
+
+The modules of the data providers directory are imported once, checked and
+kept by file name, so that a poll only looks its module up. The directory
+is checked again at most every DATA_PROVIDERS_PLUGINS_CHECK_INTERVAL
+seconds, or when a file is added or removed, the modules whose file changed
+being imported again.
+"""
+
+import importlib
+import inspect
+import logging
+import os
+import sys
+import threading
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class InvalidPluginError(ImportError):
+    """Raised when the module of a data provider can't be used."""
+
+
+class PluginRegistry:
+    """
+    Define the registry of the modules found in a package directory.
+
+    A module is only registered if it defines a get_data function taking an
+    IP address and a port.
+    """
+
+    def __init__(self, package, directory):
+        """Define the registry of the modules of the package in directory."""
+        self.package = package
+        self.directory = directory
+        self._plugins = {}
+        self._errors = {}
+        self._versions = {}
+        self._directory_version = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def get(self, file_name, refresh=False):
+        """Return the module of the given file.
+
+        The directory is checked first if refresh is set, if the file is not
+        known yet or if it was not checked for a while. Raise an ImportError
+        if there is no such file and an InvalidPluginError if its module
+        can't be used.
+        """
+        if refresh or file_name not in self._plugins or self._is_outdated():
+            self.refresh()
+        plugin = self._plugins.get(file_name)
+        if plugin is None:
+            if file_name in self._errors:
+                raise InvalidPluginError(self._errors[file_name], name=self._module_name(file_name))
+            raise ModuleNotFoundError(f"No data provider named {file_name}", name=self._module_name(file_name))
+        return plugin
+
+    def file_names(self):
+        """Return the sorted file names of the usable modules."""
+        if self._is_outdated() or os.stat(self.directory).st_mtime_ns != self._directory_version:
+            self.refresh()
+        return sorted(self._plugins)
+
+    def refresh(self):
+        """Import the modules added or changed, and forget the removed ones."""
+        with self._lock:
+            directory_version = os.stat(self.directory).st_mtime_ns
+            versions = {}
+            for entry in os.scandir(self.directory):
+                if entry.is_file() and entry.name.endswith('.py') and entry.name != '__init__.py':
+                    stat = entry.stat()
+                    versions[entry.name] = (stat.st_mtime_ns, stat.st_size)
+            for file_name in self._versions.keys() - versions.keys():
+                self._plugins.pop(file_name, None)
+                self._errors.pop(file_name, None)
+                sys.modules.pop(self._module_name(file_name), None)
+            changed = [
+                file_name for file_name, version in versions.items() if self._versions.get(file_name) != version
+            ]
+            if changed:
+                importlib.invalidate_caches()
+            for file_name in changed:
+                self._load(file_name)
+            self._versions = versions
+            self._directory_version = directory_version
+            self._checked_at = time.monotonic()
+
+    def _is_outdated(self):
+        return self._checked_at is None \
+            or time.monotonic() - self._checked_at >= settings.DATA_PROVIDERS_PLUGINS_CHECK_INTERVAL
+
+    def _module_name(self, file_name):
+        return f"{self.package}.{file_name[:-3]}"
+
+    def _load(self, file_name):
+        self._plugins.pop(file_name, None)
+        self._errors.pop(file_name, None)
+        module_name = self._module_name(file_name)
+        try:
+            if module_name in sys.modules:
+                module = importlib.reload(sys.modules[module_name])
+            else:
+                module = importlib.import_module(module_name)
+            _check_plugin(module)
+        except Exception as e:
+            sys.modules.pop(module_name, None)
+            self._errors[file_name] = str(e)
+            logger.warning("The data provider module {} can't be used : {}".format(file_name, e))
+        else:
+            self._plugins[file_name] = module
+
+
+def _check_plugin(module):
+    """Raise an InvalidPluginError if the module has no usable get_data."""
+    get_data = getattr(module, 'get_data', None)
+    if not callable(get_data):
+        raise InvalidPluginError(f"{module.__name__} has no get_data function")
+    try:
+        inspect.signature(get_data).bind('127.0.0.1', 502)
+    except TypeError:
+        raise InvalidPluginError(f"get_data of {module.__name__} must take an IP address and a port")
+
+
+registry = PluginRegistry('utils.data_providers', os.path.join(os.path.dirname(__file__), 'data_providers'))
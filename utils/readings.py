@@ -0,0 +1,175 @@
+"""This file keeps the history of the values got by the data providers."""
+
+import logging
+from datetime import datetime, timedelta
+
+from apscheduler.schedulers.background import BackgroundScheduler
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max, Min, Sum
+from django.db.models.functions import Trunc
+from django.utils import timezone
+from utils.models import Reading, ReadingRollup, RollupWatermark
+
+logger = logging.getLogger(__name__)
+
+# Each resolution is aggregated from the previous one, the first one from
+# the readings.
+RESOLUTIONS = [
+    (ReadingRollup.MINUTE, timedelta(minutes=1), 'minute'),
+    (ReadingRollup.HOUR, timedelta(hours=1), 'hour'),
+    (ReadingRollup.DAY, timedelta(days=1), 'day'),
+]
+
+
+def maintain_readings():
+    """Aggregate the new readings and delete the expired ones.
+
+    This method will be running inside a job of a scheduler.
+    """
+    now = timezone.now()
+    roll_up(now)
+    purge(now)
+
+
+def roll_up(now):
+    """Aggregate the complete periods which are not aggregated yet.
+
+    The periods ending less than READINGS_ROLLUP_DELAY seconds before now
+    are left for later, the values got during them may still be buffered.
+    The readings saved since the last aggregation into periods already
+    aggregated, like the values of a late device, have the periods of their
+    data providers aggregated again, at each resolution.
+    """
+    end = now - timedelta(seconds=settings.READINGS_ROLLUP_DELAY)
+    source, time_field = Reading.objects.all(), 'timestamp'
+    aggregations = {
+        'minimum_value': Min('value'),
+        'maximum_value': Max('value'),
+        'total_value': Sum('value'),
+        'count_value': Count('id'),
+    }
+    last_reading_id = Reading.objects.aggregate(Max('id'))['id__max'] or 0
+    watermark, _ = RollupWatermark.objects.get_or_create(defaults={'last_reading_id': last_reading_id})
+    late_readings = Reading.objects.filter(id__gt=watermark.last_reading_id, id__lte=last_reading_id)
+    if settings.READINGS_RETENTION_DAYS['raw'] is not None:
+        # The periods whose readings are deleted can't be aggregated again.
+        retention_start = _ceil(now - timedelta(days=settings.READINGS_RETENTION_DAYS['raw']), RESOLUTIONS[0][1])
+        late_readings = late_readings.filter(timestamp__gte=retention_start)
+    late = None
+    for resolution, period, kind in RESOLUTIONS:
+        last_bucket = ReadingRollup.objects.filter(resolution=resolution).aggregate(Max('bucket'))['bucket__max']
+        rows = source.filter(**{time_field + '__lt': _floor(end, period)})
+        if last_bucket:
+            aggregated_end = last_bucket + period
+            rows = rows.filter(**{time_field + '__gte': aggregated_end})
+            if resolution == ReadingRollup.MINUTE:
+                late = _get_late_range(late_readings.filter(timestamp__lt=aggregated_end))
+            elif late is not None:
+                late = (late[0], _floor(late[1], period), min(_ceil(late[2], period), aggregated_end))
+        else:
+            late = None
+        with transaction.atomic():
+            rollups = _aggregate(rows, resolution, kind, time_field, aggregations)
+            if late is not None and late[1] < late[2]:
+                dataprovider_ids, late_start, late_end = late
+                ReadingRollup.objects.filter(
+                    resolution=resolution,
+                    dataprovider_id__in=dataprovider_ids,
+                    bucket__gte=late_start,
+                    bucket__lt=late_end
+                ).delete()
+                rollups += _aggregate(
+                    source.filter(
+                        dataprovider_id__in=dataprovider_ids,
+                        **{time_field + '__gte': late_start, time_field + '__lt': late_end}
+                    ), resolution, kind, time_field, aggregations
+                )
+            ReadingRollup.objects.bulk_create(rollups, batch_size=1000)
+        source, time_field = ReadingRollup.objects.filter(resolution=resolution), 'bucket'
+        aggregations = {
+            'minimum_value': Min('minimum'),
+            'maximum_value': Max('maximum'),
+            'total_value': Sum('total'),
+            'count_value': Sum('count'),
+        }
+    RollupWatermark.objects.filter(pk=watermark.pk).update(last_reading_id=last_reading_id)
+
+
+def _get_late_range(readings):
+    """Return the data providers and the minutes of the late readings."""
+    late = readings.aggregate(start=Min('timestamp'), end=Max('timestamp'))
+    if late['start'] is None:
+        return None
+    dataprovider_ids = list(readings.order_by().values_list('dataprovider_id', flat=True).distinct())
+    period = RESOLUTIONS[0][1]
+    return dataprovider_ids, _floor(late['start'], period), _floor(late['end'], period) + period
+
+
+def _aggregate(rows, resolution, kind, time_field, aggregations):
+    """Return the rollups of the rows, by data provider and period."""
+    rows = rows.values('dataprovider_id', period_start=Trunc(time_field, kind, tzinfo=timezone.utc))
+    return [
+        ReadingRollup(
+            dataprovider_id=row['dataprovider_id'],
+            resolution=resolution,
+            bucket=row['period_start'],
+            minimum=row['minimum_value'],
+            maximum=row['maximum_value'],
+            total=row['total_value'],
+            count=row['count_value'],
+        ) for row in rows.annotate(**aggregations)
+    ]
+
+
+def _floor(date, period):
+    """Return the start of the period containing the date."""
+    seconds = int(period.total_seconds())
+    return datetime.fromtimestamp(int(date.timestamp()) // seconds * seconds, timezone.utc)
+
+
+def _ceil(date, period):
+    """Return the start of the first period from the date."""
+    start = _floor(date, period)
+    return start if start == date else start + period
+
+
+def purge(now):
+    """Delete the readings and the rollups older than their retention."""
+    retention = settings.READINGS_RETENTION_DAYS
+    if retention['raw'] is not None:
+        Reading.objects.filter(timestamp__lt=now - timedelta(days=retention['raw'])).delete()
+    for resolution, _, _ in RESOLUTIONS:
+        if retention[resolution] is not None:
+            ReadingRollup.objects.filter(
+                resolution=resolution, bucket__lt=now - timedelta(days=retention[resolution])
+            ).delete()
+
+
+def get_series(dataprovider, start, end, resolution=None):
+    """Return the resolution and the rollups of a data provider in a range.
+
+    Without a resolution, the finest one returning at most READINGS_MAX_POINTS
+    points is chosen.
+    """
+    if resolution is None:
+        resolution = RESOLUTIONS[-1][0]
+        for name, period, _ in RESOLUTIONS:
+            if (end - start) / period <= settings.READINGS_MAX_POINTS:
+                resolution = name
+                break
+    rollups = ReadingRollup.objects.filter(
+        dataprovider=dataprovider, resolution=resolution, bucket__gte=start, bucket__lt=end
+    ).order_by('bucket')
+    return resolution, rollups
+
+
+def start():
+    """Set up the job aggregating the readings."""
+    try:
+        scheduler = BackgroundScheduler()
+        scheduler.add_job(maintain_readings, 'interval', minutes=1)
+        scheduler.start()
+    except Exception as e:
+        logger.critical("The readings scheduler did not start. {e}".format(e=e))
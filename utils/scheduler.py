@@ -0,0 +1,90 @@
+"""This file runs the background jobs in a single worker of a deployment."""
+
+import logging
+import time
+
+from django.conf import settings
+from django.db import connection
+from maintenancemanagement import files, thumbnails
+from utils import data_provider, notifications, readings, trigger_tasks
+
+logger = logging.getLogger(__name__)
+
+# Key of the PostgreSQL advisory lock held by the running scheduler worker.
+LEADER_LOCK_KEY = 0x6f434d4d
+
+
+class LeaderLock:
+    """
+    Define the lock electing the scheduler worker running the jobs.
+
+    It is a session level PostgreSQL advisory lock: it is released when the
+    worker holding it stops or loses its database connection, so that a
+    worker waiting for it takes over.
+    """
+
+    def __init__(self, key=LEADER_LOCK_KEY):
+        """Define the lock of the given key."""
+        self.key = key
+
+    def acquire(self):
+        """Take the lock if it is free, return whether it was taken."""
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_try_advisory_lock(%s)", [self.key])
+            return cursor.fetchone()[0]
+
+    def is_held(self):
+        """Return whether the lock is still held by this worker."""
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT EXISTS(SELECT 1 FROM pg_locks WHERE locktype = 'advisory' AND pid = pg_backend_pid() "
+                    "AND granted AND objsubid = 1 AND (classid::bigint << 32) + objid::bigint = %s)", [self.key]
+                )
+                return cursor.fetchone()[0]
+        except Exception:
+            logger.exception("The scheduler lock could not be checked.")
+            return False
+
+    def release(self):
+        """Release the lock."""
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_unlock(%s)", [self.key])
+
+
+def start_jobs():
+    """Start the schedulers of all the background jobs."""
+    notifications.start()
+    trigger_tasks.start()
+    readings.start()
+    files.start()
+    thumbnails.start()
+    data_provider.start()
+
+
+def run(lock=None):
+    """Wait to be the scheduler worker, then run the background jobs.
+
+    The jobs of the data providers are reconciled with the database every
+    SCHEDULER_RECONCILE_INTERVAL seconds. The worker stops if it loses the
+    lock, as another one may take over.
+    """
+    lock = lock or LeaderLock()
+    while not lock.acquire():
+        logger.info("Another scheduler worker is running, waiting to take over.")
+        time.sleep(settings.SCHEDULER_STANDBY_INTERVAL)
+    logger.info("This scheduler worker runs the background jobs.")
+    start_jobs()
+    try:
+        while True:
+            time.sleep(settings.SCHEDULER_RECONCILE_INTERVAL)
+            if not lock.is_held():
+                logger.critical("The scheduler worker lost its lock and stops.")
+                return
+            try:
+                data_provider.reconcile_jobs()
+            except Exception:
+                logger.exception("The jobs of the data providers could not be reconciled.")
+    finally:
+        if data_provider.reading_writer is not None:
+            data_provider.reading_writer.flush()
@@ -7,7 +7,7 @@ from maintenancemanagement.serializers import (
 
 from rest_framework import serializers
 
-from .models import DataProvider
+from .models import DataProvider, ReadingRollup
 
 
 class DataProviderSerializer(serializers.ModelSerializer):
@@ -21,8 +21,10 @@ class DataProviderSerializer(serializers.ModelSerializer):
 
         model = DataProvider
         fields = [
-            'id', 'name', 'file_name', 'ip_address', 'equipment', 'field_object', 'recurrence', 'is_activated', 'port'
+            'id', 'name', 'file_name', 'ip_address', 'equipment', 'field_object', 'recurrence', 'is_activated', 'port',
+            'address', 'circuit_state', 'failure_count', 'next_probe_at'
         ]
+        read_only_fields = ['circuit_state', 'failure_count', 'next_probe_at']
 
 
 class DataProviderCreateSerializer(serializers.ModelSerializer):
@@ -33,7 +35,8 @@ class DataProviderCreateSerializer(serializers.ModelSerializer):
 
         model = DataProvider
         fields = [
-            'id', 'name', 'file_name', 'ip_address', 'equipment', 'field_object', 'recurrence', 'is_activated', 'port'
+            'id', 'name', 'file_name', 'ip_address', 'equipment', 'field_object', 'recurrence', 'is_activated', 'port',
+            'address'
         ]
 
 
@@ -45,12 +48,13 @@ class DataProviderUpdateSerializer(serializers.ModelSerializer):
 
         model = DataProvider
         fields = [
-            'id', 'name', 'file_name', 'ip_address', 'equipment', 'field_object', 'recurrence', 'is_activated', 'port'
+            'id', 'name', 'file_name', 'ip_address', 'equipment', 'field_object', 'recurrence', 'is_activated', 'port',
+            'address'
         ]
 
 
 class DataProviderDetailsSerializer(serializers.ModelSerializer):
-    """DataProvider details Serialize."""
+    """DataProvider details Serialize, with the state of its polls."""
 
     equipment = EquipmentSerializer()
     field_object = FieldObjectSerializer()
@@ -60,8 +64,10 @@ class DataProviderDetailsSerializer(serializers.ModelSerializer):
 
         model = DataProvider
         fields = [
-            'id', 'name', 'file_name', 'ip_address', 'equipment', 'field_object', 'recurrence', 'is_activated', 'port'
+            'id', 'name', 'file_name', 'ip_address', 'equipment', 'field_object', 'recurrence', 'is_activated', 'port',
+            'address', 'circuit_state', 'failure_count', 'next_probe_at'
         ]
+        read_only_fields = ['circuit_state', 'failure_count', 'next_probe_at']
 
 
 class DataProviderRequirementsSerializer(serializers.Serializer):
@@ -69,3 +75,20 @@ class DataProviderRequirementsSerializer(serializers.Serializer):
 
     equipments = EquipmentDetailsDataProviderSerializer(many=True)
     data_providers = DataProviderDetailsSerializer(many=True)
+
+
+class ReadingRollupSerializer(serializers.ModelSerializer):
+    """Reading rollup serializer, the timestamps are in milliseconds."""
+
+    timestamp = serializers.SerializerMethodField()
+    average = serializers.FloatField()
+
+    class Meta:
+        """This class contains the serializer metadata."""
+
+        model = ReadingRollup
+        fields = ['timestamp', 'minimum', 'maximum', 'average', 'count']
+
+    def get_timestamp(self, obj):
+        """Return the start of the period in milliseconds."""
+        return int(obj.bucket.timestamp() * 1000)
@@ -5,25 +5,105 @@ from datetime import date
 from apscheduler.schedulers.background import BackgroundScheduler
 
 from django.contrib.contenttypes.models import ContentType
-from maintenancemanagement.models import FieldObject, Task
-from utils.methods import parse_time
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import F
+from maintenancemanagement.models import FieldObject, Task, TriggerCondition
 
 logger = logging.getLogger(__name__)
 
+TRIGGER_CONDITIONS = 'Trigger Conditions'
+SENSOR_CONDITIONS = ['Above Threshold', 'Under Threshold', 'Frequency']
+
 
 def check_tasks():
     """Check all tasks and activates it if necessary.
 
-    This method will be running inside a job of a scheduler.
+    This method will be running inside a job of a scheduler. As the tasks
+    watching a field object are checked as soon as a data provider updates
+    it, this full check is only a safety net.
+    """
+    trigger_tasks(Task.objects.filter(over=False, is_triggered=False))
+
+
+def check_tasks_watching(*field_objects):
+    """Check the tasks with a trigger condition watching the field objects.
+
+    This method is called each time data providers update field objects.
+    The tasks are found through the indexed source of their trigger
+    conditions, so the other tasks are not checked.
+    """
+    content_type_object = ContentType.objects.get_for_model(Task)
+    task_ids = TriggerCondition.objects.filter(
+        source__in=field_objects, field_object__content_type=content_type_object
+    ).values('field_object__object_id')
+    trigger_tasks(Task.objects.filter(over=False, is_triggered=False, id__in=task_ids))
+
+
+def trigger_tasks(tasks_to_check):
+    """Activate the given tasks having at least one verified trigger condition.
+
+    The whole pass is done in a fixed number of queries, whatever the number
+    of tasks : one for the tasks, one for their trigger conditions joined to
+    the values of the field objects they watch and one bulk update for the
+    triggered tasks.
     """
-    tasks_to_check = Task.objects.filter(over=False, is_triggered=False)
-    for task in tasks_to_check:
-        condition = at_least_one_conditon_is_verified(task)
-        if condition:
+    tasks = tasks_to_check.only('id', 'end_date', 'is_triggered').in_bulk()
+    if not tasks:
+        return
+    tasks_to_update = []
+    for condition in _get_trigger_conditions(tasks_to_check):
+        task = tasks.get(condition.task_id)
+        if task is None or task.is_triggered:
+            continue
+        if _is_verified(condition, task.end_date):
             task.is_triggered = True
-            if condition.field.name in ['Above Threshold', 'Under Threshold', 'Frequency']:
-                task.end_date = date.today() + parse_time(condition.value.split('|')[2])
-            task.save()
+            if condition.field_name in SENSOR_CONDITIONS:
+                task.end_date = date.today() + condition.delay
+            tasks_to_update.append(task)
+    if tasks_to_update:
+        Task.objects.bulk_update(tasks_to_update, ['is_triggered', 'end_date'])
+        logger.info("{number} task(s) TRIGGERED".format(number=len(tasks_to_update)))
+
+
+def _get_trigger_conditions(tasks):
+    """Return the trigger conditions of the given tasks, ordered by task.
+
+    Each trigger condition is annotated with the id of its task, the name of
+    its field and the current value of the field object it watches.
+    """
+    content_type_object = ContentType.objects.get_for_model(Task)
+    return TriggerCondition.objects.filter(
+        field_object__object_id__in=tasks.values('id'),
+        field_object__content_type=content_type_object,
+    ).annotate(
+        task_id=F('field_object__object_id'),
+        field_name=F('field_object__field__name'),
+        source_value=F('source__value'),
+    ).order_by('task_id', 'field_object_id')
+
+
+def _is_verified(condition, end_date):
+    """Check if an annotated trigger condition is verified, without query."""
+    if condition.field_name == 'Recurrence':
+        return date.today() >= end_date - condition.delay
+    if condition.source_value is None:
+        return False
+    try:
+        value = float(condition.source_value)
+    except ValueError:
+        logger.warning(
+            "The value '{}' of FieldObject {} is not a number".format(condition.source_value, condition.source_id)
+        )
+        return False
+    if condition.field_name == 'Frequency':
+        return value >= condition.next_trigger
+    if condition.threshold is None:
+        return False
+    if condition.field_name == 'Above Threshold':
+        return condition.threshold < value
+    if condition.field_name == 'Under Threshold':
+        return condition.threshold > value
+    return False
 
 
 def at_least_one_conditon_is_verified(task):
@@ -32,7 +112,7 @@ def at_least_one_conditon_is_verified(task):
     task_conditions = FieldObject.objects.filter(
         object_id=task.id,
         content_type=content_type_object,
-        field__field_group__name='Trigger Conditions',
+        field__field_group__name=TRIGGER_CONDITIONS,
     )
     for condition in task_conditions:
         if condition_is_verified(condition, task):
@@ -42,29 +122,21 @@ def at_least_one_conditon_is_verified(task):
 
 def condition_is_verified(condition, task):
     """Check if the condition given is validated to activate the given task."""
-    if condition.field.name == 'Recurrence':
-        delay = condition.value.split('|')[1]
-        return date.today() >= task.end_date - parse_time(delay)
-    elif condition.field.name == 'Frequency':
-        field_object_id = int(condition.value.split('|')[1])
-        value = float(FieldObject.objects.get(id=field_object_id).value)
-        next_trigger = float(condition.value.split('|')[3])
-        return value >= next_trigger
-    else:
-        field_object_id = int(condition.value.split('|')[1])
-        value = float(FieldObject.objects.get(id=field_object_id).value)
-        threshold = float(condition.value.split('|')[0])
-        if condition.field.name == 'Above Threshold':
-            return threshold < value
-        if condition.field.name == 'Under Threshold':
-            return threshold > value
+    try:
+        trigger_condition = TriggerCondition.objects.annotate(
+            field_name=F('field_object__field__name'),
+            source_value=F('source__value'),
+        ).get(field_object=condition)
+    except ObjectDoesNotExist:
+        return False
+    return _is_verified(trigger_condition, task.end_date)
 
 
 def start():
     """Set up the cron job to trigger tasks."""
     try:
         scheduler = BackgroundScheduler()
-        scheduler.add_job(check_tasks, 'cron', minute='*/5')
+        scheduler.add_job(check_tasks, 'cron', minute='*/30')
         scheduler.start()
     except Exception as e:
         logger.critical("The trigger tasks scheduler did not start. {e}", e=e)
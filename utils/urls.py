@@ -1,6 +1,11 @@
 """This files routes our utilities."""
 from django.urls import path
-from utils.views import DataProviderDetail, DataProviderList, TestDataProvider
+from utils.views import (
+    DataProviderDetail,
+    DataProviderList,
+    DataProviderReadings,
+    TestDataProvider,
+)
 
 urlpatterns = []
 
@@ -8,6 +13,7 @@ urlpatterns_dataprovider = [
     path('dataproviders/', DataProviderList.as_view(), name='dataprovider-list'),
     path('dataproviders/<int:pk>/', DataProviderDetail.as_view(), name='dataprovider-detail'),
     path('dataproviders/test/', TestDataProvider.as_view(), name='dataprovider-test'),
+    path('dataproviders/<int:pk>/readings/', DataProviderReadings.as_view(), name='dataprovider-readings'),
 ]
 
 urlpatterns += urlpatterns_dataprovider
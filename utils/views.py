@@ -1,25 +1,26 @@
 """This is our file to provide our endpoints for our utilities."""
 import logging
-import os
+from datetime import datetime
 
 from drf_yasg.utils import swagger_auto_schema
 from maintenancemanagement.models import Equipment, FieldObject
-from openCMMS.settings import BASE_DIR
 from utils.data_provider import (
     DataProviderException,
-    add_job,
-    scheduler,
     test_dataprovider_configuration,
 )
-from utils.models import DataProvider
+from utils.models import DataProvider, ReadingRollup
+from utils.plugins import registry
+from utils.readings import get_series
 from utils.serializers import (
     DataProviderCreateSerializer,
     DataProviderDetailsSerializer,
     DataProviderRequirementsSerializer,
     DataProviderUpdateSerializer,
+    ReadingRollupSerializer,
 )
 
 from django.core.exceptions import ObjectDoesNotExist
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
@@ -57,10 +58,7 @@ class DataProviderList(APIView):
     def get(self, request):
         """Send the list of DataProvider in the database."""
         if request.user.has_perm("utils.view_dataprovider"):
-            python_files = os.listdir(os.path.join(BASE_DIR, 'utils/data_providers'))
-            python_files.pop(python_files.index('__init__.py'))
-            if '__pycache__' in python_files:
-                python_files.pop(python_files.index('__pycache__'))
+            python_files = registry.file_names()
             data_providers = DataProvider.objects.all()
             equipments = Equipment.objects.all()
             serializer = DataProviderRequirementsSerializer(
@@ -95,7 +93,6 @@ class DataProviderList(APIView):
             if dataprovider_serializer.is_valid():
                 logger.info("CREATED DataProvider with {param}".format(param=request.data))
                 dataprovider = dataprovider_serializer.save()
-                add_job(dataprovider)
                 dataprovider_details_serializer = DataProviderDetailsSerializer(dataprovider)
                 return Response(dataprovider_details_serializer.data, status=status.HTTP_201_CREATED)
             return Response(dataprovider_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -142,8 +139,6 @@ class DataProviderDetail(APIView):
             return Response(status=status.HTTP_404_NOT_FOUND)
         if request.user.has_perm("utils.delete_dataprovider"):
             logger.info("DELETED DataProvider {dataprovider}".format(dataprovider=repr(dataprovider)))
-            if dataprovider.job_id:
-                scheduler.remove_job(dataprovider.job_id)
             dataprovider.delete()
             return Response(status=status.HTTP_204_NO_CONTENT)
         return Response(status=status.HTTP_401_UNAUTHORIZED)
@@ -173,10 +168,6 @@ class DataProviderDetail(APIView):
                     )
                 )
                 dataprovider = serializer.save()
-                if dataprovider.is_activated is False:
-                    scheduler.pause_job(dataprovider.job_id)
-                else:
-                    scheduler.resume_job(dataprovider.job_id)
                 dataprovider_details_serializer = DataProviderDetailsSerializer(dataprovider)
                 return Response(dataprovider_details_serializer.data)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -217,3 +208,38 @@ class TestDataProvider(APIView):
                 response = {"error": str(e)}
                 return Response(response, status=status.HTTP_200_OK)
         return Response(status=status.HTTP_401_UNAUTHORIZED)
+
+
+class DataProviderReadings(APIView):
+    """This will be our endpoint for the history of a dataprovider values."""
+
+    @swagger_auto_schema(
+        operation_description='Send the aggregated values got by the DataProvider corresponding to the given key. \
+            The query parameters start and end are timestamps in milliseconds, resolution is optional : \
+            1m, 1h or 1d.',
+        query_serializer=None,
+        responses={
+            200: ReadingRollupSerializer(many=True),
+            400: "Bad request",
+            401: "Unhauthorized",
+            404: "Not found",
+        },
+    )
+    def get(self, request, pk):
+        """Send the aggregated values got by the given DataProvider."""
+        try:
+            dataprovider = DataProvider.objects.get(pk=pk)
+        except ObjectDoesNotExist:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+        if request.user.has_perm("utils.view_dataprovider"):
+            resolution = request.query_params.get('resolution')
+            if resolution is not None and resolution not in dict(ReadingRollup.RESOLUTIONS):
+                return Response(status=status.HTTP_400_BAD_REQUEST)
+            try:
+                start = datetime.fromtimestamp(int(request.query_params['start']) / 1000, timezone.utc)
+                end = datetime.fromtimestamp(int(request.query_params['end']) / 1000, timezone.utc)
+            except (KeyError, ValueError, OverflowError, OSError):
+                return Response(status=status.HTTP_400_BAD_REQUEST)
+            resolution, rollups = get_series(dataprovider, start, end, resolution)
+            return Response({'resolution': resolution, 'readings': ReadingRollupSerializer(rollups, many=True).data})
+        return Response(status=status.HTTP_401_UNAUTHORIZED)